@@ -1,44 +1,177 @@
-from flask import Flask, request, render_template, session, redirect, url_for, flash, jsonify
+from flask import Flask, request, render_template, session, redirect, url_for, flash, jsonify, Response, stream_with_context, g
 import requests
 import os
-from input import extract_text
+from gemini_client import get_gemini_client
+from input import extract_text, warm_up
+from extractors import supported_extensions
+from jobs import JobQueue, DONE, FAILED
+from llm_cache import get_llm_cache
 from werkzeug.utils import secure_filename
 import json
 import re
+import time
+import logging
+import zlib
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from chunking import estimate_tokens, split_into_chunks
+from retrieval import get_index
+from session_store import ServerSideSessionInterface
+from upload_store import get_upload_store
+from metrics import end_timing_scope, increment, render_metrics, start_timing_scope, timed
+from normalization import compact_for_prompt, normalized_document
+from structured_output import analysis_schema, field_skeleton, fill_missing, merge_fields, parse_json_lenient, validate_analysis
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  
+# Session data (extracted document, analysis, chat history) stays on the server; the cookie holds only an id
+app.session_interface = ServerSideSessionInterface()
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+# Uploads are extracted and analyzed in the background so requests return immediately
+job_queue = JobQueue()
+
+# Opt-in: load the extraction libraries and language profiles before serving, instead of on the first upload
+if os.getenv("REQUBE_WARM_UP", "0") == "1":
+    warm_up()
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise EnvironmentError("GEMINI_API_KEY environment variable not set.")
 
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# Documents above this size are analyzed chunk by chunk and the results merged
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("REQUBE_ANALYSIS_CHUNK_TOKENS", "24000"))
+ANALYSIS_MAX_PARALLEL_CHUNKS = int(os.getenv("REQUBE_ANALYSIS_MAX_PARALLEL_CHUNKS", "8"))
+# Estimated tokens of normalized document text one analysis may send across all its chunks; the rest is cut off
+ANALYSIS_MAX_TOKENS = int(os.getenv("REQUBE_ANALYSIS_MAX_TOKENS", "250000"))
+
+# "1" asks Gemini for JSON constrained to the analysis schema (response schemas need the v1beta API),
+# "0" relies on the prompt alone; either way responses are parsed leniently and incomplete fields re-requested
+STRUCTURED_OUTPUT = os.getenv("REQUBE_STRUCTURED_OUTPUT", "1") == "1"
+STRUCTURED_OUTPUT_API_VERSION = os.getenv("REQUBE_STRUCTURED_OUTPUT_API_VERSION", "v1beta")
+# Follow-up calls allowed per analysis to fill in fields the response lacked or cut off
+ANALYSIS_REPAIR_ATTEMPTS = int(os.getenv("REQUBE_ANALYSIS_REPAIR_ATTEMPTS", "1"))
+
+# What each analysis field should hold, for prompts that ask for only some of them
+ANALYSIS_FIELD_DESCRIPTIONS = {
+    "key_points": "the most important details of the text, as a list of strings",
+    "summary": "a concise and accurate summary of the text, as a string",
+    "requirements.functional": 'functional requirements (features and behaviors), as a list of "FR<n>: description" strings',
+    "requirements.non_functional": 'non-functional requirements (performance, security, usability and other constraints), as a list of "NFR<n>: description" strings',
+    "missing_info_questions": "precise questions that clarify missing or ambiguous details, as a list of strings",
+}
+
+# Chat about documents above this size sends only the passages relevant to the question
+CHAT_FULL_CONTEXT_TOKENS = int(os.getenv("REQUBE_CHAT_FULL_CONTEXT_TOKENS", "4000"))
+# Estimated tokens of document context one chat prompt may carry after normalization
+CHAT_MAX_CONTEXT_TOKENS = int(os.getenv("REQUBE_CHAT_MAX_CONTEXT_TOKENS", "8000"))
+
+# Files extracted and analyzed at once in a batch upload, and the limits on one batch including ZIP contents
+BATCH_MAX_WORKERS = int(os.getenv("REQUBE_BATCH_MAX_WORKERS", "8"))
+BATCH_MAX_FILES = int(os.getenv("REQUBE_BATCH_MAX_FILES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("REQUBE_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# How often the job event stream checks for progress
+JOB_EVENTS_POLL_SECONDS = 0.5
+
+# "FR3: ..." / "NFR12 - ..." prefixes the model puts in front of requirements
+REQUIREMENT_ID_PREFIX = re.compile(r"^\s*N?FR\s*\d+\s*[:.)-]\s*", re.IGNORECASE)
+
 def extract_json_from_text(text):
-    """Extract valid JSON from a mixed response."""
-    match = re.search(r"```json\n(.*?)\n```", text, re.DOTALL)
+    """Extract valid JSON from a mixed response, salvaging fenced, wrapped or truncated JSON."""
+    data, _ = parse_json_lenient(text)
+    if data is None:
+        return {"error": "No valid JSON found in response."}
+    if not isinstance(data, dict):
+        return {"error": "Extracted text is not valid JSON."}
+    return data
+
+
+def _dedupe(items, strip_prefix=False):
+    """Drops repeated entries, comparing case- and whitespace-insensitively."""
+    seen = set()
+    unique = []
+    for item in items:
+        text = REQUIREMENT_ID_PREFIX.sub("", item) if strip_prefix else item
+        key = " ".join(text.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(text.strip())
+    return unique
+
+
+def merge_analysis_results(results):
+    """Merges per-chunk analyses into one, de-duplicating lists and renumbering requirement IDs."""
+    functional = _dedupe((req for r in results for req in r.get("requirements", {}).get("functional", [])), True)
+    non_functional = _dedupe((req for r in results for req in r.get("requirements", {}).get("non_functional", [])), True)
+    return {
+        "key_points": _dedupe(point for r in results for point in r.get("key_points", [])),
+        "summary": " ".join(r.get("summary", "").strip() for r in results if r.get("summary", "").strip()),
+        "requirements": {
+            "functional": [f"FR{i}: {req}" for i, req in enumerate(functional, start=1)],
+            "non_functional": [f"NFR{i}: {req}" for i, req in enumerate(non_functional, start=1)],
+        },
+        "missing_info_questions": _dedupe(q for r in results for q in r.get("missing_info_questions", [])),
+    }
 
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            return {"error": "Extracted text is not valid JSON."}
-    return {"error": "No valid JSON found in response."}
 
-def analyze_business_text(input_text):
+def merge_attributed_results(named_results):
+    """Merges per-file analyses into one and tags each requirement with the files it was found in.
+
+    named_results is a list of (file name, analysis) pairs.
+    """
+    merged = merge_analysis_results([result for _, result in named_results])
+    merged["summary"] = " ".join(
+        f"{name}: {result['summary'].strip()}" for name, result in named_results if result.get("summary", "").strip()
+    )
+    for kind, prefix in (("functional", "FR"), ("non_functional", "NFR")):
+        sources = {}  # Normalized requirement -> (text, files), in first-seen order
+        for name, result in named_results:
+            for req in result.get("requirements", {}).get(kind, []):
+                text = REQUIREMENT_ID_PREFIX.sub("", req).strip()
+                key = " ".join(text.lower().split())
+                if not key:
+                    continue
+                files = sources.setdefault(key, (text, []))[1]
+                if name not in files:
+                    files.append(name)
+        merged["requirements"][kind] = [
+            f"{prefix}{i}: {text} (Source: {', '.join(files)})" for i, (text, files) in enumerate(sources.values(), start=1)
+        ]
+    return merged
+
+
+def analyze_in_chunks(chunks, use_cache=True):
+    """Analyzes chunks concurrently and merges the results, so latency follows the largest chunk."""
+    workers = max(1, min(ANALYSIS_MAX_PARALLEL_CHUNKS, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda chunk: analyze_business_text(chunk, use_cache, chunked=False), chunks))
+
+    for index, chunk_result in enumerate(results, start=1):
+        if "error" in chunk_result:
+            return {"error": f"Part {index} of {len(chunks)}: {chunk_result['error']}"}
+    return merge_analysis_results(results)
+
+
+def analyze_business_text(input_text, use_cache=True, chunked=True):
     """Send text to Gemini API for requirement analysis."""
+    if chunked:
+        # Chunks are cut from the compacted text, so only this top-level call normalizes and budgets it
+        input_text = compact_for_prompt(input_text, ANALYSIS_MAX_TOKENS, "analysis")
     if not input_text.strip():
         return {"error": "No valid text provided for analysis."}
 
-    url = f"https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
-    headers = {"Content-Type": "application/json"}
+    if chunked and estimate_tokens(input_text) > ANALYSIS_CHUNK_TOKENS:
+        chunks = split_into_chunks(input_text, ANALYSIS_CHUNK_TOKENS)
+        if len(chunks) > 1:
+            return analyze_in_chunks(chunks, use_cache)
 
-    data = {
-        "contents": [{
-            "parts": [{
-                "text": f"""
+    prompt = f"""
 You are a highly skilled Business Analyst with expertise in requirement engineering and documentation. Your task is to analyze structured and unstructured data extracted from various sources, such as PDFs, images, and Excel files. You must:
 
 1. Extract Key Points: Identify and extract the most important details from the given text.
@@ -52,9 +185,7 @@ You are a highly skilled Business Analyst with expertise in requirement engineer
 The input will be raw text extracted from a PDF, image, or Excel file, containing business requirements, project details, and user expectations.
 
 ### Output Format:
-Output only valid JSON inside triple backticks (json ... ).
-No additional text or comments.
-json
+{_output_format_instructions()}
 {{
     "key_points": [
         "Summarized key point 1",
@@ -81,26 +212,110 @@ Now, analyze the following text:
 
 {input_text}
 """
-            }]
-        }]
-    }
-
-    try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        response_json = response.json()
 
-        # Extract response content safely
-        result_text = response_json.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "{}")
+    # Identical documents reuse the earlier analysis instead of calling Gemini again
+    cache = get_llm_cache() if use_cache else None
+    cached_text = cache.get(GEMINI_MODEL, prompt) if cache else None
+    if cached_text is not None:
+        with timed("parse_json"):
+            return extract_json_from_text(cached_text)
 
-        # Extract JSON from response
-        return extract_json_from_text(result_text)
+    try:
+        result_text = _generate_analysis_text(prompt)
+
+        # Keep whatever part of the response is valid and re-request only the rest
+        with timed("parse_json"):
+            data, cut_path = parse_json_lenient(result_text)
+            analysis, missing = validate_analysis(data if isinstance(data, dict) else {}, cut_path)
+        for _ in range(ANALYSIS_REPAIR_ATTEMPTS):
+            if not missing:
+                break
+            try:
+                analysis, missing = repair_analysis(analysis, missing, input_text)
+            except Exception as e:
+                # What the first response had is still returned, only not cached
+                logging.warning(f"Analysis repair failed, keeping the partial analysis: {e}")
+                break
+
+        if not analysis:
+            return {"error": "No valid JSON found in response."}
+        if missing:
+            logging.warning(f"Analysis still lacks {', '.join(missing)} after {ANALYSIS_REPAIR_ATTEMPTS} repair attempt(s)")
+        analysis = fill_missing(analysis)
+        if cache and not missing:
+            cache.put(GEMINI_MODEL, prompt, json.dumps(analysis))
+        return analysis
 
     except requests.exceptions.RequestException as e:
         return {"error": f"Request error: {e}"}
     except Exception as e:
         return {"error": str(e)}
 
+
+def _output_format_instructions():
+    if STRUCTURED_OUTPUT:
+        return "Output a single JSON object in this shape, with no additional text or comments:"
+    return "Output only valid JSON inside triple backticks (json ... ).\nNo additional text or comments.\njson"
+
+
+def _generate_analysis_text(prompt, fields=None):
+    """Calls Gemini with an analysis prompt; in structured mode the reply is constrained to the schema of fields."""
+    if not STRUCTURED_OUTPUT:
+        return get_gemini_client().generate_text(GEMINI_MODEL, prompt)
+    generation_config = {"responseMimeType": "application/json", "responseSchema": analysis_schema(fields)}
+    return get_gemini_client().generate_text(
+        GEMINI_MODEL, prompt, api_version=STRUCTURED_OUTPUT_API_VERSION, generationConfig=generation_config
+    )
+
+
+def repair_analysis(analysis, missing, input_text):
+    """Asks Gemini for only the missing fields and merges them in; returns the updated (analysis, missing)."""
+    for path in missing:
+        increment("reqube_analysis_repairs_total", field=path)
+    field_lines = "\n".join(f"- {path}: {ANALYSIS_FIELD_DESCRIPTIONS[path]}" for path in missing)
+    prompt = f"""
+You are a highly skilled Business Analyst with expertise in requirement engineering. An earlier analysis of the text below is missing some fields or has them cut off. Provide only these fields:
+
+{field_lines}
+
+Dotted names are nested, e.g. requirements.functional is {{"requirements": {{"functional": [...]}}}}.
+{_output_format_instructions()}
+{json.dumps(field_skeleton(missing), indent=4)}
+
+Now, analyze the following text:
+
+{input_text}
+"""
+    with timed("analysis_repair"):
+        data, cut_path = parse_json_lenient(_generate_analysis_text(prompt, missing))
+    repaired, still_missing = validate_analysis(data if isinstance(data, dict) else {}, cut_path)
+    analysis = merge_fields(analysis, repaired, missing)
+    return analysis, [path for path in missing if path in still_missing]
+
+@app.before_request
+def start_request_timing():
+    g.timing = start_timing_scope()
+
+
+@app.after_request
+def finish_request_timing(response):
+    timing = g.pop("timing", None)
+    if timing is not None:
+        fields = {"method": request.method, "path": request.path, "status": response.status_code}
+        if response.is_streamed:
+            # Streamed responses are timed until the last chunk has been sent
+            response.call_on_close(lambda: end_timing_scope(timing, "request", **fields))
+        else:
+            end_timing_scope(timing, "request", **fields)
+    return response
+
+
+@app.route("/metrics")
+def metrics():
+    """Stage latency histograms and OCR, cache and LLM error counters in the Prometheus text format."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/", methods=["GET", "POST"])
 def home():
     session.setdefault("analysis_result", None)
@@ -111,43 +326,259 @@ def home():
         uploaded_file = request.files.get("file")
         input_text = request.form.get("input_text", "").strip()
 
-        extracted_text = ""
+        if (not uploaded_file or not uploaded_file.filename) and not input_text:
+            flash("No valid text provided for analysis.")
+            return redirect(url_for("home"))
 
-        if uploaded_file:
-            filename = secure_filename(uploaded_file.filename)
-            file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-            uploaded_file.save(file_path)
+        file_path = None
+        content_hash = None
 
-            extracted_text = extract_text(file_path)  # Extract text from file
+        if uploaded_file and uploaded_file.filename:
+            # Stored once per distinct content; the job holds a reference until it has extracted the text
+            with timed("upload_save"):
+                stored = get_upload_store().save(uploaded_file.stream, secure_filename(uploaded_file.filename))
+            file_path, content_hash = stored.path, stored.digest
 
-            if not extracted_text:
-                flash("Error extracting text from file. Please check the document format.")
-                return redirect(url_for("home"))
+        job_id = job_queue.submit("analysis", run_analysis_job, file_path, input_text, content_hash)
 
-            session["file_text"] = extracted_text  # Store extracted text in session (HIDDEN FROM USER)
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify({"job_id": job_id, "status_url": url_for("job_status", job_id=job_id)}), 202
+        return redirect(url_for("job_page", job_id=job_id))
 
-        final_text = extracted_text if extracted_text else input_text
+    return render_template("index"
+    ".html", analysis_result=session.get("analysis_result"), conversations=session.get("conversations"))
 
-        if not final_text:
-            flash("No valid text provided for analysis.")
-            return redirect(url_for("home"))
 
+def run_analysis_job(report_stage, file_path, input_text, content_hash=None):
+    """Extracts text from the uploaded file (if any) and analyzes it; runs on the job queue."""
+    timing = start_timing_scope()
+    try:
+        return _run_analysis(report_stage, file_path, input_text, content_hash)
+    finally:
+        end_timing_scope(timing, "analysis_job", file=os.path.basename(file_path) if file_path else None)
+
+
+def _run_analysis(report_stage, file_path, input_text, content_hash):
+    extracted_text = ""
+
+    if file_path:
+        report_stage("extracting")
+        try:
+            extracted_text = extract_text(file_path, content_hash=content_hash)  # Extract text from file
+        finally:
+            get_upload_store().release(file_path)
+
+        if not extracted_text:
+            return {"error": "Error extracting text from file. Please check the document format."}
+
+        chat_text = normalized_document(extracted_text)
+        if estimate_tokens(chat_text) > CHAT_FULL_CONTEXT_TOKENS:
+            get_index(chat_text)  # Build the chat retrieval index while the document is fresh
+
+    final_text = extracted_text if extracted_text else input_text
+
+    report_stage("analyzing")
+    with timed("analyze"):
         analysis_result = analyze_business_text(final_text)
 
-        if "error" in analysis_result:
-            flash(f"Failed to analyze text: {analysis_result['error']}")
-            return redirect(url_for("home"))
+    if "error" in analysis_result:
+        return {"error": f"Failed to analyze text: {analysis_result['error']}"}
 
-        session["analysis_result"] = analysis_result
-        session.modified = True
-        return redirect(url_for("result"))
+    return {"analysis_result": analysis_result, "file_text": extracted_text}
 
-    return render_template("index"
-    ".html", analysis_result=session.get("analysis_result"), conversations=session.get("conversations"))
+
+def store_batch_uploads(uploaded_files):
+    """Stores uploaded files and the supported members of uploaded ZIP archives.
+
+    Returns [(display name, stored path, content digest)]. Raises ValueError when the batch exceeds
+    BATCH_MAX_FILES or BATCH_MAX_BYTES or an archive member cannot be read, and zipfile.BadZipFile
+    for an archive that is not one; anything stored up to that point is released.
+    """
+    store = get_upload_store()
+    stored = []
+    total_bytes = 0
+
+    def add(name, stream):
+        nonlocal total_bytes
+        if len(stored) >= BATCH_MAX_FILES:
+            raise ValueError(f"A batch can contain at most {BATCH_MAX_FILES} files.")
+        upload = store.save(stream, secure_filename(os.path.basename(name)) or "upload")
+        total_bytes += upload.size
+        base, count = name, 2
+        while any(existing == name for existing, _, _ in stored):
+            name = f"{base} ({count})"
+            count += 1
+        stored.append((name, upload.path, upload.digest))
+        if total_bytes > BATCH_MAX_BYTES:
+            raise ValueError(f"A batch can contain at most {BATCH_MAX_BYTES // (1024 * 1024)} MB.")
+
+    complete = False
+    try:
+        for uploaded_file in uploaded_files:
+            if not uploaded_file or not uploaded_file.filename:
+                continue
+            if os.path.splitext(uploaded_file.filename)[1].lower() == ".zip":
+                with zipfile.ZipFile(uploaded_file.stream) as archive:
+                    for member in archive.infolist():
+                        if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                            continue
+                        if os.path.splitext(member.filename)[1].lower() not in supported_extensions():
+                            continue
+                        if total_bytes + member.file_size > BATCH_MAX_BYTES:
+                            raise ValueError(f"A batch can contain at most {BATCH_MAX_BYTES // (1024 * 1024)} MB.")
+                        try:
+                            with archive.open(member) as stream:
+                                add(member.filename, stream)
+                        # Encrypted members raise RuntimeError and unsupported compression methods
+                        # NotImplementedError; corrupt data raises the rest while it is read
+                        except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError) as e:
+                            raise ValueError(f"{member.filename} in {uploaded_file.filename} cannot be read ({e})") from e
+            else:
+                add(uploaded_file.filename, uploaded_file.stream)
+        complete = True
+    finally:
+        if not complete:
+            for _, path, _ in stored:
+                store.release(path)
+    return stored
+
+
+@app.route("/batch", methods=["POST"])
+def batch_upload():
+    """Accepts several files and/or ZIP archives and analyzes them together in one background job."""
+    try:
+        with timed("upload_save"):
+            files = store_batch_uploads(request.files.getlist("files"))
+    except (ValueError, zipfile.BadZipFile) as e:
+        flash(f"Could not read the upload: {e}")
+        return redirect(url_for("home"))
+
+    if not files:
+        flash("No supported files found in the upload.")
+        return redirect(url_for("home"))
+
+    job_id = job_queue.submit("batch_analysis", run_batch_analysis_job, files)
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"job_id": job_id, "status_url": url_for("job_status", job_id=job_id)}), 202
+    return redirect(url_for("job_page", job_id=job_id))
+
+
+def run_batch_analysis_job(report_stage, files):
+    """Extracts and analyzes every file of a batch concurrently, then merges the analyses with source attribution."""
+    timing = start_timing_scope()
+    progress = {name: "queued" for name, _, _ in files}
+    progress_lock = threading.Lock()
+
+    def update(name, state):
+        with progress_lock:
+            progress[name] = state
+            report_stage("processing", dict(progress))
+
+    def process(name, path, content_hash):
+        update(name, "extracting")
+        try:
+            text = extract_text(path, content_hash=content_hash)
+        finally:
+            get_upload_store().release(path)
+        if not text:
+            update(name, "failed: could not extract text")
+            return name, None, None
+
+        update(name, "analyzing")
+        with timed("analyze"):
+            result = analyze_business_text(text)
+        if "error" in result:
+            update(name, f"failed: {result['error']}")
+            return name, text, None
+        update(name, "done")
+        return name, text, result
+
+    try:
+        # Each file is extracted and analyzed on its own worker, so the batch takes as long as its slowest file
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_MAX_WORKERS, len(files)))) as executor:
+            outcomes = list(executor.map(lambda file: process(*file), files))
+    finally:
+        end_timing_scope(timing, "batch_analysis_job", files=len(files))
+
+    analyzed = [(name, result) for name, _, result in outcomes if result]
+    if not analyzed:
+        return {"error": "None of the uploaded files could be analyzed."}
+
+    analysis_result = merge_attributed_results(analyzed)
+    analysis_result["sources"] = [{"file": name, "status": progress[name]} for name, _, _ in files]
+    # The chat sees every document, each under its file name
+    file_text = "\n\n".join(f"=== {name} ===\n{text}" for name, text, _ in outcomes if text)
+    return {"analysis_result": analysis_result, "file_text": file_text}
+
+
+@app.route("/jobs/<job_id>")
+def job_page(job_id):
+    if job_queue.get(job_id) is None:
+        flash("Analysis job not found.")
+        return redirect(url_for("home"))
+    return render_template("job.html", job_id=job_id)
+
+
+@app.route("/jobs/<job_id>/status")
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    return jsonify(job_status_payload(job))
+
+
+def job_status_payload(job):
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "result_url": url_for("result", job=job["id"]) if job["status"] == DONE else None,
+    }
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Streams the job's status as server-sent events whenever it changes, until it is done or failed."""
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    def generate():
+        last_update = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                yield _sse_event({"error": "Job not found."}, "error")
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                yield _sse_event(job_status_payload(job))
+            if job["status"] in (DONE, FAILED):
+                return
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route("/result")
 def result():
+    job_id = request.args.get("job")
+    if job_id:
+        job = job_queue.get(job_id)
+        if job is None or job["status"] == FAILED:
+            flash(job["error"] if job else "Analysis job not found.")
+            return redirect(url_for("home"))
+        if job["status"] != DONE:
+            return redirect(url_for("job_page", job_id=job_id))
+
+        if job["result"]["file_text"]:
+            session["file_text"] = job["result"]["file_text"]  # Store extracted text in session (HIDDEN FROM USER)
+        session["analysis_result"] = job["result"]["analysis_result"]
+        session.modified = True
+
     analysis_result = session.get("analysis_result")
     if not analysis_result:
         flash("No analysis result found. Please upload a document or enter text first.")
@@ -162,9 +593,11 @@ def requirement_prioritization():
 
         # Process the uploaded file or input text (You can replace this with actual logic)
         if uploaded_file.filename != '':
-            file_path = os.path.join("uploads", uploaded_file.filename)
-            uploaded_file.save(file_path)
-            prioritized_text = f"File '{uploaded_file.filename}' has been processed."
+            filename = secure_filename(uploaded_file.filename)
+            store = get_upload_store()
+            stored = store.save(uploaded_file.stream, filename)
+            store.release(stored.path)  # Nothing reads the file after this request
+            prioritized_text = f"File '{filename}' has been processed."
         else:
             prioritized_text = f"Prioritized Requirements: {input_text}" if input_text else "No input provided."
 
@@ -198,10 +631,58 @@ def chat():
     return jsonify({"reply": bot_response})
 
 
-def get_gemini_response(user_message, file_text):
-    """Send user message and extracted file text internally to Gemini API."""
-    url = f"https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
-    headers = {"Content-Type": "application/json"}
+def _sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """Relays the Gemini reply to the browser as server-sent events while it is generated."""
+    user_message = request.form.get("message")
+    file_text = session.get("file_text", "")  # Retrieve hidden file content from the session
+
+    if not user_message:
+        return jsonify({"error": "No message provided."})
+
+    session.setdefault("conversations", [])  # Make sure the session cookie goes out with the headers
+
+    def generate():
+        parts = []
+        try:
+            for text in stream_gemini_response(user_message, file_text):
+                parts.append(text)
+                yield _sse_event({"text": text})
+        except requests.exceptions.RequestException as e:
+            yield _sse_event({"error": f"Request error: {e}"}, "error")
+            return
+        except Exception as e:
+            yield _sse_event({"error": str(e)}, "error")
+            return
+
+        bot_response = "".join(parts) or "Sorry, I couldn't understand your message."
+
+        # The response headers are already sent, so store the conversation history directly
+        conversations = session.get("conversations", [])
+        conversations.append({"user": user_message, "bot": bot_response})
+        session["conversations"] = conversations
+        app.session_interface.persist(session)
+
+        yield _sse_event({"reply": bot_response}, "done")
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def build_chat_prompt(user_message, file_text):
+    """Builds the hidden chat prompt from the user's message and the document."""
+    # Large documents contribute only the passages most relevant to the question; size is judged after
+    # normalization, so headers, footers and repeats do not push a small document into retrieval
+    document_text = normalized_document(file_text)
+    document_context = document_text
+    if estimate_tokens(document_text) > CHAT_FULL_CONTEXT_TOKENS:
+        with timed("chat_retrieval"):
+            document_context = "\n\n[...]\n\n".join(get_index(document_text).search(user_message))
+    document_context = compact_for_prompt(document_context, CHAT_MAX_CONTEXT_TOKENS, "chat")
 
     # Internal system prompt (hidden from the user)
     prompt = f"""
@@ -209,30 +690,53 @@ def get_gemini_response(user_message, file_text):
     Use the provided document to improve your response.
 
     ### Document Context (Hidden from user):
-    {file_text}
+    {document_context}
 
     ### User Query:
     {user_message}
 
     Generate a well-structured response based on the document and user query.
     """
+    return prompt
 
-    data = {
-        "contents": [{
-            "parts": [{
-                "text": prompt
-            }]
-        }]
-    }
+
+def stream_gemini_response(user_message, file_text, use_cache=True):
+    """Yields the reply to a chat message piece by piece as Gemini generates it."""
+    prompt = build_chat_prompt(user_message, file_text)
+
+    cache = get_llm_cache() if use_cache else None
+    cached_text = cache.get(GEMINI_MODEL, prompt) if cache else None
+    if cached_text is not None:
+        yield cached_text
+        return
+
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    parts = []
+    for text in get_gemini_client().stream_generate_content(GEMINI_MODEL, payload):
+        parts.append(text)
+        yield text
+
+    if cache and parts:
+        cache.put(GEMINI_MODEL, prompt, "".join(parts))
+
+
+def get_gemini_response(user_message, file_text, use_cache=True):
+    """Send user message and extracted file text internally to Gemini API."""
+    prompt = build_chat_prompt(user_message, file_text)
+
+    # Repeated questions about the same document are answered from the cache
+    cache = get_llm_cache() if use_cache else None
+    cached_text = cache.get(GEMINI_MODEL, prompt) if cache else None
+    if cached_text is not None:
+        return {"reply": cached_text}
 
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        response_json = response.json()
+        result_text = get_gemini_client().generate_text(GEMINI_MODEL, prompt)
+        if result_text is None:
+            return {"reply": "Sorry, I couldn't understand your message."}
 
-        # Extract response content safely
-        result_text = response_json.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "Sorry, I couldn't understand your message.")
-        
+        if cache:
+            cache.put(GEMINI_MODEL, prompt, result_text)
         return {"reply": result_text}
     except requests.exceptions.RequestException as e:
         return {"error": f"Request error: {e}"}
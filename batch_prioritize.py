@@ -0,0 +1,197 @@
+"""Prioritizes many requirement documents across a process pool.
+
+Examples:
+
+    python batch_prioritize.py nightly/ -o prioritized.jsonl --text-dir reports/
+    python batch_prioritize.py "exports/**/*.json" -o prioritized.jsonl --workers 8
+    python batch_prioritize.py requirements.jsonl -o prioritized.jsonl --resume
+
+Inputs may be directories (every *.json inside), glob patterns, JSON files or JSONL files with one
+document per line. Results are streamed to the output JSONL as documents finish. With --resume,
+documents that already have a successful record in the output are skipped, so a crashed run can be
+restarted where it stopped.
+"""
+import os
+import re
+import sys
+import json
+import glob
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from prioritize import prioritize_data, convert_to_text_format
+
+PROGRESS_INTERVAL_SECONDS = 2
+
+
+def iter_jsonl_documents(stream, source):
+    """Yields (document id, None, parsed document) for every line of a JSONL stream; bad lines become error records."""
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        doc_id = f"{source}:{line_num}"
+        try:
+            document = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield doc_id, None, {"error": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(document, dict):
+            yield doc_id, None, {"error": f"Expected a JSON object, got {type(document).__name__}"}
+            continue
+        yield str(document.get("id", doc_id)), None, document
+
+
+def iter_documents(inputs):
+    """Yields (document id, file path, parsed document or None) for every input document.
+
+    JSON files are parsed inside the workers; JSONL lines are parsed here and passed along.
+    """
+    for source in inputs:
+        if source == "-":
+            yield from iter_jsonl_documents(sys.stdin, source)  # Left open; it is not ours to close
+        elif source.endswith(".jsonl"):
+            with open(source, "r", encoding="utf-8") as stream:
+                yield from iter_jsonl_documents(stream, source)
+        elif os.path.isdir(source):
+            for path in sorted(glob.glob(os.path.join(source, "*.json"))):
+                yield path, path, None
+        elif glob.has_magic(source):
+            for path in sorted(glob.glob(source, recursive=True)):
+                yield path, path, None
+        else:
+            yield source, source, None
+
+
+def process_document(doc_id, path, document, text_dir=None):
+    """Prioritizes one document; every failure is returned as an error record instead of raised."""
+    try:
+        if document is None:
+            with open(path, "r", encoding="utf-8") as file:
+                document = json.load(file)
+        elif "error" in document and "requirements" not in document:
+            return {"id": doc_id, "error": document["error"]}
+
+        prioritize_data(document)
+
+        if text_dir:
+            report_path = text_report_path(text_dir, doc_id, path)
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            with open(report_path, "w", encoding="utf-8") as file:
+                file.write(convert_to_text_format(document))
+
+        return {"id": doc_id, "requirements": document.get("requirements", [])}
+    except Exception as e:
+        return {"id": doc_id, "error": f"{type(e).__name__}: {e}"}
+
+
+def text_report_path(text_dir, doc_id, path):
+    """Returns where the text report of a document goes, distinct for every document id.
+
+    Files mirror their path relative to the working directory, so same-named files from different
+    directories do not overwrite each other; JSONL documents are named after their id. Characters
+    that are unsafe in file names are replaced, and a short hash of the id keeps such names unique.
+    """
+    relative = os.path.splitext(os.path.relpath(path))[0] if path else doc_id
+    parts = ["_parent" if part == ".." else part for part in re.split(r"[\\/]+", relative) if part not in ("", ".")]
+    safe_parts = [re.sub(r"[^\w.-]", "_", part) for part in parts] or ["document"]
+    if safe_parts != parts:
+        safe_parts[-1] += "-" + hashlib.sha1(doc_id.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(text_dir, *safe_parts) + ".txt"
+
+
+def load_completed(output_path):
+    """Returns the ids that already have a successful record in an earlier run's output."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from a crash
+            if "error" not in record:
+                completed.add(record["id"])
+    return completed
+
+
+def open_output(output_path, resume):
+    if resume and os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            ends_with_newline = file.read(1) == b"\n"
+        output = open(output_path, "a", encoding="utf-8")
+        if not ends_with_newline:
+            output.write("\n")  # Terminate a partially written record
+        return output
+    return open(output_path, "w", encoding="utf-8")
+
+
+def run_batch(inputs, output_path, workers=None, text_dir=None, resume=False):
+    """Prioritizes every input document and streams one JSONL record per document to output_path."""
+    completed = load_completed(output_path) if resume else set()
+    if text_dir:
+        os.makedirs(text_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    started = time.time()
+    last_report = started
+
+    def report(final=False):
+        elapsed = time.time() - started
+        done = counts["ok"] + counts["failed"]
+        rate = done / elapsed if elapsed else 0.0
+        print(
+            f"{'Finished' if final else 'Progress'}: {done} processed ({counts['ok']} ok, {counts['failed']} failed, "
+            f"{counts['skipped']} skipped) in {elapsed:.1f}s, {rate:.1f} docs/s",
+            file=sys.stderr,
+        )
+
+    with open_output(output_path, resume) as output, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+
+        def drain(block_until_below):
+            nonlocal last_report
+            while len(pending) > block_until_below:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pending.discard(future)
+                    record = future.result()
+                    counts["failed" if "error" in record else "ok"] += 1
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+            if time.time() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = time.time()
+                report()
+
+        for doc_id, path, document in iter_documents(inputs):
+            if doc_id in completed:
+                counts["skipped"] += 1
+                continue
+            pending.add(executor.submit(process_document, doc_id, path, document, text_dir))
+            # Keep a bounded number of documents in flight so memory stays flat on huge inputs
+            drain(workers * 4)
+        drain(0)
+
+    report(final=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prioritize many requirement documents in parallel.")
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns, JSON or JSONL files ('-' for stdin JSONL)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to stream prioritized documents to")
+    parser.add_argument("--text-dir", help="also write the plain-text report of each document to this directory")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true", help="skip documents already prioritized in the output")
+    args = parser.parse_args()
+
+    counts = run_batch(args.inputs, args.output, args.workers, args.text_dir, args.resume)
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compares the streaming DOCX extractor against python-docx on generated documents of growing size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_docx [--paragraphs 1000 10000 50000] [--repeat N]
+
+Each document has the given number of paragraphs plus a requirements table with a fifth as many rows.
+Every extraction runs in a fresh interpreter so the reported peak memory belongs to that extractor alone
+(read from /proc, so Linux only); the table shows the median time, the peak RSS growth over the bare interpreter and the characters returned.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.corpus import write_docx
+
+EXTRACTORS = ["python-docx", "stream"]
+
+SCENARIO = """
+import json, sys, time
+import input
+
+def status_kb(field):
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith(field + ":"))
+
+with open("/proc/self/clear_refs", "w") as clear_refs:
+    clear_refs.write("5")  # Resets the peak RSS to the current RSS, so import-time allocations do not count
+baseline = status_kb("VmRSS")
+start = time.perf_counter()
+text = input.extract_text_from_docx(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_kb": status_kb("VmHWM") - baseline, "chars": len(text or "")}))
+"""
+
+
+def run_extractor(extractor, path):
+    env = dict(os.environ, REQUBE_DOCX_EXTRACTOR=extractor)
+    # python-docx is imported up front in both cases, so its import time and memory are not counted
+    code = "import docx\n" + SCENARIO
+    output = subprocess.run([sys.executable, "-c", code, path], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="reqube-docx-")
+    print(f"{'paragraphs':>10} {'file MB':>8} {'extractor':12} {'seconds':>9} {'peak MB':>8} {'chars':>10}")
+    for paragraphs in args.paragraphs:
+        path = os.path.join(directory, f"document_{paragraphs}.docx")
+        write_docx(path, random.Random(args.seed), paragraphs, paragraphs // 5)
+        size = os.path.getsize(path) / 1e6
+        for extractor in EXTRACTORS:
+            runs = [run_extractor(extractor, path) for _ in range(args.repeat)]
+            seconds = statistics.median(run["seconds"] for run in runs)
+            peak = statistics.median(run["peak_kb"] for run in runs) / 1024
+            print(f"{paragraphs:10} {size:8.2f} {extractor:12} {seconds:9.3f} {peak:8.1f} {runs[-1]['chars']:10}")
+
+
+if __name__ == "__main__":
+    main()
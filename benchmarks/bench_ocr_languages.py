@@ -0,0 +1,67 @@
+"""Compares OCR with every pack in OCR_LANGUAGES against script-detected language selection.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ocr_languages [image_or_pdf ...] [--repeat N]
+"""
+import argparse
+import statistics
+import time
+
+import fitz
+from PIL import Image
+
+import input
+
+pytesseract = input.get_tesseract()
+
+DEFAULT_SAMPLES = ["input_file.png", "uploads/MOM.png"]
+
+
+def load_images(paths):
+    """Loads images, rendering each PDF page the same way extract_text_from_pdf does for OCR."""
+    images = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            zoom = input.OCR_DPI / 72
+            with fitz.open(path) as document:
+                for page in document:
+                    img = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                    images.append((f"{path}#{page.number + 1}", Image.frombytes("RGB", [img.width, img.height], img.samples)))
+        else:
+            with Image.open(path) as image:
+                images.append((path, image.convert("RGB")))
+    return images
+
+
+def time_all_languages(image):
+    start = time.perf_counter()
+    pytesseract.image_to_string(image, lang=input.OCR_LANGUAGES)
+    return time.perf_counter() - start, input.OCR_LANGUAGES
+
+
+def time_detected_languages(image):
+    start = time.perf_counter()
+    lang = input.detect_ocr_languages(image)
+    pytesseract.image_to_string(image, lang=lang)
+    return time.perf_counter() - start, lang
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=DEFAULT_SAMPLES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'sample':40} {'mode':9} {'median s':>9}  languages")
+    for name, image in load_images(args.paths):
+        for mode, run in (("all", time_all_languages), ("detected", time_detected_languages)):
+            timings = []
+            for _ in range(args.repeat):
+                elapsed, lang = run(image)
+                timings.append(elapsed)
+            print(f"{name[-40:]:40} {mode:9} {statistics.median(timings):9.3f}  {lang}")
+
+
+if __name__ == "__main__":
+    main()
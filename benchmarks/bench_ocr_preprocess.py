@@ -0,0 +1,74 @@
+"""Compares OCR on raw images and RGB page renders against the grayscale preprocessing pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ocr_preprocess [image_or_pdf ...] [--repeat N] [--no-ocr]
+
+For every sample it reports the time to prepare the bitmap, the bitmap size handed to Tesseract and,
+unless --no-ocr is given, the OCR time.
+"""
+import argparse
+import statistics
+import time
+
+import fitz
+from PIL import Image
+
+import input
+from ocr_preprocess import preprocess_for_ocr, render_page_for_ocr
+
+pytesseract = input.get_tesseract()
+
+DEFAULT_SAMPLES = ["input_file.png", "uploads/MOM.png"]
+
+
+def load_samples(paths):
+    """Yields (name, before, after) where before and after prepare the bitmap the old and the new way."""
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            document = fitz.open(path)
+            for page in document:
+                def before(page=page):
+                    zoom = input.OCR_DPI / 72
+                    img = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                    return Image.frombytes("RGB", [img.width, img.height], img.samples)
+
+                yield f"{path}#{page.number + 1}", before, lambda page=page: render_page_for_ocr(page, input.OCR_DPI)
+        else:
+            with Image.open(path) as image:
+                image.load()
+                raw = image.copy()
+            yield path, lambda raw=raw: raw, lambda raw=raw: preprocess_for_ocr(raw)
+
+
+def measure(prepare, repeat, ocr):
+    prepare_times, ocr_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bitmap = prepare()
+        prepare_times.append(time.perf_counter() - start)
+        if ocr:
+            start = time.perf_counter()
+            pytesseract.image_to_string(bitmap, lang="eng")
+            ocr_times.append(time.perf_counter() - start)
+    bitmap_bytes = bitmap.width * bitmap.height * len(bitmap.getbands())
+    return statistics.median(prepare_times), bitmap_bytes, statistics.median(ocr_times) if ocr else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=DEFAULT_SAMPLES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-ocr", action="store_true", help="only time bitmap preparation")
+    args = parser.parse_args()
+
+    print(f"{'sample':40} {'mode':7} {'prepare s':>10} {'bitmap MB':>10} {'ocr s':>8}")
+    for name, before, after in load_samples(args.paths):
+        for mode, prepare in (("before", before), ("after", after)):
+            prepare_time, bitmap_bytes, ocr_time = measure(prepare, args.repeat, not args.no_ocr)
+            ocr_column = f"{ocr_time:8.3f}" if ocr_time is not None else f"{'-':>8}"
+            print(f"{name[-40:]:40} {mode:7} {prepare_time:10.4f} {bitmap_bytes / 1e6:10.2f} {ocr_column}")
+
+
+if __name__ == "__main__":
+    main()
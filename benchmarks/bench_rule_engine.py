@@ -0,0 +1,88 @@
+"""Compares the compiled keyword rule engine against nested any(keyword in text) scans.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rule_engine [--keywords 16 256 2048] [--requirements 100 1000 10000]
+"""
+import argparse
+import random
+import string
+import time
+
+from prioritize import CATEGORY_RULES, PRIORITY_RULES
+from rule_engine import RuleEngine
+
+FILLER_WORDS = ["the", "system", "shall", "allow", "users", "to", "data", "report", "within", "seconds", "and", "of"]
+
+
+def make_rule_sets(keyword_count, rng):
+    """Pads the shipped rules with random domain-like keywords up to keyword_count."""
+    priority = {label: list(keywords) for label, keywords in PRIORITY_RULES.items()}
+    labels = list(priority)
+    existing = sum(len(keywords) for keywords in priority.values())
+    for _ in range(max(0, keyword_count - existing)):
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        priority[rng.choice(labels)].append(word)
+    return {"priority": priority, "category": CATEGORY_RULES}
+
+
+def make_requirements(count, rule_sets, rng):
+    keywords = [keyword for rules in rule_sets.values() for words in rules.values() for keyword in words]
+    requirements = []
+    for _ in range(count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(10, 30))]
+        if rng.random() < 0.7:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        requirements.append(" ".join(words).capitalize() + ".")
+    return requirements
+
+
+def naive_classify(rule_sets, text):
+    text = text.lower()
+    result = {}
+    for group, rules in rule_sets.items():
+        result[group] = None
+        for label, keywords in rules.items():
+            if any(keyword in text for keyword in keywords):
+                result[group] = label
+                break
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keywords", type=int, nargs="+", default=[16, 256, 2048])
+    parser.add_argument("--requirements", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'keywords':>8} {'reqs':>6} {'naive s':>9} {'engine s':>9} {'build s':>8} {'speedup':>8}")
+    for keyword_count in args.keywords:
+        rng = random.Random(args.seed)
+        rule_sets = make_rule_sets(keyword_count, rng)
+
+        start = time.perf_counter()
+        engine = RuleEngine(rule_sets)
+        build_time = time.perf_counter() - start
+
+        for requirement_count in args.requirements:
+            requirements = make_requirements(requirement_count, rule_sets, rng)
+
+            start = time.perf_counter()
+            expected = [naive_classify(rule_sets, text) for text in requirements]
+            naive_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = engine.classify_batch(requirements)
+            engine_time = time.perf_counter() - start
+
+            if actual != expected:
+                raise SystemExit("Rule engine results differ from the nested scan")
+            print(
+                f"{keyword_count:8} {requirement_count:6} {naive_time:9.4f} {engine_time:9.4f} "
+                f"{build_time:8.4f} {naive_time / engine_time:7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measures worker startup and first-request latency with eager, lazy and warmed-up extraction libraries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--repeat N]
+
+Every scenario runs in a fresh interpreter. "eager" imports the format libraries up front the way
+input.py used to, "lazy" imports the app only, and "warm" imports the app with REQUBE_WARM_UP=1.
+For each, it reports the startup time, the first language detection and which heavy modules got loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["fitz", "docx", "pytesseract", "PIL.Image", "langdetect"]
+
+SCENARIO = """
+import json, sys, time
+start = time.perf_counter()
+{preload}
+import app
+startup = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+start = time.perf_counter()
+import input
+input.detect_language("The system shall let users upload requirement documents.")
+first_detect = time.perf_counter() - start
+print(json.dumps({{"startup": startup, "first_detect": first_detect, "loaded": loaded}}))
+"""
+
+SCENARIOS = {
+    "eager": ("import fitz, docx, pytesseract, PIL.Image, langdetect", {}),
+    "lazy": ("", {}),
+    "warm": ("", {"REQUBE_WARM_UP": "1"}),
+}
+
+
+def run_scenario(preload, extra_env):
+    env = dict(os.environ, GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "benchmark"), **extra_env)
+    code = SCENARIO.format(preload=preload, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':9} {'startup s':>10} {'first detect s':>15}  loaded at startup")
+    for name, (preload, extra_env) in SCENARIOS.items():
+        runs = [run_scenario(preload, extra_env) for _ in range(args.repeat)]
+        startup = statistics.median(run["startup"] for run in runs)
+        first_detect = statistics.median(run["first_detect"] for run in runs)
+        print(f"{name:9} {startup:10.3f} {first_detect:15.3f}  {', '.join(runs[-1]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
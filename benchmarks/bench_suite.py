@@ -0,0 +1,238 @@
+"""End-to-end benchmark of extraction, analysis, chat and prioritization against a fake Gemini server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite [--latency 0.05] [--failure-rate 0.0] [--truncate-rate 0.0] [--repeat 3] [--json results.json]
+
+A synthetic corpus is generated in a temporary directory (or --corpus) and every stage runs with the
+extraction and LLM caches disabled, so each call does the full work. For each stage the suite prints
+count, errors, throughput and latency percentiles; --json writes the same numbers plus the run
+configuration as machine-readable output ("-" for stdout) for tracking regressions across commits.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_gemini import FakeGeminiServer
+
+CHAT_QUESTIONS = [
+    "Which requirements are about security?",
+    "Who approves change requests?",
+    "What are the performance targets?",
+    "Summarize the reporting requirements.",
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(stage, latencies, errors, wall_seconds, units=None, unit_name="calls"):
+    """Returns the throughput and latency percentiles of one stage; latencies are in seconds."""
+    ordered = sorted(latencies)
+    units = len(latencies) if units is None else units
+    return {
+        "stage": stage,
+        "count": len(latencies),
+        "errors": errors,
+        "unit": unit_name,
+        "units": units,
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_per_second": round(units / wall_seconds, 3) if wall_seconds else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2) if ordered else None,
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 2) if ordered else None,
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2) if ordered else None,
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+    }
+
+
+def timed(calls):
+    """Runs (func, args) pairs in order; returns latencies, errors, wall time and each call's result."""
+    latencies, results, errors = [], [], 0
+    started = time.perf_counter()
+    for func, args in calls:
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            result = None
+        latencies.append(time.perf_counter() - start)
+        results.append(result)
+        if result is None or (isinstance(result, dict) and "error" in result):
+            errors += 1
+    return latencies, errors, time.perf_counter() - started, results
+
+
+def bench_extraction(corpus, repeat):
+    from input import extract_text
+    stages, texts = [], []
+    for kind in ("text_pdf", "scanned_pdf", "docx", "txt", "png"):
+        calls = [(extract_text, (path, False)) for path in corpus[kind] for _ in range(repeat)]
+        latencies, errors, wall, results = timed(calls)
+        megabytes = sum(os.path.getsize(path) for path in corpus[kind]) * repeat / 1e6
+        stage = summarize(f"extract.{kind}", latencies, errors, wall)
+        stage["input_mb_per_second"] = round(megabytes / wall, 3) if wall else None
+        stages.append(stage)
+        texts.extend(text for text in results[::repeat] if text)
+    return stages, texts
+
+
+def bench_analysis(texts, repeat):
+    from app import analyze_business_text
+    calls = [(analyze_business_text, (text, False)) for text in texts for _ in range(repeat)]
+    latencies, errors, wall, _ = timed(calls)
+    return [summarize("analyze", latencies, errors, wall)]
+
+
+def bench_chat(document_text, repeat):
+    import app as app_module
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session["file_text"] = document_text
+
+    def chat(question):
+        response = client.post("/chat", data={"message": question})
+        payload = response.get_json()
+        return payload if response.status_code == 200 else {"error": response.status_code}
+
+    def chat_stream(question):
+        response = client.post("/chat/stream", data={"message": question})
+        body = response.get_data(as_text=True)
+        response.close()
+        return {"error": "stream"} if "event: error" in body or "event: done" not in body else body
+
+    stages = []
+    for name, func in (("chat", chat), ("chat.stream", chat_stream)):
+        calls = [(func, (question,)) for question in CHAT_QUESTIONS for _ in range(repeat)]
+        latencies, errors, wall, _ = timed(calls)
+        stages.append(summarize(name, latencies, errors, wall))
+    return stages
+
+
+def bench_prioritization(corpus, repeat, output_dir):
+    from prioritize import prioritize_requirements
+    input_file = corpus["requirements"][0]
+    with open(input_file, "r", encoding="utf-8") as file:
+        requirement_count = len(json.load(file)["requirements"])
+    output_file = os.path.join(output_dir, "prioritized_requirements.txt")
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            prioritize_requirements(input_file, output_file)
+        return True
+
+    latencies, errors, wall, _ = timed([(run, ()) for _ in range(repeat)])
+    return [summarize("prioritize", latencies, errors, wall, requirement_count * repeat, "requirements")]
+
+
+def print_table(stages):
+    print(f"{'stage':20} {'count':>5} {'errors':>6} {'per s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage in stages:
+        cells = [stage[key] for key in ("throughput_per_second", "p50_ms", "p90_ms", "p99_ms", "max_ms")]
+        print(f"{stage['stage']:20} {stage['count']:5} {stage['errors']:6} " + " ".join(
+            f"{cell:9.2f}" if cell is not None else f"{'-':>9}" for cell in cells
+        ))
+
+
+def run_suite(args):
+    """Generates the corpus, starts the fake server and runs the selected stages; returns the results dict."""
+    work_dir = tempfile.mkdtemp(prefix="reqube-bench-")
+    corpus_dir = args.corpus or os.path.join(work_dir, "corpus")
+    corpus = generate_corpus(corpus_dir, args.pdf_pages, args.scanned_pages, args.requirements, args.seed)
+
+    server = FakeGeminiServer(
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed, truncate_rate=args.truncate_rate
+    )
+    server.start()
+
+    # The app reads its configuration at import time, so point it at the fake server and scratch state first
+    os.environ.update({
+        "GEMINI_API_BASE": server.url,
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "benchmark"),
+        "REQUBE_LLM_CACHE": "0",
+        "REQUBE_EXTRACTION_CACHE": "0",
+        "REQUBE_JOBS_DB_PATH": os.path.join(work_dir, "jobs.sqlite3"),
+        "REQUBE_UPLOAD_STORE_ROOT": os.path.join(work_dir, "uploads"),
+        "REQUBE_UPLOAD_DB_PATH": os.path.join(work_dir, "uploads.sqlite3"),
+    })
+
+    stages, texts = [], []
+    try:
+        if "extract" in args.stages or "analyze" in args.stages or "chat" in args.stages:
+            extraction, texts = bench_extraction(corpus, args.repeat)
+            if "extract" in args.stages:
+                stages.extend(extraction)
+        if "analyze" in args.stages:
+            stages.extend(bench_analysis(texts, args.repeat))
+        if "chat" in args.stages and texts:
+            stages.extend(bench_chat(max(texts, key=len), args.repeat))
+        if "prioritize" in args.stages:
+            stages.extend(bench_prioritization(corpus, args.repeat, work_dir))
+    finally:
+        server.stop()
+
+    return {
+        "config": {
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "failure_rate": args.failure_rate,
+            "truncate_rate": args.truncate_rate,
+            "pdf_pages": args.pdf_pages,
+            "scanned_pages": args.scanned_pages,
+            "requirements": args.requirements,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "gemini": server.stats,
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory to generate the corpus in (default: a temporary directory)")
+    parser.add_argument("--pdf-pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--scanned-pages", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--requirements", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Gemini mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of Gemini calls answered with 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of Gemini replies cut off part-way")
+    parser.add_argument("--stages", nargs="+", default=["extract", "analyze", "chat", "prioritize"])
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here ('-' for stdout)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Library chatter goes to stderr so stdout carries only the results
+    with redirect_stdout(sys.stderr):
+        results = run_suite(args)
+    stages, stats = results["stages"], results["gemini"]
+
+    if args.json_path == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(stages)
+        print(f"Fake Gemini: {stats['requests']} requests, {stats['failures']} injected failures, {stats['truncated']} truncated replies")
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
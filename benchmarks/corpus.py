@@ -0,0 +1,168 @@
+"""Generates a deterministic synthetic corpus of requirement documents for the benchmark suite.
+
+    python -m benchmarks.corpus bench_corpus/ [--pdf-pages 1 10 50] [--scanned-pages 1 3]
+
+Produces text PDFs and scanned (image-only) PDFs of the given page counts, a DOCX, a TXT, a PNG and
+a requirements JSON in the shape prioritize_requirements reads.
+"""
+import argparse
+import json
+import os
+import random
+
+SUBJECTS = ["The system", "The application", "The portal", "Administrators", "Users", "The reporting module"]
+FUNCTIONAL_ACTIONS = [
+    "shall allow users to upload requirement documents",
+    "shall export the analysis as a PDF report",
+    "shall notify reviewers when a requirement changes",
+    "shall let managers approve or reject change requests",
+    "shall keep a version history of every document",
+    "shall search requirements by keyword and category",
+    "shall assign an owner to each open question",
+]
+QUALITY_ACTIONS = [
+    "must respond within two seconds under normal load",
+    "must encrypt all stored documents",
+    "must remain available 99.9% of the time",
+    "must support five hundred concurrent users",
+    "must comply with the data retention policy",
+]
+FILLER = [
+    "This section was agreed in the kickoff meeting.",
+    "Stakeholders from finance and operations reviewed the draft.",
+    "Details will be refined during the next workshop.",
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+SCAN_DPI = 150
+
+
+def make_paragraphs(count, rng):
+    paragraphs = []
+    for index in range(count):
+        sentences = [f"{rng.choice(SUBJECTS)} {rng.choice(FUNCTIONAL_ACTIONS)}." for _ in range(rng.randint(2, 4))]
+        sentences.append(f"{rng.choice(SUBJECTS)} {rng.choice(QUALITY_ACTIONS)}.")
+        sentences.append(rng.choice(FILLER))
+        paragraphs.append(f"{index + 1}. " + " ".join(sentences))
+    return paragraphs
+
+
+def write_text_pdf(path, pages, rng):
+    import fitz
+    with fitz.open() as document:
+        for _ in range(pages):
+            page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_textbox(fitz.Rect(50, 50, PAGE_WIDTH - 50, PAGE_HEIGHT - 50), "\n\n".join(make_paragraphs(6, rng)), fontsize=10)
+        document.save(path)
+
+
+def render_page_image(paragraphs):
+    """Draws paragraphs onto a white A4 page at SCAN_DPI, like a scanner would produce."""
+    import textwrap
+    from PIL import Image, ImageDraw, ImageFont
+    scale = SCAN_DPI / 72
+    image = Image.new("L", (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=int(10 * scale))
+    except TypeError:  # Pillow < 10.1 has only the fixed-size bitmap font
+        font = ImageFont.load_default()
+    y = int(50 * scale)
+    for paragraph in paragraphs:
+        for line in textwrap.wrap(paragraph, 90):
+            draw.text((int(50 * scale), y), line, fill=0, font=font)
+            y += int(14 * scale)
+        y += int(8 * scale)
+    return image
+
+
+def write_scanned_pdf(path, pages, rng):
+    import io
+    import fitz
+    with fitz.open() as document:
+        for _ in range(pages):
+            buffer = io.BytesIO()
+            render_page_image(make_paragraphs(5, rng)).save(buffer, format="PNG")
+            page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_image(page.rect, stream=buffer.getvalue())
+        document.save(path)
+
+
+def write_docx(path, rng, paragraphs=60, rows=20):
+    import docx
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "ReQube synthetic corpus"
+    document.sections[0].footer.paragraphs[0].text = "Confidential"
+    document.add_heading("Project requirements", level=1)
+    for paragraph in make_paragraphs(paragraphs, rng):
+        document.add_paragraph(paragraph)
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text, table.rows[0].cells[1].text = "Requirement", "Owner"
+    for _ in range(rows):
+        cells = table.add_row().cells
+        cells[0].text = f"{rng.choice(SUBJECTS)} {rng.choice(FUNCTIONAL_ACTIONS)}."
+        cells[1].text = rng.choice(["Finance", "Operations", "IT"])
+    document.save(path)
+
+
+def write_txt(path, rng):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n\n".join(make_paragraphs(200, rng)) + "\n")
+
+
+def write_png(path, rng):
+    render_page_image(make_paragraphs(5, rng)).save(path)
+
+
+def write_requirements_json(path, count, rng):
+    requirements = []
+    for index in range(count):
+        action = rng.choice(FUNCTIONAL_ACTIONS + QUALITY_ACTIONS)
+        requirements.append({"ID": f"REQ{index + 1}", "Requirement": f"{rng.choice(SUBJECTS)} {action}."})
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"requirements": requirements}, file, indent=2)
+
+
+def generate_corpus(directory, pdf_pages=(1, 10, 50), scanned_pages=(1, 3), requirements=200, seed=7):
+    """Writes the corpus to directory and returns {kind: [paths]}; kind is text_pdf, scanned_pdf, docx, txt, png or requirements."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = {"text_pdf": [], "scanned_pdf": [], "docx": [], "txt": [], "png": [], "requirements": []}
+
+    for pages in pdf_pages:
+        path = os.path.join(directory, f"text_{pages}p.pdf")
+        write_text_pdf(path, pages, rng)
+        corpus["text_pdf"].append(path)
+    for pages in scanned_pages:
+        path = os.path.join(directory, f"scanned_{pages}p.pdf")
+        write_scanned_pdf(path, pages, rng)
+        corpus["scanned_pdf"].append(path)
+
+    for kind, name, write in (("docx", "document.docx", write_docx), ("txt", "document.txt", write_txt), ("png", "page.png", write_png)):
+        path = os.path.join(directory, name)
+        write(path, rng)
+        corpus[kind].append(path)
+
+    path = os.path.join(directory, "requirements.json")
+    write_requirements_json(path, requirements, rng)
+    corpus["requirements"].append(path)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--pdf-pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--scanned-pages", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--requirements", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.directory, args.pdf_pages, args.scanned_pages, args.requirements, args.seed)
+    for kind, paths in corpus.items():
+        for path in paths:
+            print(f"{kind:12} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Local stand-in for the Gemini REST API with configurable latency and failure injection.
+
+Serves generateContent and streamGenerateContent (alt=sse) for any model and answers with canned
+content shaped like what the app expects: analysis JSON (fenced, or bare when the request asks for
+JSON output), only the requested fields for analysis repair prompts, MoSCoW priority objects or chat
+text. --truncate-rate cuts that fraction of replies off part-way, like a response that hit its token
+limit. Run it on its own and point the app at it with GEMINI_API_BASE:
+
+    python -m benchmarks.fake_gemini --port 8765 --latency 0.3 --failure-rate 0.05 --truncate-rate 0.1
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_PATH = re.compile(r"^/[^/]+/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)")
+REQUIREMENT_LINE = re.compile(r"^\s*(?P<id>[^:\n]+):\s*(?P<text>.+)$", re.MULTILINE)
+REPAIR_FIELD_LINE = re.compile(r"^- (?P<path>[a-z_.]+):", re.MULTILINE)
+PRIORITIES = ["Must Have", "Should Have", "Could Have", "Won't Have"]
+STREAM_PIECES = 8
+
+
+def analysis_reply(prompt, json_mode=False, fields=None):
+    document = prompt.rsplit("analyze the following text:", 1)[-1]
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", document) if len(s.strip()) > 20]
+    functional = [s for s in sentences if "shall" in s.lower()][:10]
+    non_functional = [s for s in sentences if "must" in s.lower()][:5]
+    result = {
+        "key_points": sentences[:3],
+        "summary": " ".join(sentences[:2]),
+        "requirements": {
+            "functional": [f"FR{i}: {s}" for i, s in enumerate(functional, start=1)],
+            "non_functional": [f"NFR{i}: {s}" for i, s in enumerate(non_functional, start=1)],
+        },
+        "missing_info_questions": ["What are the expected peak load and response times?"],
+    }
+    if fields is not None:
+        result = {key: value for key, value in result.items() if any(path.split(".")[0] == key for path in fields)}
+        if "requirements" in result:
+            kinds = {path.split(".")[1] for path in fields if path.startswith("requirements.")}
+            result["requirements"] = {kind: items for kind, items in result["requirements"].items() if kind in kinds}
+    if json_mode:
+        return json.dumps(result, indent=2)
+    return f"```json\n{json.dumps(result, indent=2)}\n```"
+
+
+def priority_reply(prompt):
+    requirements = prompt.split("\n\n", 1)[-1]
+    priorities = {}
+    for match in REQUIREMENT_LINE.finditer(requirements):
+        priorities[match.group("id").strip()] = PRIORITIES[len(match.group("text")) % len(PRIORITIES)]
+    return json.dumps(priorities)
+
+
+def chat_reply(prompt):
+    question = prompt.rsplit("### User Query:", 1)[-1].split("Generate a", 1)[0].strip()
+    return f"Based on the document, here is what I found about \"{question}\": " + "The requirements cover it. " * 20
+
+
+def reply_for(prompt, json_mode=False):
+    if "MOSCOW method" in prompt:
+        return priority_reply(prompt)
+    if "Provide only these fields" in prompt:
+        return analysis_reply(prompt, json_mode, [match.group("path") for match in REPAIR_FIELD_LINE.finditer(prompt)])
+    if "Business Analyst" in prompt:
+        return analysis_reply(prompt, json_mode)
+    return chat_reply(prompt)
+
+
+def candidate(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        match = MODEL_PATH.match(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        with server.stats_lock:
+            server.stats["requests"] += 1
+            fail = server.rng.random() < server.failure_rate or server.stats["requests"] <= server.fail_first
+            truncate_at = server.rng.uniform(0.3, 0.9) if server.rng.random() < server.truncate_rate else None
+            delay = max(0.0, server.rng.gauss(server.latency, server.jitter))
+        time.sleep(delay)
+        if fail:
+            with server.stats_lock:
+                server.stats["failures"] += 1
+            status = server.failure_status
+            headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else {}
+            self._send_json(status, {"error": {"code": status, "message": "Injected failure"}}, headers)
+            return
+
+        try:
+            payload = json.loads(body)
+            prompt = payload["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError):
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid payload"}})
+            return
+
+        json_mode = payload.get("generationConfig", {}).get("responseMimeType") == "application/json"
+        text = reply_for(prompt, json_mode)
+        if truncate_at is not None:
+            with server.stats_lock:
+                server.stats["truncated"] += 1
+            text = text[:int(len(text) * truncate_at)]
+        if match.group("method") == "streamGenerateContent":
+            self._send_stream(text)
+        else:
+            self._send_json(200, candidate(text))
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        size = max(1, len(text) // STREAM_PIECES + 1)
+        for start in range(0, len(text), size):
+            self.wfile.write(f"data: {json.dumps(candidate(text[start:start + size]))}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+
+class FakeGeminiServer:
+    """Runs the fake API on a background thread; latency and jitter are in seconds.
+
+    Injected failures answer with failure_status, and a Retry-After header when retry_after is set;
+    fail_first makes the first requests fail regardless of failure_rate.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.01, failure_rate=0.0, seed=0, truncate_rate=0.0,
+                 failure_status=503, retry_after=None, fail_first=0):
+        self._httpd = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.jitter = jitter
+        self._httpd.failure_rate = failure_rate
+        self._httpd.truncate_rate = truncate_rate
+        self._httpd.failure_status = failure_status
+        self._httpd.retry_after = retry_after
+        self._httpd.fail_first = fail_first
+        self._httpd.rng = random.Random(seed)
+        self._httpd.stats = {"requests": 0, "failures": 0, "truncated": 0}
+        self._httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        with self._httpd.stats_lock:
+            return dict(self._httpd.stats)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="standard deviation of the delay")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of replies cut off part-way")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(args.host, args.port, args.latency, args.jitter, args.failure_rate, args.seed, args.truncate_rate)
+    print(f"Fake Gemini API on {server.url} (set GEMINI_API_BASE={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
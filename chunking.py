@@ -0,0 +1,69 @@
+import re
+
+# Rough characters-per-token ratio for English prose in Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Blank lines separate paragraphs and, in extracted PDFs, pages
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Numbered ("3.", "3.1", "Section 4") or all-caps lines that start a new section
+SECTION_HEADING = re.compile(r"^\s*(?:(?:(?i:section)\s+)?\d+(?:\.\d+)*\.?\s+\S|[A-Z][A-Z0-9 &/-]{3,}$)")
+
+
+def estimate_tokens(text):
+    """Estimates the number of model tokens in a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_oversized(block, max_chars):
+    """Splits a single block that is larger than the budget on line boundaries, then hard-wraps."""
+    pieces = []
+    current = ""
+    for line in block.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text, max_tokens):
+    """Splits text into chunks of at most max_tokens, breaking at paragraph, page or section boundaries.
+
+    Once a chunk is at least half full, a section heading starts a new chunk so sections stay together.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_size = 0
+
+    for block in PARAGRAPH_BREAK.split(text):
+        if not block.strip():
+            continue
+        pieces = [block] if len(block) <= max_chars else _split_oversized(block, max_chars)
+        for piece in pieces:
+            if not piece.strip():
+                continue
+            starts_section = bool(SECTION_HEADING.match(piece.strip().splitlines()[0]))
+            separator = 2 if current else 0
+            if current and (
+                current_size + separator + len(piece) > max_chars
+                or (starts_section and current_size >= max_chars // 2)
+            ):
+                chunks.append("\n\n".join(current))
+                current = []
+                current_size = 0
+                separator = 0
+            current.append(piece)
+            current_size += separator + len(piece)
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
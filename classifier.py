@@ -0,0 +1,108 @@
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+
+# Labeled example requirements per MoSCoW bucket and per category
+PROTOTYPES_PATH = os.getenv(
+    "REQUBE_PROTOTYPES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "requirement_prototypes.json")
+)
+
+# Hashed feature space size and the number of requirements scored per matrix multiply
+FEATURE_DIMENSIONS = 2 ** 14
+BATCH_SIZE = 256
+
+# A label is only trusted when its best prototype is this similar and ahead of the runner-up by the margin
+MIN_CONFIDENCE = float(os.getenv("REQUBE_CLASSIFIER_MIN_CONFIDENCE", "0.3"))
+MIN_MARGIN = float(os.getenv("REQUBE_CLASSIFIER_MIN_MARGIN", "0.05"))
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def extract_features(text):
+    """Returns the hashed word unigram, word bigram and character trigram features of a text."""
+    words = WORD_PATTERN.findall(text.lower())
+    features = list(words)
+    features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return [zlib.crc32(feature.encode("utf-8")) for feature in features]
+
+
+class PrototypeClassifier:
+    """Scores texts against labeled prototypes by cosine similarity of hashed TF-IDF vectors."""
+
+    def __init__(self, prototypes):
+        self.labels = list(prototypes)
+        examples = [(label, text) for label in self.labels for text in prototypes[label]]
+        hashed = [extract_features(text) for _, text in examples]
+
+        # Smoothed inverse document frequency over the prototypes
+        document_frequency = np.zeros(FEATURE_DIMENSIONS, dtype=np.float32)
+        for features in hashed:
+            document_frequency[np.unique(np.array(features, dtype=np.uint32) % FEATURE_DIMENSIONS)] += 1
+        self._idf = (np.log((1 + len(hashed)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        self._prototypes = self._vectorize(hashed)
+        self._prototype_labels = np.array([self.labels.index(label) for label, _ in examples])
+
+    def _vectorize(self, hashed_texts):
+        matrix = np.zeros((len(hashed_texts), FEATURE_DIMENSIONS), dtype=np.float32)
+        for row, features in enumerate(hashed_texts):
+            if features:
+                np.add.at(matrix[row], np.array(features, dtype=np.uint32) % FEATURE_DIMENSIONS, 1.0)
+        np.log1p(matrix, out=matrix)  # Sublinear term frequency
+        matrix *= self._idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def score_batch(self, texts):
+        """Returns (label, confidence, confident) for each text."""
+        results = []
+        for start in range(0, len(texts), BATCH_SIZE):
+            vectors = self._vectorize([extract_features(text) for text in texts[start:start + BATCH_SIZE]])
+            similarities = vectors @ self._prototypes.T
+
+            # Best prototype similarity per label
+            label_scores = np.full((len(vectors), len(self.labels)), -1.0, dtype=np.float32)
+            for label_index in range(len(self.labels)):
+                columns = self._prototype_labels == label_index
+                label_scores[:, label_index] = similarities[:, columns].max(axis=1)
+
+            ranked = np.argsort(-label_scores, axis=1)
+            best = label_scores[np.arange(len(vectors)), ranked[:, 0]]
+            runner_up = label_scores[np.arange(len(vectors)), ranked[:, 1]] if len(self.labels) > 1 else np.zeros(len(vectors))
+            for label_index, confidence, margin in zip(ranked[:, 0], best, best - runner_up):
+                confident = bool(confidence >= MIN_CONFIDENCE and margin >= MIN_MARGIN)
+                results.append((self.labels[label_index], float(confidence), confident))
+        return results
+
+
+class RequirementClassifier:
+    """Local MoSCoW priority and Functional/Non-Functional classifier built from prototype requirements."""
+
+    def __init__(self, prototypes):
+        self.groups = {group: PrototypeClassifier(examples) for group, examples in prototypes.items()}
+
+    def classify_batch(self, texts):
+        """Returns {group: (label, confidence, confident)} for each text."""
+        scored = {group: classifier.score_batch(texts) for group, classifier in self.groups.items()}
+        return [{group: scored[group][i] for group in self.groups} for i in range(len(texts))]
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Returns the classifier built from PROTOTYPES_PATH, loading it on first use."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            with open(PROTOTYPES_PATH, "r", encoding="utf-8") as file:
+                _classifier = RequirementClassifier(json.load(file))
+        return _classifier
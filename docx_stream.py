@@ -0,0 +1,110 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Reads DOCX text straight from the WordprocessingML parts with iterparse instead of building
+# python-docx's object model. Elements are dropped from the tree as soon as they end, so memory
+# stays flat however long the document is.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+BODY_PART = "word/document.xml"
+# Parts read after the body, in this order; each header and footer part is read once however many sections use it
+NOTE_PARTS = ["word/footnotes.xml", "word/endnotes.xml"]
+HEADER_FOOTER_PART = re.compile(r"^word/(header|footer)(\d*)\.xml$")
+
+# Run content that stands for a character of its own
+_RUN_CHARACTERS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-", W + "softHyphen": ""}
+
+
+def docx_parts(names):
+    """Returns (part name, unit) for the text parts of a DOCX in reading order: body, notes, headers, footers."""
+    parts = [(BODY_PART, "paragraph")]
+    parts.extend((name, "note") for name in NOTE_PARTS if name in names)
+    for kind in ("header", "footer"):
+        matches = [name for name in names if (match := HEADER_FOOTER_PART.match(name)) and match.group(1) == kind]
+        parts.extend((name, kind) for name in sorted(matches, key=lambda name: int(HEADER_FOOTER_PART.match(name).group(2) or 0)))
+    return parts
+
+
+def iter_part_blocks(stream):
+    """Yields (kind, text) for one part, where kind is "paragraph" or "cell".
+
+    Paragraphs end in a newline. Cells end in a tab, except the last cell of a row, which ends the line, so
+    a table reads as tab-separated rows. Paragraphs and line breaks inside a cell are joined with spaces,
+    and nested tables are folded into the cell that contains them. Text boxes are read from their primary
+    content only, not the fallback copy.
+    """
+    paragraphs = []  # Text pieces of each open paragraph, innermost last
+    cells = []  # Paragraph texts of each open table cell, innermost last
+    row_cells = []  # Finished cells of the open outermost table row
+    path = []  # Open elements, so each one can be detached from its parent when it ends
+    fallback_depth = 0
+
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            path.append(element)
+            if tag == MC_FALLBACK:
+                fallback_depth += 1
+            elif fallback_depth:
+                pass
+            elif tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            continue
+
+        path.pop()
+        if path:
+            path[-1].remove(element)
+        if tag == MC_FALLBACK:
+            fallback_depth -= 1
+            continue
+        if fallback_depth:
+            continue
+
+        if tag == W + "t":
+            if paragraphs and element.text:
+                paragraphs[-1].append(element.text)
+        elif tag in _RUN_CHARACTERS:
+            if paragraphs:
+                paragraphs[-1].append(_RUN_CHARACTERS[tag])
+        elif tag == W + "p":
+            text = "".join(paragraphs.pop())
+            if paragraphs:
+                paragraphs[-1].append(text)  # A text box paragraph belongs to the paragraph that anchors it
+            elif cells:
+                cells[-1].append(text)
+            else:
+                yield "paragraph", text + "\n"
+        elif tag == W + "tc":
+            text = " ".join(part for part in cells.pop() if part).replace("\n", " ")
+            if cells:
+                cells[-1].append(text)
+            else:
+                row_cells.append(text)
+        elif tag == W + "tr" and not cells:
+            for index, text in enumerate(row_cells, start=1):
+                yield "cell", text + ("\n" if index == len(row_cells) else "\t")
+            row_cells = []
+
+
+def iter_docx_blocks(docx_path):
+    """Yields (unit, position, text) for every paragraph and table cell of a DOCX in reading order.
+
+    unit is "paragraph" or "cell" in the body and "note", "header" or "footer" in the other parts, and
+    position counts blocks from 1 across the document. Empty paragraphs are kept in the body to preserve
+    its spacing and skipped elsewhere.
+    """
+    position = 0
+    with zipfile.ZipFile(docx_path) as archive:
+        names = set(archive.namelist())
+        for part, part_unit in docx_parts(names):
+            with archive.open(part) as stream:
+                for kind, text in iter_part_blocks(stream):
+                    if part != BODY_PART and text == "\n":
+                        continue
+                    position += 1
+                    yield ("cell" if kind == "cell" and part == BODY_PART else part_unit), position, text
@@ -0,0 +1,61 @@
+"""Runs extractions in a long-lived process of its own, so a hung or runaway extraction can be killed.
+
+Started by the extractors worker pool as:
+
+    python extract_worker.py [MODULE ...]
+
+Imports input, which registers the built-in extractors, and the MODULEs that registered others, then
+reads pickled requests (extractor_name, file_path, timeout_seconds, processes) from stdin until it is
+closed. For every request it writes pickled messages to stdout: ("chunk", TextChunk, metrics) for every
+chunk, then ("done", metrics) or ("error", exception, metrics), where metrics are the metric updates
+since the previous message.
+"""
+import sys
+import time
+import pickle
+import importlib
+import input
+from extractors import get_extractor, iter_within_limits
+from metrics import forward_metrics, take_forwarded_metrics
+
+
+def _send(out, message):
+    pickle.dump(message, out)
+    out.flush()
+
+
+def extract(out, extractor_name, file_path, timeout, processes):
+    deadline = time.monotonic() + timeout
+    try:
+        extractor = get_extractor(extractor_name)
+        for chunk in iter_within_limits(extractor.iter_text(file_path), deadline, processes):
+            _send(out, ("chunk", chunk, take_forwarded_metrics()))
+        message = ("done", take_forwarded_metrics())
+    except Exception as e:
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            e = RuntimeError(str(e))  # Not every exception survives pickling
+        message = ("error", e, take_forwarded_metrics())
+    _send(out, message)
+
+
+def main(module_names):
+    requests = sys.stdin.buffer
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr  # Anything an extractor prints must not corrupt the message stream
+    forward_metrics()
+    for module_name in module_names:
+        importlib.import_module(module_name)
+    input.preload_libraries()
+    take_forwarded_metrics()  # Loading is not part of any extraction
+    while True:
+        try:
+            request = pickle.load(requests)
+        except EOFError:
+            return
+        extract(out, *request)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
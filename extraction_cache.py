@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from metrics import increment
+
+# Location and size bound of the on-disk extraction cache
+CACHE_PATH = os.getenv("REQUBE_EXTRACTION_CACHE_PATH", os.path.join("cache", "extraction.sqlite3"))
+CACHE_MAX_BYTES = int(os.getenv("REQUBE_EXTRACTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_ENABLED = os.getenv("REQUBE_EXTRACTION_CACHE", "1") != "0"
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    """Returns the SHA-256 hex digest of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(content_hash, settings):
+    """Combines a content hash with the extractor settings that affect the output."""
+    settings_blob = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(f"{content_hash}:{settings_blob}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """SQLite-backed text cache keyed by file content and extractor settings, with LRU eviction."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_access ON extractions(last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Returns the cached text for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                increment("reqube_cache_misses_total", cache="extraction")
+                return None
+            self._conn.execute("UPDATE extractions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            increment("reqube_cache_hits_total", cache="extraction")
+            return row[0]
+
+    def put(self, key, text):
+        """Stores extracted text and evicts least recently used entries past the size bound."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            logging.info(f"Extraction of {size} bytes exceeds cache bound, not caching.")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM extractions ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        """Removes every cached extraction."""
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and current cache usage."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide extraction cache, or None when caching is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ExtractionCache()
+            except sqlite3.Error as e:
+                logging.error(f"Could not open extraction cache at {CACHE_PATH}: {e}")
+                return None
+        return _cache
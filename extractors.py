@@ -0,0 +1,501 @@
+import os
+import sys
+import time
+import pickle
+import signal
+import logging
+import zipfile
+import threading
+import subprocess
+from collections import namedtuple
+from contextlib import contextmanager
+from metrics import replay_metrics
+
+# Limits every extractor runs under unless it registers its own
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("REQUBE_EXTRACT_TIMEOUT_SECONDS", "300"))
+EXTRACT_MAX_MEMORY_MB = int(os.getenv("REQUBE_EXTRACT_MAX_MEMORY_MB", "512"))
+EXTRACT_MAX_PAGES = int(os.getenv("REQUBE_EXTRACT_MAX_PAGES", "500"))
+
+# Extractors run in a pool of at most EXTRACT_WORKERS long-lived worker processes with the format
+# libraries loaded. A worker is killed, along with the OCR processes it started, and replaced when an
+# extraction runs past its timeout, adds more than max_memory_mb to the worker's memory or is abandoned
+# by its caller. Set REQUBE_EXTRACT_WORKER_PROCESS=0 to run extractors in-process instead, where only
+# OCR calls and the gaps between chunks are held to the timeout and memory is not watched
+EXTRACT_IN_WORKER_PROCESS = os.getenv("REQUBE_EXTRACT_WORKER_PROCESS", "1") != "0"
+EXTRACT_WORKERS = int(os.getenv("REQUBE_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extract_worker.py")
+# Workers are replaced after this many extractions, so fragmentation cannot build up
+EXTRACT_WORKER_MAX_JOBS = 200
+EXTRACT_MEMORY_POLL_SECONDS = 0.25
+
+# Extra processes that extractions may start for parallel work (PDF OCR pools), shared by all of them
+EXTRACT_HELPER_PROCESSES = int(os.getenv("REQUBE_EXTRACT_HELPER_PROCESSES", str(os.cpu_count() or 1)))
+
+# External converters (catdoc) allowed to run at once across all requests
+SUBPROCESS_MAX_WORKERS = int(os.getenv("REQUBE_EXTRACT_SUBPROCESS_WORKERS", "4"))
+
+# Bytes read from the start of a file to recognize its format
+SNIFF_BYTES = 8192
+
+# One registered format:
+#   iter_text(path) yields TextChunk pieces of the document
+#   sniff(path, head) tells whether the first SNIFF_BYTES of a file are this format; text formats have
+#     no sniff and are picked by extension
+#   page_unit is the TextChunk unit that max_pages counts, None when the format has no pages
+#   max_memory_mb caps the input size (uncompressed, for ZIP containers), the extracted text, the memory
+#     an extraction adds to its worker process and the address space of external converters
+#   converter is True for formats read by an external converter, which takes one of SUBPROCESS_MAX_WORKERS slots
+#   process_pool is True for formats that may spread their work over helper processes
+Extractor = namedtuple(
+    "Extractor",
+    ["name", "extensions", "iter_text", "sniff", "page_unit", "timeout", "max_memory_mb", "max_pages",
+     "converter", "process_pool"],
+)
+
+_extractors = {}  # name -> Extractor, in registration order
+_extractor_modules = set()  # Modules that registered extractors, which worker processes import as well
+_subprocess_slots = threading.BoundedSemaphore(SUBPROCESS_MAX_WORKERS)
+# deadline: time.monotonic() by which the extraction running in this thread must end; processes: how
+# many processes it may use for parallel work
+_limits = threading.local()
+_helpers_lock = threading.Lock()
+_helpers_granted = 0
+
+
+def register_extractor(name, extensions, sniff=None, page_unit=None, timeout=None, max_memory_mb=None, max_pages=None,
+                       converter=False, process_pool=False):
+    """Decorator that registers iter_text(path) as the extractor for a format; the function is returned unchanged."""
+    def decorator(iter_text):
+        _extractors[name] = Extractor(
+            name,
+            [extension.lower() for extension in extensions],
+            iter_text,
+            sniff,
+            page_unit,
+            timeout or EXTRACT_TIMEOUT_SECONDS,
+            max_memory_mb or EXTRACT_MAX_MEMORY_MB,
+            max_pages or EXTRACT_MAX_PAGES,
+            converter,
+            process_pool,
+        )
+        # Scripts run by path (python input.py) have no spec and no name a worker could import them by
+        spec = getattr(sys.modules.get(iter_text.__module__), "__spec__", None)
+        if spec is not None:
+            _extractor_modules.add(spec.name)
+        return iter_text
+    return decorator
+
+
+def get_extractor(name):
+    return _extractors[name]
+
+
+def supported_extensions():
+    """Returns every file extension some extractor is registered for."""
+    return [extension for extractor in _extractors.values() for extension in extractor.extensions]
+
+
+def extractor_for_extension(file_extension):
+    return next((extractor for extractor in _extractors.values() if file_extension in extractor.extensions), None)
+
+
+def starts_with(*signatures):
+    """Sniffer for formats identified by a fixed leading signature."""
+    return lambda path, head: head.startswith(signatures)
+
+
+def zip_containing(member):
+    """Sniffer for ZIP containers (DOCX, XLSX, PPTX) identified by a part they must contain."""
+    def sniff(path, head):
+        if not head.startswith(b"PK\x03\x04"):
+            return False
+        with zipfile.ZipFile(path) as archive:
+            return member in archive.namelist()
+    return sniff
+
+
+def _sniff(extractor, path, head):
+    try:
+        return extractor.sniff(path, head)
+    except Exception:
+        return False
+
+
+def detect_extractor(file_path):
+    """Picks the extractor for a file from its content, using the extension only to break ties and for text formats.
+
+    A file whose content matches its extension's format uses that extractor. Otherwise the first format
+    whose signature matches wins, so mislabeled files are still read correctly. Content without any
+    known signature is read by the extension's text format if it has no NUL bytes, and anything else
+    raises ValueError.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    with open(file_path, "rb") as file:
+        head = file.read(SNIFF_BYTES)
+
+    by_extension = extractor_for_extension(file_extension)
+    if by_extension is not None and by_extension.sniff is not None and _sniff(by_extension, file_path, head):
+        return by_extension
+
+    for extractor in _extractors.values():
+        if extractor.sniff is not None and extractor is not by_extension and _sniff(extractor, file_path, head):
+            logging.warning(f"{file_path} has a {file_extension or 'missing'} extension but {extractor.name} content")
+            return extractor
+
+    if by_extension is not None and by_extension.sniff is None and b"\0" not in head:
+        return by_extension
+    raise ValueError(f"Unsupported or unrecognized file format: {file_extension or 'no extension'}")
+
+
+def _input_size(file_path):
+    """Bytes the extractor has to read: the uncompressed total for ZIP containers, else the file size."""
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as archive:
+            return sum(info.file_size for info in archive.infolist())
+    return os.path.getsize(file_path)
+
+
+def iter_with_limits(extractor, file_path):
+    """Yields the extractor's chunks, enforcing its input size, text size, wall-clock, memory and page limits.
+
+    Oversized input or text, or using too much memory, raises ValueError and running past the timeout
+    raises TimeoutError. With EXTRACT_IN_WORKER_PROCESS the extractor runs in a pooled worker process
+    that is killed when it breaks a limit, so parsers that hang are stopped too. Documents over the page
+    cap are cut off at the cap.
+    """
+    max_bytes = extractor.max_memory_mb * 1024 * 1024
+    input_size = _input_size(file_path)
+    if input_size > max_bytes:
+        raise ValueError(f"{file_path} is {input_size // (1024 * 1024)} MB, over the {extractor.name} limit of {extractor.max_memory_mb} MB")
+
+    deadline = time.monotonic() + extractor.timeout
+    pages = 0
+    text_size = 0
+    helpers = _grant_helpers() if extractor.process_pool else 0
+    if EXTRACT_IN_WORKER_PROCESS:
+        chunks = _iter_in_worker(extractor, file_path, max(1, helpers))
+    else:
+        chunks = iter_within_limits(extractor.iter_text(file_path), deadline, max(1, helpers))
+    try:
+        for chunk in chunks:
+            # Workers are timed from when they start the extraction, by their watchdog
+            if not EXTRACT_IN_WORKER_PROCESS and time.monotonic() > deadline:
+                raise TimeoutError(f"Extracting {file_path} took longer than {extractor.timeout:.0f} s")
+            if extractor.page_unit is not None and chunk.unit == extractor.page_unit:
+                pages += 1
+                if pages > extractor.max_pages:
+                    logging.warning(f"Stopped reading {file_path} after {extractor.max_pages} {extractor.page_unit}s")
+                    return
+            text_size += len(chunk.text)
+            if text_size > max_bytes:
+                raise ValueError(f"Text extracted from {file_path} exceeds the {extractor.name} limit of {extractor.max_memory_mb} MB")
+            yield chunk
+    finally:
+        chunks.close()
+        _return_helpers(helpers)
+
+
+def _grant_helpers():
+    """Reserves what is left of EXTRACT_HELPER_PROCESSES for one extraction; 0 when too few are left to help."""
+    global _helpers_granted
+    with _helpers_lock:
+        free = EXTRACT_HELPER_PROCESSES - _helpers_granted
+        granted = free if free >= 2 else 0
+        _helpers_granted += granted
+    return granted
+
+
+def _return_helpers(granted):
+    global _helpers_granted
+    with _helpers_lock:
+        _helpers_granted -= granted
+
+
+@contextmanager
+def extraction_limits(deadline, processes=None):
+    """Makes time_left() and process_allowance() report the limits of an extraction in this thread."""
+    previous = (getattr(_limits, "deadline", None), getattr(_limits, "processes", None))
+    _limits.deadline, _limits.processes = deadline, processes
+    try:
+        yield
+    finally:
+        _limits.deadline, _limits.processes = previous
+
+
+def current_deadline():
+    """The deadline of the extraction running in this thread, or None."""
+    return getattr(_limits, "deadline", None)
+
+
+def time_left():
+    """Seconds until the deadline of the extraction running in this thread (0 once passed), or None."""
+    deadline = current_deadline()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def process_allowance():
+    """How many processes the extraction running in this thread may use for parallel work, or None for no limit."""
+    return getattr(_limits, "processes", None)
+
+
+def iter_within_limits(chunks, deadline, processes=None):
+    """Yields from an extractor's chunk generator with its limits set while each chunk is produced."""
+    try:
+        while True:
+            with extraction_limits(deadline, processes):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        chunks.close()
+
+
+class _WorkerPool:
+    """At most size extract_worker.py processes, each running one extraction at a time and reused after it."""
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = []
+        self._count = 0
+        self._available = threading.Condition()
+
+    def acquire(self):
+        with self._available:
+            while True:
+                while self._idle:
+                    process = self._idle.pop()
+                    if process.poll() is None:
+                        return process
+                    self._count -= 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._available.wait()
+        try:
+            return _start_worker()
+        except BaseException:
+            self._discard()
+            raise
+
+    def release(self, process, reuse):
+        if not reuse:
+            _stop_worker(process)
+            self._discard()
+            return
+        with self._available:
+            self._idle.append(process)
+            self._available.notify()
+
+    def _discard(self):
+        with self._available:
+            self._count -= 1
+            self._available.notify()
+
+    def start(self):
+        """Starts the missing workers ahead of the first extraction; they load their libraries in the background."""
+        with self._available:
+            missing = self.size - self._count
+        processes = [self.acquire() for _ in range(missing)]
+        for process in processes:
+            self.release(process, True)
+
+    def shutdown(self):
+        """Stops the idle workers; busy ones keep running until their extraction ends."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for process in idle:
+            _stop_worker(process)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Returns the process-wide pool of extraction workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool(EXTRACT_WORKERS)
+        return _pool
+
+
+def _start_worker():
+    # Workers import the modules that registered extractors from wherever this process found them
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    process = subprocess.Popen(
+        [sys.executable, EXTRACT_WORKER_SCRIPT, *sorted(_extractor_modules)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, start_new_session=os.name == "posix",
+    )
+    process.jobs = 0
+    return process
+
+
+def _stop_worker(process):
+    _kill(process)
+    process.wait()
+    process.stdin.close()
+    process.stdout.close()
+
+
+def _iter_in_worker(extractor, file_path, processes):
+    """Runs the extractor in a pooled worker process and yields the chunks it sends back.
+
+    A watchdog kills the worker's process group, which holds the OCR pools and Tesseract runs it
+    started, when the extraction runs past its timeout (TimeoutError) or adds more than max_memory_mb
+    to the group's memory (ValueError). A worker whose extraction ended with a result or an error goes
+    back to the pool; one that was killed or abandoned by the caller is replaced.
+    """
+    if extractor.converter and not _subprocess_slots.acquire(timeout=extractor.timeout):
+        raise TimeoutError(f"No free slot to run the {extractor.name} converter within {extractor.timeout:.0f} s")
+    pool = get_worker_pool()
+    try:
+        process = pool.acquire()
+        reuse = False
+        broken = []  # The limit the watchdog killed the worker for
+        stop = threading.Event()
+        watchdog = None
+        try:
+            baseline = _group_memory(process.pid)
+            deadline = time.monotonic() + extractor.timeout
+            pickle.dump((extractor.name, file_path, extractor.timeout, processes), process.stdin)
+            process.stdin.flush()
+
+            def watch():
+                max_bytes = extractor.max_memory_mb * 1024 * 1024
+                while not stop.wait(max(0.0, min(EXTRACT_MEMORY_POLL_SECONDS, deadline - time.monotonic()))):
+                    if time.monotonic() >= deadline:
+                        broken.append(TimeoutError(f"Extracting {file_path} took longer than {extractor.timeout:.0f} s"))
+                    elif baseline is not None and (_group_memory(process.pid) or 0) - baseline > max_bytes:
+                        broken.append(ValueError(f"Extracting {file_path} needed more than the {extractor.name} limit of {extractor.max_memory_mb} MB"))
+                    else:
+                        continue
+                    _kill(process)
+                    return
+
+            watchdog = threading.Thread(target=watch, name="reqube-extract-watchdog", daemon=True)
+            watchdog.start()
+            while True:
+                try:
+                    message = pickle.load(process.stdout)
+                except EOFError:
+                    break
+                replay_metrics(message[-1])
+                if message[0] == "chunk":
+                    yield message[1]
+                    continue
+                reuse = True
+                if message[0] == "error":
+                    raise message[1]
+                return
+        finally:
+            stop.set()
+            if watchdog is not None:
+                watchdog.join()
+            process.jobs += 1
+            pool.release(process, reuse and not broken and process.jobs < EXTRACT_WORKER_MAX_JOBS)
+    finally:
+        if extractor.converter:
+            _subprocess_slots.release()
+    if broken:
+        raise broken[0]
+    raise RuntimeError(f"The {extractor.name} extractor process for {file_path} exited with status {process.returncode}")
+
+
+def _group_memory(pgid):
+    """Bytes of memory used by the processes of a process group, None where /proc does not tell."""
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    total = None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                if int(stat.read().rpartition(")")[2].split()[2]) != pgid:
+                    continue
+            total = (total or 0) + _process_memory(entry)
+        except (OSError, ValueError, IndexError):
+            continue  # Exited while the group was being read
+    return total
+
+
+def _process_memory(pid):
+    # Proportional set size splits the pages forked OCR workers share with the worker between them,
+    # where RSS would count them once per process
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            for line in rollup:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        pass
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def iter_subprocess_lines(args, timeout, max_memory_mb):
+    """Runs an external converter in one of SUBPROCESS_MAX_WORKERS slots and yields its output lines.
+
+    The process is killed if it runs longer than timeout seconds (TimeoutError) and, where the platform
+    allows, its address space is capped at max_memory_mb. In worker processes the slot is always free,
+    since the parent takes one for every converter extraction it hands to a worker.
+    """
+    started = time.monotonic()
+    if not _subprocess_slots.acquire(timeout=timeout):
+        raise TimeoutError(f"No free slot to run {args[0]} within {timeout:.0f} s")
+    try:
+        # On POSIX the converter gets its own process group, so killing it also stops any children it forked
+        with subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="replace",
+                              start_new_session=os.name == "posix") as process:
+            _limit_memory(process.pid, max_memory_mb)
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                _kill(process)
+
+            watchdog = threading.Timer(max(0.0, timeout - (time.monotonic() - started)), kill)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                yield from process.stdout
+                process.wait()
+            finally:
+                watchdog.cancel()
+                if process.poll() is None:
+                    _kill(process)
+            if timed_out.is_set():
+                raise TimeoutError(f"{args[0]} took longer than {timeout:.0f} s")
+            if process.returncode != 0:
+                logging.warning(f"{args[0]} exited with status {process.returncode}")
+    finally:
+        _subprocess_slots.release()
+
+
+def _kill(process):
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _limit_memory(pid, max_memory_mb):
+    # prlimit applies right after the fork rather than before exec, since preexec_fn is unsafe in a
+    # threaded server; it is Linux only
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, AttributeError, OSError, ValueError):
+        pass
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import increment, timed
+
+# Endpoint, overridable so the app can be pointed at a local fake server
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+GEMINI_API_VERSION = os.getenv("GEMINI_API_VERSION", "v1")
+
+# Per-call timeout, retry policy and the cap on in-flight requests per process
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "0.5"))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "8"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def first_candidate_text(response_json):
+    """Returns the text of the first candidate in a generateContent response, or None."""
+    candidates = response_json.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts") or [{}]
+    return parts[0].get("text")
+
+
+def _count_http_error(model, response):
+    if response.status_code >= 400:
+        increment("reqube_llm_errors_total", model=model, reason=f"http_{response.status_code}")
+
+
+def _count_transport_error(model, error):
+    reason = "timeout" if isinstance(error, requests.exceptions.Timeout) else "connection"
+    increment("reqube_llm_errors_total", model=model, reason=reason)
+
+
+class GeminiClient:
+    """Gemini REST client with a pooled keep-alive session, timeouts, retries and a concurrency cap."""
+
+    def __init__(
+        self,
+        api_key,
+        base_url=GEMINI_API_BASE,
+        api_version=GEMINI_API_VERSION,
+        timeout=GEMINI_TIMEOUT_SECONDS,
+        max_retries=GEMINI_MAX_RETRIES,
+        max_concurrency=GEMINI_MAX_CONCURRENCY,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.api_version = api_version
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers["x-goog-api-key"] = api_key
+
+    def model_url(self, model, method="generateContent", api_version=None):
+        return f"{self.base_url}/{api_version or self.api_version}/models/{model}:{method}"
+
+    def generate_content(self, model, payload, timeout=None, api_version=None):
+        """POSTs a generateContent payload and returns the decoded JSON response.
+
+        Retries connection errors, timeouts, 429 and 5xx responses with exponential backoff and jitter,
+        and raises requests.exceptions.RequestException once the retries are used up. api_version
+        overrides the client's version for calls that need newer features, such as response schemas.
+        """
+        url = self.model_url(model, api_version=api_version)
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self._slots, timed("gemini_request"):
+                    response = self.session.post(url, json=payload, timeout=timeout)
+                _count_http_error(model, response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = response.headers.get("Retry-After")
+                reason = f"HTTP {response.status_code}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                _count_transport_error(model, e)
+                if attempt == self.max_retries:
+                    raise
+                reason = str(e)
+
+            delay = self._backoff(attempt, retry_after)
+            logging.warning(f"Gemini call to {model} failed ({reason}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+    def stream_generate_content(self, model, payload, timeout=None):
+        """Streams a generateContent call over SSE and yields each chunk's text as it arrives.
+
+        Only the initial request is retried; once text has been yielded a failure is raised to the caller.
+        A concurrency slot is held per connection attempt, as in generate_content, and not while the
+        stream is read, so slow readers and backoff sleeps do not hold back other calls.
+        """
+        url = self.model_url(model, "streamGenerateContent")
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self._slots, timed("gemini_stream_connect"):
+                    response = self.session.post(url, params={"alt": "sse"}, json=payload, timeout=timeout, stream=True)
+                _count_http_error(model, response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        response.close()
+                    response.raise_for_status()
+                    break
+                retry_after = response.headers.get("Retry-After")
+                reason = f"HTTP {response.status_code}"
+                response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                _count_transport_error(model, e)
+                if attempt == self.max_retries:
+                    raise
+                reason = str(e)
+
+            delay = self._backoff(attempt, retry_after)
+            logging.warning(f"Gemini stream to {model} failed ({reason}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+        with response, timed("gemini_stream"):
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                text = first_candidate_text(json.loads(line[len("data:"):]))
+                if text:
+                    yield text
+
+    def generate_text(self, model, prompt, timeout=None, api_version=None, **extra):
+        """Sends a single-turn text prompt and returns the first candidate's text, or None."""
+        payload = {"contents": [{"parts": [{"text": prompt}]}], **extra}
+        return first_candidate_text(self.generate_content(model, payload, timeout, api_version))
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), GEMINI_BACKOFF_MAX_SECONDS)
+        ceiling = min(GEMINI_BACKOFF_MAX_SECONDS, GEMINI_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Returns the process-wide Gemini client, created from GEMINI_API_KEY on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient(os.getenv("GEMINI_API_KEY"))
+        return _client
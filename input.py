@@ -1,97 +1,495 @@
 import os
-import subprocess
 import logging
-import fitz  # PyMuPDF for PDFs
-import docx  # python-docx for DOCX files
-import pytesseract  # OCR for images
-from PIL import Image  # Image processing
-from langdetect import detect
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from docx_stream import iter_docx_blocks
+from extraction_cache import get_cache, hash_file, make_key
+from extractors import (
+    EXTRACT_IN_WORKER_PROCESS,
+    current_deadline,
+    detect_extractor,
+    extraction_limits,
+    get_extractor,
+    get_worker_pool,
+    iter_subprocess_lines,
+    iter_with_limits,
+    process_allowance,
+    register_extractor,
+    starts_with,
+    time_left,
+    zip_containing,
+)
+from metrics import increment, observe_stage, timed
+from normalization import PAGE_BREAK
+from ocr_preprocess import OCR_MAX_DPI, preprocess_for_ocr, preprocess_settings, render_page_for_ocr
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Set Tesseract path manually (if necessary)
-pytesseract.pytesseract.tesseract_cmd = r"C:/Program Files/Tesseract-OCR/tesseract.exe"
+TESSERACT_CMD = os.getenv("REQUBE_TESSERACT_CMD", r"C:/Program Files/Tesseract-OCR/tesseract.exe")
 
 # Define a constant for OCR languages
 OCR_LANGUAGES = "eng+mar+hin+tam+tel+guj+kan+ben+ori+pan+fra+spa+deu+chi_sim+jpn+rus+ara"
 
+# "auto" runs a cheap script detection pass and OCRs with the matching packs only,
+# "all" always OCRs with every pack in OCR_LANGUAGES
+OCR_LANGUAGE_MODE = os.getenv("REQUBE_OCR_LANGUAGE_MODE", "auto")
 
-def extract_text_from_pdf(pdf_path, lang=OCR_LANGUAGES):
-    """Extracts text from a PDF file using built-in extraction first, then OCR if needed."""
+# Language packs to OCR with for each script reported by Tesseract OSD; Latin script keeps every
+# Latin-script pack of OCR_LANGUAGES, since OSD cannot tell English from French, Spanish or German
+SCRIPT_LANGUAGES = {
+    "Latin": "eng+fra+spa+deu",
+    "Devanagari": "eng+hin+mar",
+    "Tamil": "eng+tam",
+    "Telugu": "eng+tel",
+    "Gujarati": "eng+guj",
+    "Kannada": "eng+kan",
+    "Bengali": "eng+ben",
+    "Oriya": "eng+ori",
+    "Gurmukhi": "eng+pan",
+    "Han": "eng+chi_sim",
+    "Japanese": "eng+jpn",
+    "Cyrillic": "eng+rus",
+    "Arabic": "eng+ara",
+}
+
+# Script detection works on a reduced image
+OSD_PROBE_DPI = 100
+OSD_PROBE_MAX_SIDE = 1600
+
+# Resolution used to rasterize text-less PDF pages that carry no scan to take the resolution from
+OCR_DPI = 144
+
+# PDFs with at least this many pages to OCR have them spread over a process pool, no larger than the
+# share of the extractors' helper processes (REQUBE_EXTRACT_HELPER_PROCESSES) the extraction was given
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("REQUBE_PDF_PARALLEL_MIN_PAGES", "4"))
+PDF_OCR_MAX_WORKERS = int(os.getenv("REQUBE_PDF_OCR_MAX_WORKERS", str(os.cpu_count() or 1)))
+PDF_OCR_MEMORY_BUDGET_MB = int(os.getenv("REQUBE_PDF_OCR_MEMORY_BUDGET_MB", "2048"))
+
+# "stream" reads DOCX text, tables, notes, headers and footers straight from the XML parts,
+# "python-docx" reads body paragraphs only through python-docx's object model
+DOCX_EXTRACTOR = os.getenv("REQUBE_DOCX_EXTRACTOR", "stream")
+
+# Upper bound on the size of a single TXT chunk
+TXT_CHUNK_CHARS = 64 * 1024
+
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]
+IMAGE_SIGNATURES = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"II*\x00", b"MM\x00*")
+# BMP starts with just "BM", so its DIB header size is checked as well to avoid matching plain text
+BMP_DIB_HEADER_SIZES = {12, 40, 52, 56, 64, 108, 124}
+# Compound File Binary container of Word 97-2003 documents
+OLE2_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# The format libraries (PyMuPDF, python-docx, pytesseract, PIL, langdetect) are imported on first use,
+# so processes that never extract anything do not pay for loading them; warm_up() preloads them
+
+# langdetect loads its profiles on the first detect() without a lock, which breaks when files are extracted concurrently
+_langdetect_lock = threading.Lock()
+
+# A piece of extracted text and where it came from: unit is "page", "paragraph", "cell", "note", "header",
+# "footer", "line", "image", "sheet", "row", "slide" or "part", position is the 1-based page, slide, DOCX,
+# XLSX or email block, or first line number
+TextChunk = namedtuple("TextChunk", ["text", "source", "unit", "position"])
+
+
+def get_tesseract():
+    """Imports pytesseract on first use and points it at the Tesseract binary."""
+    import pytesseract  # OCR for images
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
+
+
+def _tesseract(call, image, **kwargs):
+    """Runs a pytesseract call, killing Tesseract at the deadline of the running extraction (TimeoutError)."""
+    seconds = time_left()
+    if seconds == 0:
+        raise TimeoutError("The extraction deadline passed before OCR started")
     try:
-        document = fitz.open(pdf_path)
-        text = ""
-        for page_num in range(len(document)):
-            page = document[page_num]
-            page_text = page.get_text("text")
-            if page_text.strip():
-                text += page_text + "\n"
-            else:
-                # Increase DPI for better OCR
-                img = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                image = Image.frombytes("RGB", [img.width, img.height], img.samples)
-                text += pytesseract.image_to_string(image, lang=lang) + "\n"
-        return text
+        return getattr(get_tesseract(), call)(image, timeout=seconds or 0, **kwargs)  # 0 means no timeout
+    except RuntimeError as e:
+        if seconds is not None and time_left() == 0:
+            raise TimeoutError(f"OCR stopped at the extraction deadline: {e}") from e
+        raise
+
+
+def preload_libraries():
+    """Imports the format libraries, so the first extraction in a process does not pay for them."""
+    import fitz  # noqa: F401
+    if DOCX_EXTRACTOR == "python-docx":
+        import docx  # noqa: F401
+    from PIL import Image  # noqa: F401
+    get_tesseract()
+
+
+def warm_up():
+    """Preloads the format libraries and langdetect's language profiles so the first request does not pay for them.
+
+    With extractors running in worker processes, the worker pool is started as well.
+    """
+    from langdetect.detector_factory import init_factory
+    preload_libraries()
+    with _langdetect_lock:
+        init_factory()  # Loads the language profiles that detect() would otherwise read on its first call
+    if EXTRACT_IN_WORKER_PROCESS:
+        get_worker_pool().start()
+    logging.info("Extraction libraries and language profiles loaded")
+
+
+def detect_ocr_languages(image):
+    """Picks OCR language packs from Tesseract's script detection, falling back to OCR_LANGUAGES."""
+    probe = image
+    if max(image.size) > OSD_PROBE_MAX_SIDE:
+        probe = image.copy()
+        probe.thumbnail((OSD_PROBE_MAX_SIDE, OSD_PROBE_MAX_SIDE))
+    pytesseract = get_tesseract()
+    try:
+        with timed("ocr_script_detection"):
+            osd = _tesseract("image_to_osd", probe, output_type=pytesseract.Output.DICT)
+    except TimeoutError:
+        raise
     except Exception as e:
-        logging.error(f"Error extracting text from {pdf_path}: {e}")
-        return None
+        logging.info(f"Script detection failed, using all OCR languages: {e}")
+        return OCR_LANGUAGES
 
+    script = osd.get("script")
+    lang = SCRIPT_LANGUAGES.get(script)
+    if not lang:
+        logging.info(f"No language packs mapped for script {script}, using all OCR languages")
+        return OCR_LANGUAGES
+    logging.info(f"Detected script {script}, OCR languages: {lang}")
+    return lang
 
-def extract_text_from_docx(docx_path):
-    """Extracts text from a DOCX file."""
+
+def _resolve_ocr_languages(lang, image_factory):
+    """Returns the explicit language string, or picks one according to OCR_LANGUAGE_MODE."""
+    if lang:
+        return lang
+    if OCR_LANGUAGE_MODE != "auto":
+        return OCR_LANGUAGES
+    return detect_ocr_languages(image_factory())
+
+
+def _render_osd_probe(page):
+    import fitz  # PyMuPDF for PDFs
+    from PIL import Image
+    zoom = OSD_PROBE_DPI / 72
+    img = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    return Image.frombytes("RGB", [img.width, img.height], img.samples)
+
+
+def _ocr_pdf_page(page, lang):
+    """Rasterizes a single PDF page and runs OCR on it."""
+    return _tesseract("image_to_string", render_page_for_ocr(page, OCR_DPI), lang=lang)
+
+
+def _ocr_pdf_pages(pdf_path, page_numbers, lang, deadline):
+    """Reopens the PDF and OCRs the given pages, stopping at the extraction deadline; runs inside pool workers.
+
+    Returns (text, seconds) per page, since metrics recorded in a worker process would be lost.
+    """
+    import time
+    import fitz  # PyMuPDF for PDFs
+    results = []
+    with fitz.open(pdf_path) as document, extraction_limits(deadline):
+        for page_num in page_numbers:
+            start = time.perf_counter()
+            page_text = _ocr_pdf_page(document[page_num], lang)
+            results.append((page_text, time.perf_counter() - start))
+    return results
+
+
+def _pdf_ocr_worker_count(document, page_numbers):
+    """Caps the OCR worker count by CPU count, configuration, the extraction's process allowance and the memory budget."""
+    zoom = max(OCR_DPI, OCR_MAX_DPI) / 72
+    largest_page = max(document[page_num].rect.width * document[page_num].rect.height for page_num in page_numbers)
+    # Grayscale pixmap, the binarized and deskewed copies and Tesseract's working buffers, plus interpreter overhead
+    per_worker_bytes = largest_page * zoom * zoom * 4 + 64 * 1024 * 1024
+    memory_cap = max(1, int(PDF_OCR_MEMORY_BUDGET_MB * 1024 * 1024 // per_worker_bytes))
+    allowance = process_allowance() or PDF_OCR_MAX_WORKERS
+    return max(1, min(PDF_OCR_MAX_WORKERS, allowance, memory_cap, len(page_numbers)))
+
+
+def _pdf_ocr_batches(page_numbers, workers):
+    """Splits OCR pages into ordered batches, several per worker so the pool stays busy when page costs differ."""
+    batch_size = max(1, -(-len(page_numbers) // (workers * 4)))
+    return deque(page_numbers[i:i + batch_size] for i in range(0, len(page_numbers), batch_size))
+
+
+@register_extractor("pdf", [".pdf"], sniff=lambda path, head: b"%PDF-" in head[:1024], page_unit="page", process_pool=True)
+def iter_text_from_pdf(pdf_path, lang=None, parallel=True):
+    """Yields PDF pages in order, OCRing text-less pages and prefetching them over a process pool when there are many."""
+    import fitz  # PyMuPDF for PDFs
+    with fitz.open(pdf_path) as document:
+        # A page without fonts has no text layer; listing fonts is far cheaper than extracting the text
+        ocr_pages = [page_num for page_num in range(len(document)) if not document[page_num].get_fonts()] if parallel else []
+        workers = 1
+        if len(ocr_pages) >= PDF_PARALLEL_MIN_PAGES:
+            workers = _pdf_ocr_worker_count(document, ocr_pages)
+        batches = _pdf_ocr_batches(ocr_pages, workers) if workers > 1 else deque()
+        executor = None
+        submitted = deque()  # (future, last page) of the batches handed to the pool, oldest first
+        in_flight = {}  # Page number -> (future of its batch, index in the batch)
+        # Pages waiting to be yielded; OCR pages hold their batch's future while it is in flight
+        pending = deque()
+        try:
+            if batches:
+                # The first scanned page decides the language packs for the rest of the document
+                lang = _resolve_ocr_languages(lang, lambda: _render_osd_probe(document[ocr_pages[0]]))
+                logging.info(f"OCR of {len(ocr_pages)} pages from {pdf_path} across {workers} workers")
+                executor = ProcessPoolExecutor(max_workers=workers)
+            for page_num in range(len(document)):
+                # Keep a couple of batches per worker queued ahead of the page being read
+                while submitted and submitted[0][1] < page_num:
+                    submitted.popleft()
+                while batches and len(submitted) < workers * 2:
+                    batch = batches.popleft()
+                    future = executor.submit(_ocr_pdf_pages, pdf_path, batch, lang, current_deadline())
+                    submitted.append((future, batch[-1]))
+                    in_flight.update((batch_page, (future, index)) for index, batch_page in enumerate(batch))
+
+                if page_num in in_flight:
+                    pending.append((page_num, in_flight.pop(page_num)))
+                else:
+                    with timed("pdf_text"):
+                        page_text = document[page_num].get_text("text")
+                    if not page_text.strip():
+                        lang = _resolve_ocr_languages(lang, lambda: _render_osd_probe(document[page_num]))
+                        with timed("ocr_page"):
+                            page_text = _ocr_pdf_page(document[page_num], lang)
+                        increment("reqube_ocr_pages_total", source="pdf")
+                    pending.append((page_num, page_text))
+
+                # Bound the read-ahead so memory stays flat however long the document is
+                while pending and (isinstance(pending[0][1], str) or pending[0][1][0].done() or len(pending) > workers * 2):
+                    yield _pdf_chunk(pdf_path, *pending.popleft())
+            while pending:
+                yield _pdf_chunk(pdf_path, *pending.popleft())
+        finally:
+            if executor is not None:
+                for future, _ in submitted:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+
+def _pdf_chunk(pdf_path, page_num, page_text):
+    if not isinstance(page_text, str):
+        future, index = page_text
+        page_text, seconds = future.result(timeout=time_left())[index]
+        observe_stage("ocr_page", seconds)
+        increment("reqube_ocr_pages_total", source="pdf")
+    return TextChunk(page_text + "\n" + PAGE_BREAK + "\n", pdf_path, "page", page_num + 1)
+
+
+@register_extractor("docx", [".docx"], sniff=zip_containing("word/document.xml"))
+def iter_text_from_docx(docx_path):
+    """Yields DOCX paragraphs and table cells in reading order, followed by notes, headers and footers."""
+    if DOCX_EXTRACTOR == "python-docx":
+        yield from iter_text_from_docx_object_model(docx_path)
+        return
+    for unit, position, text in iter_docx_blocks(docx_path):
+        yield TextChunk(text, docx_path, unit, position)
+
+
+def iter_text_from_docx_object_model(docx_path):
+    """Yields DOCX body paragraphs in order through python-docx."""
+    import docx  # python-docx for DOCX files
+    doc = docx.Document(docx_path)
+    for index, para in enumerate(doc.paragraphs, start=1):
+        yield TextChunk(para.text + "\n", docx_path, "paragraph", index)
+
+
+@register_extractor("doc", [".doc"], sniff=starts_with(OLE2_SIGNATURE), timeout=60, max_memory_mb=256, converter=True)
+def iter_text_from_doc(doc_path):
+    """Yields lines of a DOC (Word 97-2003) file as catdoc writes them, under the doc extractor's limits."""
+    limits = get_extractor("doc")
+    for line_num, line in enumerate(iter_subprocess_lines(["catdoc", doc_path], limits.timeout, limits.max_memory_mb), start=1):
+        yield TextChunk(line, doc_path, "line", line_num)
+
+
+@register_extractor("txt", [".txt"])
+def iter_text_from_txt(txt_path):
+    """Yields blank-line separated blocks of a TXT file, splitting blocks longer than TXT_CHUNK_CHARS."""
+    with open(txt_path, "r", encoding="utf-8") as file:
+        block = []
+        block_size = 0
+        block_start = 1
+        for line_num, line in enumerate(file, start=1):
+            block.append(line)
+            block_size += len(line)
+            if not line.strip() or block_size >= TXT_CHUNK_CHARS:
+                yield TextChunk("".join(block), txt_path, "line", block_start)
+                block = []
+                block_size = 0
+                block_start = line_num + 1
+        if block:
+            yield TextChunk("".join(block), txt_path, "line", block_start)
+
+
+def _sniff_image(path, head):
+    if head.startswith(b"BM") and len(head) >= 18:
+        return int.from_bytes(head[14:18], "little") in BMP_DIB_HEADER_SIZES
+    return head.startswith(IMAGE_SIGNATURES)
+
+
+@register_extractor("image", IMAGE_EXTENSIONS, sniff=_sniff_image, page_unit="image")
+def iter_text_from_image(image_path, lang=None):
+    """Yields the OCR text of an image file."""
+    from PIL import Image  # Image processing
+    with Image.open(image_path) as original:
+        image = preprocess_for_ocr(original)
+        lang = _resolve_ocr_languages(lang, lambda: image)
+        with timed("ocr_image"):
+            image_text = _tesseract("image_to_string", image, lang=lang)
+        increment("reqube_ocr_pages_total", source="image")
+        yield TextChunk(image_text, image_path, "image", 1)
+
+
+@register_extractor("eml", [".eml"])
+def iter_text_from_eml(eml_path):
+    """Yields the headers of an email and then its body; attachments are listed by name only."""
+    from email import policy
+    from email.parser import BytesParser
+    with open(eml_path, "rb") as file:
+        message = BytesParser(policy=policy.default).parse(file)
+
+    headers = [f"{name}: {message[name]}" for name in ("Subject", "From", "To", "Cc", "Date") if message[name]]
+    attachments = [part.get_filename() for part in message.iter_attachments() if part.get_filename()]
+    if attachments:
+        headers.append(f"Attachments: {', '.join(attachments)}")
+    yield TextChunk("\n".join(headers) + "\n\n", eml_path, "part", 1)
+
+    # Prefer the plain text alternative; HTML-only messages are reduced to their text
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is None:
+        return
+    try:
+        content = body.get_content()
+    except (LookupError, UnicodeDecodeError):  # Unknown or wrong charset
+        content = body.get_payload(decode=True).decode("utf-8", errors="replace")
+    if body.get_content_subtype() == "html":
+        content = _html_to_text(content)
+    yield TextChunk(content.rstrip() + "\n", eml_path, "part", 2)
+
+
+def _html_to_text(html):
+    from html.parser import HTMLParser
+
+    class TextCollector(HTMLParser):
+        def __init__(self):
+            super().__init__()
+            self.pieces = []
+            self.skip_depth = 0
+
+        def handle_starttag(self, tag, attrs):
+            if tag in ("script", "style"):
+                self.skip_depth += 1
+            elif tag in ("br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4"):
+                self.pieces.append("\n")
+
+        def handle_endtag(self, tag):
+            if tag in ("script", "style") and self.skip_depth:
+                self.skip_depth -= 1
+
+        def handle_data(self, data):
+            if not self.skip_depth:
+                self.pieces.append(data)
+
+    collector = TextCollector()
+    collector.feed(html)
+    collector.close()
+    lines = (" ".join(line.split()) for line in "".join(collector.pieces).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@register_extractor("xlsx", [".xlsx"], sniff=zip_containing("xl/workbook.xml"), page_unit="sheet")
+def iter_text_from_xlsx(xlsx_path):
+    """Yields each worksheet's name followed by its non-empty rows as tab-separated lines."""
+    from ooxml_stream import iter_xlsx_blocks
+    for unit, position, text in iter_xlsx_blocks(xlsx_path):
+        yield TextChunk(f"## {text}\n" if unit == "sheet" else text + "\n", xlsx_path, unit, position)
+
+
+@register_extractor("pptx", [".pptx"], sniff=zip_containing("ppt/presentation.xml"), page_unit="slide")
+def iter_text_from_pptx(pptx_path):
+    """Yields the text of each slide in presentation order."""
+    from ooxml_stream import iter_pptx_slides
+    for number, text in iter_pptx_slides(pptx_path):
+        if text:
+            yield TextChunk(text + "\n" + PAGE_BREAK + "\n", pptx_path, "slide", number)
+
+
+def _join_chunks(file_path, chunks):
     try:
-        doc = docx.Document(docx_path)
-        text = "\n".join(para.text for para in doc.paragraphs)
-        return text
+        return "".join(chunk.text for chunk in chunks)
     except Exception as e:
-        logging.error(f"Error extracting text from {docx_path}: {e}")
+        logging.error(f"Error extracting text from {file_path}: {e}")
         return None
 
 
+def extract_text_from_pdf(pdf_path, lang=None, parallel=True):
+    """Extracts text from a PDF file using built-in extraction first, then OCR if needed."""
+    return _join_chunks(pdf_path, iter_text_from_pdf(pdf_path, lang, parallel))
+
+
+def extract_text_from_docx(docx_path):
+    """Extracts text from a DOCX file."""
+    return _join_chunks(docx_path, iter_text_from_docx(docx_path))
+
+
 def extract_text_from_doc(doc_path):
     """Extracts text from a DOC (Word 97-2003) file using catdoc."""
-    try:
-        result = subprocess.run(["catdoc", doc_path], capture_output=True, text=True)
-        return result.stdout
-    except Exception as e:
-        logging.error(f"Error extracting text from {doc_path}: {e}")
-        return None
+    return _join_chunks(doc_path, iter_text_from_doc(doc_path))
 
 
 def extract_text_from_txt(txt_path):
     """Extracts text from a TXT file."""
-    try:
-        with open(txt_path, "r", encoding="utf-8") as file:
-            return file.read()
-    except Exception as e:
-        logging.error(f"Error extracting text from {txt_path}: {e}")
-        return None
+    return _join_chunks(txt_path, iter_text_from_txt(txt_path))
 
 
-def extract_text_from_image(image_path, lang=OCR_LANGUAGES):
+def extract_text_from_image(image_path, lang=None):
     """Extracts text from an image file using OCR."""
-    try:
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image, lang=lang)
-        return text
-    except Exception as e:
-        logging.error(f"Error extracting text from {image_path}: {e}")
-        return None
+    return _join_chunks(image_path, iter_text_from_image(image_path, lang))
 
 
 def detect_language(text):
     """Detects the language of the extracted text."""
+    from langdetect import detect
+    from langdetect.detector_factory import init_factory
     try:
+        with _langdetect_lock:
+            init_factory()  # No-op once the profiles are loaded
         clean_text = " ".join(text.split())  # Remove extra whitespace
-        return detect(clean_text) if len(clean_text) > 10 else "unknown"
+        if len(clean_text) <= 10:
+            return "unknown"
+        with timed("language_detection"):
+            return detect(clean_text)
     except Exception as e:
         logging.error(f"Error detecting language: {e}")
         return "unknown"
 
 
-def extract_text(file_path):
-    """Determines file type and extracts text accordingly."""
+def extraction_settings(file_path):
+    """Returns the extractor settings that affect the output for a file, picking the extractor the way extraction does."""
+    extractor = detect_extractor(file_path)
+    return {
+        "extractor": extractor.name,
+        "max_pages": extractor.max_pages,
+        "ocr_languages": OCR_LANGUAGES,
+        "ocr_language_mode": OCR_LANGUAGE_MODE,
+        "ocr_dpi": OCR_DPI,
+        "ocr_preprocess": preprocess_settings(),
+        "docx_extractor": DOCX_EXTRACTOR,
+        "page_break": PAGE_BREAK,
+    }
+
+
+def extract_text(file_path, use_cache=True, content_hash=None):
+    """Determines file type and extracts text accordingly, reusing cached results for identical files.
+
+    content_hash is the SHA-256 of the file when the caller already knows it, so the file is not reread to key the cache.
+    """
     if not os.path.exists(file_path):
         logging.error(f"File not found: {file_path}")
         return None
@@ -99,22 +497,51 @@ def extract_text(file_path):
     _, file_extension = os.path.splitext(file_path)
     file_extension = file_extension.lower()
 
-    text = None
-    if file_extension == ".pdf":
-        text = extract_text_from_pdf(file_path)
-    elif file_extension == ".docx":
-        text = extract_text_from_docx(file_path)
-    elif file_extension == ".doc":
-        text = extract_text_from_doc(file_path)
-    elif file_extension == ".txt":
-        text = extract_text_from_txt(file_path)
-    elif file_extension in [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]:
-        text = extract_text_from_image(file_path)
-    else:
-        logging.error("Unsupported file format.")
+    cache = get_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = make_key(content_hash or hash_file(file_path), extraction_settings(file_path))
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                logging.info(f"Extraction cache hit for {file_path}")
+                return cached_text
+        except Exception as e:
+            logging.error(f"Extraction cache lookup failed for {file_path}: {e}")
+            cache_key = None
+
+    with timed("extract"):
+        text = _extract_text_uncached(file_path, file_extension)
+
+    if text and cache_key is not None:
+        try:
+            cache.put(cache_key, text)
+        except Exception as e:
+            logging.error(f"Extraction cache store failed for {file_path}: {e}")
+
+    return text
+
+
+def iter_text(file_path):
+    """Yields TextChunk pieces of a document in reading order without holding the whole text in memory.
+
+    The extractor is picked by sniffing the file's content and runs under its registered limits.
+    """
+    yield from iter_with_limits(detect_extractor(file_path), file_path)
+
+
+def _extract_text_uncached(file_path, file_extension):
+    """Joins the streamed chunks of a document into one string."""
+    try:
+        text = "".join(chunk.text for chunk in iter_text(file_path))
+    except (ValueError, TimeoutError) as e:
+        logging.error(str(e))
+        return None
+    except Exception as e:
+        logging.error(f"Error extracting text from {file_path}: {e}")
         return None
 
-    if text and file_extension not in [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]:
+    if text and file_extension not in IMAGE_EXTENSIONS:
         detected_lang = detect_language(text)
         logging.info(f"Detected Language: {detected_lang}")
 
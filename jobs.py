@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Durable job table and worker pool size
+JOBS_DB_PATH = os.getenv("REQUBE_JOBS_DB_PATH", os.path.join("cache", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("REQUBE_JOB_WORKERS", "4"))
+# Finished jobs are purged after this many seconds
+JOB_RETENTION_SECONDS = int(os.getenv("REQUBE_JOB_RETENTION_SECONDS", str(24 * 60 * 60)))
+# Every process refreshes the heartbeat of the jobs it owns this often; queued and running jobs whose
+# heartbeat is older than JOB_STALE_SECONDS, or whose owner process on this host has exited, are failed
+JOB_HEARTBEAT_SECONDS = float(os.getenv("REQUBE_JOB_HEARTBEAT_SECONDS", "15"))
+JOB_STALE_SECONDS = float(os.getenv("REQUBE_JOB_STALE_SECONDS", "120"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _owner_alive(owner):
+    """False when owner ("host:pid:nonce") is a process on this host that no longer exists."""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return True  # Only its heartbeat can tell
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # Exists but belongs to another user
+    return True
+
+
+class JobQueue:
+    """Runs jobs on a thread pool and records their status, stage and result in SQLite.
+
+    Several processes may share the database; each owns the jobs it queued and keeps them alive with
+    a heartbeat, so a process starting up or sweeping only fails jobs whose owner is gone.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH, workers=JOB_WORKERS):
+        self.path = path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " progress TEXT,"
+            " owner TEXT NOT NULL,"
+            " heartbeat_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._fail_orphaned_jobs()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reqube-job")
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="reqube-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def submit(self, kind, func, *args):
+        """Queues func(report_stage, *args) and returns the new job id.
+
+        func reports progress by calling report_stage(stage), or report_stage(stage, progress) with a
+        JSON-serializable progress snapshot (e.g. per-file states), and returns a JSON-serializable result.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, created_at, updated_at, owner, heartbeat_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, QUEUED, now, now, self.owner, now),
+            )
+            self._conn.commit()
+        self._executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    def get(self, job_id):
+        """Returns the job as a dict, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, stage, result, error, created_at, updated_at, progress FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+            "progress": json.loads(row[8]) if row[8] else None,
+        }
+
+    def _run(self, job_id, func, args):
+        self._update(job_id, status=RUNNING)
+        try:
+            result = func(lambda stage, progress=None: self._report(job_id, stage, progress), *args)
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}")
+            self._update(job_id, status=FAILED, error=str(e))
+            return
+        if isinstance(result, dict) and "error" in result:
+            self._update(job_id, status=FAILED, error=result["error"])
+        else:
+            self._update(job_id, status=DONE, stage=DONE, result=json.dumps(result))
+
+    def _report(self, job_id, stage, progress):
+        if progress is None:
+            self._update(job_id, stage=stage)
+        else:
+            self._update(job_id, stage=stage, progress=json.dumps(progress))
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                        (time.time(), self.owner, QUEUED, RUNNING),
+                    )
+                    self._conn.commit()
+                self._fail_orphaned_jobs()
+            except sqlite3.Error as e:
+                logging.error(f"Job heartbeat failed: {e}")
+
+    def _fail_orphaned_jobs(self):
+        """Fails other owners' queued and running jobs that can no longer finish."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, heartbeat_at FROM jobs WHERE status IN (?, ?) AND owner != ?",
+                (QUEUED, RUNNING, self.owner),
+            ).fetchall()
+            orphaned = [job_id for job_id, owner, heartbeat in rows if heartbeat < now - JOB_STALE_SECONDS or not _owner_alive(owner)]
+            for job_id in orphaned:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                    (FAILED, "Interrupted by a server restart.", now, job_id, QUEUED, RUNNING),
+                )
+            self._conn.commit()
+        if orphaned:
+            logging.warning(f"Failed {len(orphaned)} jobs whose server process is gone")
+
+    def _purge(self, now):
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (DONE, FAILED, now - JOB_RETENTION_SECONDS),
+        )
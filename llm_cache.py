@@ -0,0 +1,130 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from metrics import increment
+
+# In-memory tier size, entry lifetime and optional on-disk tier for cached LLM responses
+LLM_CACHE_ENABLED = os.getenv("REQUBE_LLM_CACHE", "1") != "0"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("REQUBE_LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("REQUBE_LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+LLM_CACHE_PATH = os.getenv("REQUBE_LLM_CACHE_PATH", "")
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so prompts that differ only in formatting share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def make_key(model, prompt):
+    """Returns the cache key for a model name and prompt."""
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier LLM response cache: an in-memory LRU in front of an optional SQLite file, both with a TTL."""
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL_SECONDS, path=LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, model, prompt):
+        """Returns the cached response text, or None on a miss or expired entry."""
+        key = make_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    increment("reqube_cache_hits_total", cache="llm")
+                    return response
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    increment("reqube_cache_hits_total", cache="llm")
+                    return row[0]
+
+            self.misses += 1
+            increment("reqube_cache_misses_total", cache="llm")
+            return None
+
+    def put(self, model, prompt, response):
+        """Caches a response text for the model and prompt."""
+        key = make_key(model, prompt)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                        (key, response, expires_at),
+                    )
+                    self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"Could not write LLM cache entry: {e}")
+
+    def _remember(self, key, response, expires_at):
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached response from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the in-memory entry count."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Returns the process-wide LLM response cache, or None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = LLMCache()
+            except sqlite3.Error as e:
+                logging.error(f"Could not open LLM cache at {LLM_CACHE_PATH}, using memory only: {e}")
+                _cache = LLMCache(path="")
+        return _cache
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+# Set REQUBE_METRICS=0 to turn recording off; timed() and increment() then cost a function call
+METRICS_ENABLED = os.getenv("REQUBE_METRICS", "1") != "0"
+# Set REQUBE_TIMING_LOG=1 to log one JSON line with the stage timings of every request and job
+TIMING_LOG = os.getenv("REQUBE_TIMING_LOG", "0") == "1"
+
+STAGE_HISTOGRAM = "reqube_stage_seconds"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    STAGE_HISTOGRAM: "Time spent per processing stage.",
+    "reqube_ocr_pages_total": "PDF pages and images run through OCR.",
+    "reqube_cache_hits_total": "Cache lookups answered from the cache.",
+    "reqube_cache_misses_total": "Cache lookups that missed.",
+    "reqube_llm_errors_total": "Failed Gemini calls, including attempts that were retried.",
+    "reqube_analysis_repairs_total": "Analysis fields re-requested because the response lacked them or was cut off.",
+    "reqube_prompt_tokens_raw_total": "Estimated tokens of document text before normalization and budgeting.",
+    "reqube_prompt_tokens_sent_total": "Estimated tokens of document text sent to Gemini after normalization and budgeting.",
+}
+
+_NULL_TIMER = nullcontext()
+# Stage timings of the request or job running in the current context, when TIMING_LOG is on
+_scope_timings = contextvars.ContextVar("reqube_scope_timings", default=None)
+# Metric updates of an extraction worker process, queued for its parent to record; None elsewhere
+_forwarded = None
+
+
+class Registry:
+    """Thread-safe counters and fixed-bucket histograms rendered in the Prometheus text format."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self._histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (counts, total, count) in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+def increment(name, amount=1, **labels):
+    """Adds amount to a counter."""
+    if _forwarded is not None:
+        _forwarded.append(("counter", name, amount, labels))
+    elif METRICS_ENABLED:
+        registry.increment(name, amount, **labels)
+
+
+def observe_stage(stage, seconds):
+    """Records the duration of one stage run, in the histogram and in the current timing scope."""
+    if _forwarded is not None:
+        _forwarded.append(("stage", stage, seconds, {}))
+        return
+    if METRICS_ENABLED:
+        registry.observe(STAGE_HISTOGRAM, seconds, stage=stage)
+    timings = _scope_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def forward_metrics():
+    """Queues this process's metric updates for take_forwarded_metrics() instead of recording them."""
+    global _forwarded
+    _forwarded = []
+
+
+def take_forwarded_metrics():
+    """Returns and clears the metric updates queued since the last call."""
+    global _forwarded
+    updates, _forwarded = _forwarded, []
+    return updates
+
+
+def replay_metrics(updates):
+    """Records metric updates forwarded by a worker process as if they happened here."""
+    for kind, name, value, labels in updates:
+        if kind == "stage":
+            observe_stage(name, value)
+        else:
+            increment(name, value, **labels)
+
+
+@contextmanager
+def _stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Context manager that records how long its block took under the given stage name."""
+    if not METRICS_ENABLED and not TIMING_LOG:
+        return _NULL_TIMER
+    return _stage_timer(stage)
+
+
+def start_timing_scope():
+    """Starts collecting stage timings for the current request or job; returns a token for end_timing_scope."""
+    if not TIMING_LOG:
+        return None
+    timings = {}
+    return timings, _scope_timings.set(timings), time.perf_counter()
+
+
+def end_timing_scope(token, scope, **fields):
+    """Logs one JSON line with the total time and per-stage times collected since start_timing_scope."""
+    if token is None:
+        return
+    timings, context_token, started = token
+    try:
+        _scope_timings.reset(context_token)
+    except ValueError:
+        _scope_timings.set(None)  # Ended from another context, e.g. after a streamed response
+    record = {
+        "scope": scope,
+        **fields,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+    }
+    logging.info(f"timing {json.dumps(record)}")
+
+
+def render_metrics():
+    """Returns the Prometheus text for the /metrics endpoint."""
+    return registry.render()
@@ -0,0 +1,151 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from chunking import CHARS_PER_TOKEN, estimate_tokens
+from metrics import increment, timed
+
+# Set REQUBE_NORMALIZE_TEXT=0 to send extracted text to Gemini as it is (the token budgets still apply)
+NORMALIZE_ENABLED = os.getenv("REQUBE_NORMALIZE_TEXT", "1") != "0"
+
+# Extractors end every PDF page with this, so headers and footers can be recognized per page
+PAGE_BREAK = "\f"
+
+# A line at the top or bottom of a page is a running header or footer when it recurs at the edges of
+# at least this many pages and this share of all pages; page numbers are compared with digits ignored
+HEADER_FOOTER_MIN_PAGES = 3
+HEADER_FOOTER_PAGE_SHARE = 0.5
+HEADER_FOOTER_EDGE_LINES = 2
+HEADER_FOOTER_MAX_CHARS = 120
+
+# Repeated paragraphs shorter than this are kept, since short table cells legitimately repeat
+DUPLICATE_BLOCK_MIN_CHARS = 40
+
+_INVISIBLE = re.compile("[\u00ad\u200b-\u200d\u2060\ufeff]")
+_ODD_SPACES = re.compile("[\u00a0\u2000-\u200a\u202f\u205f\u3000]")
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f]")
+_DIGITS = re.compile(r"\d+")
+_PAGE_WORD = re.compile(r"\b(page|p\.|pg\.?)\s*\d", re.IGNORECASE)
+# A bare page number, optionally decorated or out of a total: "3", "- 3 -", "[3]", "3/9", "3 of 9"
+_PAGE_NUMBER = re.compile(r"^[^\w\n]{0,3}\d{1,4}(?:\s*(?:/|of)\s*\d{1,4})?[^\w\n]{0,3}$", re.IGNORECASE)
+# "require-\nments" -> "requirements"; capitalized continuations such as "Non-\nFunctional" keep their hyphen
+_HYPHEN_BREAK = re.compile(r"(\w)-[ \t]*\n[ \t]*([a-z])")
+_SPACE_RUN = re.compile(r" {2,}")
+_TAB_PADDING = re.compile(r" *\t[ \t]*")
+_BLANK_RUN = re.compile(r"\n{3,}")
+# OCR specks and rules: lines without a single letter or digit, other than the [...] that marks omitted passages
+_NOISE_LINE = re.compile(r"^(?!\[\.\.\.\]$)[^\w\n]+$", re.MULTILINE)
+
+
+def _line_key(line):
+    """Compares lines case- and spacing-insensitively, and page numbers ("Page 3 of 9", "- 3 -") regardless of the number.
+
+    Other lines keep their digits, so numeric table rows at page edges are not taken for page numbers.
+    """
+    key = " ".join(line.lower().split())
+    if _PAGE_NUMBER.match(key) or _PAGE_WORD.search(key):
+        return _DIGITS.sub("#", key)
+    return key
+
+
+def _edge_lines(lines):
+    """Indexes of the first and last few non-empty lines of a page."""
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    return filled[:HEADER_FOOTER_EDGE_LINES], filled[-HEADER_FOOTER_EDGE_LINES:]
+
+
+def _strip_edges(lines, top, bottom, boilerplate):
+    """Drops boilerplate lines from the top and bottom of a page, stopping at the first line that is not."""
+    dropped = set()
+    for edge in (top, reversed(bottom)):
+        for index in edge:
+            if _line_key(lines[index]) not in boilerplate:
+                break
+            dropped.add(index)
+    return "\n".join(line for index, line in enumerate(lines) if index not in dropped)
+
+
+def strip_headers_footers(pages):
+    """Removes lines that repeat at the top or bottom of most pages, such as running titles and page numbers."""
+    if len(pages) < HEADER_FOOTER_MIN_PAGES:
+        return pages
+
+    page_lines = [page.split("\n") for page in pages]
+    edges = [_edge_lines(lines) for lines in page_lines]
+    counts = {}
+    for lines, (top, bottom) in zip(page_lines, edges):
+        keys = {_line_key(lines[index]) for index in top + bottom if len(lines[index].strip()) <= HEADER_FOOTER_MAX_CHARS}
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+
+    threshold = max(HEADER_FOOTER_MIN_PAGES, HEADER_FOOTER_PAGE_SHARE * len(pages))
+    boilerplate = {key for key, count in counts.items() if count >= threshold}
+    if not boilerplate:
+        return pages
+    return [_strip_edges(lines, top, bottom, boilerplate) for lines, (top, bottom) in zip(page_lines, edges)]
+
+
+def _dedupe_blocks(text):
+    seen = set()
+    blocks = []
+    for block in text.split("\n\n"):
+        key = " ".join(block.lower().split())
+        if len(key) >= DUPLICATE_BLOCK_MIN_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        blocks.append(block)
+    return "\n\n".join(blocks)
+
+
+def normalize_text(text):
+    """Cleans extracted text before it goes into a prompt.
+
+    Drops invisible and control characters, running headers and footers, hyphenation at line ends,
+    lines of pure OCR noise, runs of spaces and blank lines, and paragraphs that repeat verbatim.
+    Single tabs are kept, since DOCX and XLSX tables come out as tab-separated rows.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL.sub("", _ODD_SPACES.sub(" ", _INVISIBLE.sub("", text)))
+    pages = strip_headers_footers(text.split(PAGE_BREAK))
+    text = "\n\n".join(page.strip("\n") for page in pages)
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    text = _NOISE_LINE.sub("", text)
+    text = "\n".join(_TAB_PADDING.sub("\t", _SPACE_RUN.sub(" ", line)).strip(" ") for line in text.split("\n"))
+    text = _BLANK_RUN.sub("\n\n", text)
+    return _dedupe_blocks(text).strip()
+
+
+@lru_cache(maxsize=16)
+def normalized_document(text):
+    """normalize_text(text), or text as it is when normalization is off; memoized, since every chat message needs it."""
+    return normalize_text(text) if NORMALIZE_ENABLED else text
+
+
+def fit_token_budget(text, max_tokens):
+    """Cuts text down to about max_tokens, at a paragraph break where possible, and says what was left out."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind("\n\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    omitted = estimate_tokens(text[cut:])
+    return text[:cut].rstrip() + f"\n\n[... {omitted} more tokens of the document were left out to fit the prompt budget ...]"
+
+
+def compact_for_prompt(text, max_tokens, purpose):
+    """Normalizes text and fits it into max_tokens for a prompt, logging and counting the tokens saved."""
+    before = estimate_tokens(text)
+    with timed("normalize"):
+        compacted = normalize_text(text) if NORMALIZE_ENABLED else text
+        if estimate_tokens(compacted) > max_tokens:
+            logging.warning(f"Text for {purpose} exceeds the budget of {max_tokens} tokens and was cut")
+            compacted = fit_token_budget(compacted, max_tokens)
+    after = estimate_tokens(compacted)
+
+    increment("reqube_prompt_tokens_raw_total", before, purpose=purpose)
+    increment("reqube_prompt_tokens_sent_total", after, purpose=purpose)
+    if before:
+        logging.info(f"Prompt text for {purpose}: {before} -> {after} estimated tokens ({(before - after) / before:.0%} saved)")
+    return compacted
@@ -0,0 +1,141 @@
+import os
+import numpy as np
+
+# PyMuPDF and PIL are imported inside the functions so importing this module stays cheap
+
+# Set to 0 to OCR pages and images exactly as they are rendered or uploaded
+OCR_PREPROCESS = os.getenv("REQUBE_OCR_PREPROCESS", "1") != "0"
+
+# Scanned pages are rasterized at their native scan resolution, clamped to this range
+OCR_MIN_DPI = int(os.getenv("REQUBE_OCR_MIN_DPI", "150"))
+OCR_MAX_DPI = int(os.getenv("REQUBE_OCR_MAX_DPI", "300"))
+
+# Upper bound on the pixels of a page or photo handed to Tesseract (about an A4 page at 300 DPI)
+OCR_MAX_PIXELS = int(os.getenv("REQUBE_OCR_MAX_PIXELS", str(9 * 1000 * 1000)))
+
+# Skew is searched for within +/- DESKEW_MAX_ANGLE degrees on a reduced copy of the page,
+# first in whole degrees and then in DESKEW_STEP steps around the best coarse angle
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.25
+DESKEW_MIN_ANGLE = 0.3
+DESKEW_PROBE_SIDE = 1000
+
+
+def _native_scan_dpi(page):
+    """Returns the resolution of the largest image drawn on the page, or None when it has no images."""
+    import fitz  # PyMuPDF for PDFs
+    best_area, best_dpi = 0, None
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        if bbox.is_empty or not info.get("width"):
+            continue
+        area = bbox.width * bbox.height
+        if area > best_area:
+            best_area, best_dpi = area, info["width"] / (bbox.width / 72)
+    return best_dpi
+
+
+def choose_ocr_dpi(page, default_dpi):
+    """Picks the rasterization DPI for a text-less PDF page.
+
+    Pages that carry a scan are rendered at the scan's own resolution (clamped to OCR_MIN_DPI..OCR_MAX_DPI),
+    since rendering above it only adds interpolated pixels; other pages use default_dpi. Large pages are
+    then capped so the bitmap stays under OCR_MAX_PIXELS.
+    """
+    native_dpi = _native_scan_dpi(page)
+    dpi = min(max(native_dpi, OCR_MIN_DPI), OCR_MAX_DPI) if native_dpi else default_dpi
+    page_square_inches = page.rect.width * page.rect.height / (72 * 72)
+    if page_square_inches > 0:
+        dpi = min(dpi, (OCR_MAX_PIXELS / page_square_inches) ** 0.5)
+    return dpi
+
+
+def render_page_for_ocr(page, default_dpi):
+    """Rasterizes a text-less PDF page straight to grayscale at choose_ocr_dpi and preprocesses it for Tesseract."""
+    import fitz  # PyMuPDF for PDFs
+    from PIL import Image
+    zoom = choose_ocr_dpi(page, default_dpi) / 72
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    # A view over the pixmap's own buffer; only valid while pixmap is alive, so it never leaves this function
+    view = Image.frombuffer("L", (pixmap.width, pixmap.height), pixmap.samples_mv, "raw", "L", pixmap.stride, 1)
+    image = preprocess_for_ocr(view) if OCR_PREPROCESS else view.copy()
+    del view  # Release the buffer export before the pixmap is freed
+    return image
+
+
+def downscale(image, max_pixels=OCR_MAX_PIXELS):
+    """Shrinks an image so it has at most max_pixels pixels, keeping its aspect ratio."""
+    pixels = image.width * image.height
+    if pixels <= max_pixels:
+        return image
+    from PIL import Image
+    scale = (max_pixels / pixels) ** 0.5
+    return image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.LANCZOS)
+
+
+def otsu_threshold(image):
+    """Returns the gray level that best separates ink from background in a grayscale image."""
+    histogram = np.array(image.histogram()[:256], dtype=np.float64)
+    levels = np.arange(256)
+    weight_background = np.cumsum(histogram)
+    weight_foreground = weight_background[-1] - weight_background
+    cumulative_mean = np.cumsum(histogram * levels)
+    mean_background = cumulative_mean / np.maximum(weight_background, 1)
+    mean_foreground = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_foreground, 1)
+    between_variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    return int(np.argmax(between_variance))
+
+
+def binarize(image):
+    """Thresholds a grayscale image to black text on white with Otsu's method."""
+    threshold = otsu_threshold(image)
+    return image.point([0] * (threshold + 1) + [255] * (255 - threshold))
+
+
+def estimate_skew(binary):
+    """Returns the rotation in degrees that makes the text lines of a binarized image horizontal.
+
+    Text lines give the sharpest row-projection profile when they are level, so the angle with the
+    highest profile variance wins.
+    """
+    from PIL import Image
+    probe = binary
+    if max(binary.size) > DESKEW_PROBE_SIDE:
+        probe = binary.copy()
+        probe.thumbnail((DESKEW_PROBE_SIDE, DESKEW_PROBE_SIDE))
+
+    def profile_variance(angle):
+        rotated = probe.rotate(angle, resample=Image.NEAREST, fillcolor=255)
+        return float(np.var((np.asarray(rotated) < 128).sum(axis=1)))
+
+    coarse = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + 0.5, 1.0)
+    best_angle = max(coarse, key=profile_variance)
+    fine = np.arange(best_angle - 1 + DESKEW_STEP, best_angle + 1, DESKEW_STEP)
+    return float(max(fine, key=profile_variance))
+
+
+def deskew(binary):
+    from PIL import Image
+    angle = estimate_skew(binary)
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return binary
+    return binary.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+
+def preprocess_for_ocr(image):
+    """Converts an image or rendered page to a downscaled, binarized and deskewed grayscale image for Tesseract."""
+    if not OCR_PREPROCESS:
+        return image
+    if image.mode != "L":
+        image = image.convert("L")
+    return deskew(binarize(downscale(image)))
+
+
+def preprocess_settings():
+    """Returns the preprocessing settings that affect OCR output, for cache keys."""
+    return {
+        "enabled": OCR_PREPROCESS,
+        "min_dpi": OCR_MIN_DPI,
+        "max_dpi": OCR_MAX_DPI,
+        "max_pixels": OCR_MAX_PIXELS,
+    }
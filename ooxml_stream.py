@@ -0,0 +1,176 @@
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+# Reads XLSX and PPTX text straight from their XML parts with iterparse, the same way docx_stream.py
+# reads DOCX: elements are detached as soon as they end, so only the open path stays in memory.
+
+SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+DRAWING = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+PRESENTATION = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+RELATIONSHIP_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+PACKAGE_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+# Most empty columns filled in between two cells of a row, so a stray far-off cell cannot blow up the line
+MAX_COLUMN_GAP = 50
+
+_CELL_COLUMN = re.compile(r"^([A-Z]+)")
+
+
+def _iterparse_detached(stream):
+    """iterparse that detaches every element from its parent once it has ended."""
+    path = []
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            path.append(element)
+            continue
+        path.pop()
+        yield element
+        if path:
+            path[-1].remove(element)
+
+
+def _relationship_targets(archive, part):
+    """Returns {relationship id: part name} from the relationships of a package part."""
+    directory, name = posixpath.split(part)
+    rels_part = posixpath.join(directory, "_rels", name + ".rels")
+    targets = {}
+    with archive.open(rels_part) as stream:
+        for element in _iterparse_detached(stream):
+            if element.tag == PACKAGE_RELATIONSHIP and element.get("TargetMode") != "External":
+                target = element.get("Target", "")
+                targets[element.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(directory, target))
+    return targets
+
+
+def _ordered_parts(archive, part, item_tag, names=False):
+    """Returns the parts a workbook or presentation lists through item_tag, in its order.
+
+    With names=True each entry is (name attribute, part name).
+    """
+    targets = _relationship_targets(archive, part)
+    parts = []
+    with archive.open(part) as stream:
+        for element in _iterparse_detached(stream):
+            if element.tag == item_tag and element.get(RELATIONSHIP_ID) in targets:
+                target = targets[element.get(RELATIONSHIP_ID)]
+                parts.append((element.get("name", ""), target) if names else target)
+    return parts
+
+
+def _column_index(reference):
+    match = _CELL_COLUMN.match(reference or "")
+    if not match:
+        return None
+    index = 0
+    for letter in match.group(1):
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+def _shared_strings(archive):
+    """Loads the workbook's shared string table; phonetic guide runs are left out."""
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    pieces = []
+    phonetic_depth = 0
+    root = None
+    with archive.open("xl/sharedStrings.xml") as stream:
+        for event, element in ET.iterparse(stream, events=("start", "end")):
+            if root is None:
+                root = element
+            if element.tag == SHEET + "rPh":
+                phonetic_depth += 1 if event == "start" else -1
+            elif event == "end" and element.tag == SHEET + "t" and not phonetic_depth:
+                pieces.append(element.text or "")
+            elif event == "end" and element.tag == SHEET + "si":
+                strings.append("".join(pieces))
+                pieces = []
+                root.remove(element)
+    return strings
+
+
+def _iter_sheet_rows(stream, strings):
+    """Yields the tab-separated cell values of each non-empty row of a worksheet part."""
+    cells = []  # (column, value) of the open row
+    value = None
+    inline = []
+    for element in _iterparse_detached(stream):
+        tag = element.tag
+        if tag == SHEET + "v":
+            value = element.text or ""
+        elif tag == SHEET + "t":
+            inline.append(element.text or "")
+        elif tag == SHEET + "c":
+            cell_type = element.get("t")
+            if cell_type == "inlineStr":
+                text = "".join(inline)
+            elif cell_type == "s" and value is not None and value.isdigit() and int(value) < len(strings):
+                text = strings[int(value)]
+            elif cell_type == "b" and value is not None:
+                text = "TRUE" if value == "1" else "FALSE"
+            else:
+                text = value or ""
+            if text:
+                cells.append((_column_index(element.get("r")), text.replace("\t", " ").replace("\n", " ")))
+            value = None
+            inline = []
+        elif tag == SHEET + "row":
+            if cells:
+                yield _join_cells(cells)
+            cells = []
+
+
+def _join_cells(cells):
+    values = []
+    previous = 0
+    for column, text in cells:
+        if column is not None and previous and column - previous > 1:
+            values.extend([""] * min(column - previous - 1, MAX_COLUMN_GAP))
+        values.append(text)
+        previous = column or previous + 1
+    return "\t".join(values)
+
+
+def iter_xlsx_blocks(xlsx_path):
+    """Yields ("sheet", position, name) before each worksheet and ("row", position, text) for its non-empty rows.
+
+    Sheets come in workbook order and rows read as tab-separated values, with short gaps between cells
+    kept as empty columns. Cells show their cached values, so formulas appear as their last result.
+    """
+    position = 0
+    with zipfile.ZipFile(xlsx_path) as archive:
+        strings = _shared_strings(archive)
+        for name, part in _ordered_parts(archive, "xl/workbook.xml", SHEET + "sheet", names=True):
+            if part not in archive.namelist():
+                continue
+            position += 1
+            yield "sheet", position, name
+            with archive.open(part) as stream:
+                for text in _iter_sheet_rows(stream, strings):
+                    position += 1
+                    yield "row", position, text
+
+
+def iter_pptx_slides(pptx_path):
+    """Yields (slide number, text) for every slide in presentation order, one line per text paragraph."""
+    with zipfile.ZipFile(pptx_path) as archive:
+        parts = _ordered_parts(archive, "ppt/presentation.xml", PRESENTATION + "sldId")
+        for number, part in enumerate(parts, start=1):
+            if part not in archive.namelist():
+                continue
+            lines = []
+            pieces = []
+            with archive.open(part) as stream:
+                for element in _iterparse_detached(stream):
+                    if element.tag == DRAWING + "t":
+                        pieces.append(element.text or "")
+                    elif element.tag == DRAWING + "br":
+                        pieces.append("\n")
+                    elif element.tag == DRAWING + "p":
+                        if pieces:
+                            lines.append("".join(pieces))
+                        pieces = []
+            yield number, "\n".join(lines)
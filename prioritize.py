@@ -1,6 +1,31 @@
 import json
 import requests  # For making API calls
 import os  # For environment variables
+import re
+from concurrent.futures import ThreadPoolExecutor
+from gemini_client import get_gemini_client
+from classifier import get_classifier
+from llm_cache import get_llm_cache
+from rule_engine import RuleEngine, load_rule_sets
+from metrics import timed
+
+GEMINI_PRIORITY_MODEL = "gemini-pro"
+
+# ✅ Unmatched requirements go to Gemini in size-bounded batches, a few at a time
+GEMINI_PRIORITY_BATCH_SIZE = int(os.getenv("REQUBE_PRIORITY_BATCH_SIZE", "25"))
+GEMINI_PRIORITY_BATCH_CHARS = int(os.getenv("REQUBE_PRIORITY_BATCH_CHARS", "6000"))
+GEMINI_PRIORITY_CONCURRENCY = int(os.getenv("REQUBE_PRIORITY_CONCURRENCY", "4"))
+GEMINI_PRIORITY_TIMEOUT_SECONDS = float(os.getenv("REQUBE_PRIORITY_TIMEOUT_SECONDS", "10"))
+# ✅ Extra rounds for batches whose answer was unusable or incomplete; failed requests are not
+# ✅ retried here, since the Gemini client already retries them with backoff
+GEMINI_PRIORITY_RETRY_ROUNDS = int(os.getenv("REQUBE_PRIORITY_RETRY_ROUNDS", "2"))
+
+# ✅ Per-requirement priorities are cached under this model name
+PRIORITY_CACHE_MODEL = f"{GEMINI_PRIORITY_MODEL}/requirement-priority"
+
+MOSCOW_PRIORITIES = ["Must Have", "Should Have", "Could Have", "Won't Have"]
+
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
 
 # ✅ Define priority rules
 PRIORITY_RULES = {
@@ -10,39 +35,55 @@ PRIORITY_RULES = {
     "Won't Have": ["optional", "future", "later"]
 }
 
-# ✅ Function to assign priority based on keywords
-def assign_priority(description):
-    description = description.lower()
-    for priority, keywords in PRIORITY_RULES.items():
-        if any(keyword in description for keyword in keywords):
-            return priority
-    return None  # Return None so that Gemini API can handle it later
+# ✅ Keywords that decide the requirement category, checked in order
+CATEGORY_RULES = {
+    "Functional": ["upload", "manage", "validate", "store"],
+    "Non-Functional": ["real-time", "performance", "scalability", "security"]
+}
 
-# ✅ Function to categorize functional vs non-functional requirements
-def categorize_requirements(description):
-    functional_keywords = ["upload", "manage", "validate", "store"]
-    non_functional_keywords = ["real-time", "performance", "scalability", "security"]
-    
-    description_lower = description.lower()
-    
-    if any(keyword in description_lower for keyword in functional_keywords):
-        return "Functional"
-    elif any(keyword in description_lower for keyword in non_functional_keywords):
-        return "Non-Functional"
-    else:
-        return "Uncategorized"
+# ✅ Optional JSON file replacing the built-in rules: {"priority": {...}, "category": {...}}
+RULES_PATH = os.getenv("REQUBE_RULES_PATH", "")
 
-# ✅ Function to get AI-based prioritization from Gemini
-def get_priority_from_gemini(requirements_list):
-    API_URL = "https://generativelanguage.googleapis.com/v1/models/gemini-pro:generateContent"
-    API_KEY = os.getenv("GEMINI_API_KEY")  # Use environment variable
+_rule_engine = None
 
-    if not API_KEY:
-        print("❌ Error: Gemini API key not found! Set GEMINI_API_KEY in environment variables.")
-        return []
+# ✅ Compile the rule tables once into a single keyword automaton
+def get_rule_engine():
+    global _rule_engine
+    if _rule_engine is None:
+        rule_sets = {"priority": PRIORITY_RULES, "category": CATEGORY_RULES}
+        if RULES_PATH:
+            rule_sets.update(load_rule_sets(RULES_PATH))
+        _rule_engine = RuleEngine(rule_sets)
+    return _rule_engine
 
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+# ✅ Function to assign priority based on keywords
+def assign_priority(description):
+    # Return None so that Gemini API can handle it later
+    return get_rule_engine().classify(description)["priority"]
 
+# ✅ Function to categorize functional vs non-functional requirements
+def categorize_requirements(description):
+    return get_rule_engine().classify(description)["category"] or "Uncategorized"
+
+# ✅ Function to split requirements into batches bounded by item count and prompt size
+def batch_requirements(requirements_list, max_items=GEMINI_PRIORITY_BATCH_SIZE, max_chars=GEMINI_PRIORITY_BATCH_CHARS):
+    batches = []
+    current = []
+    current_chars = 0
+    for req in requirements_list:
+        req_chars = len(str(req["ID"])) + len(req["Requirement"]) + 3
+        if current and (len(current) >= max_items or current_chars + req_chars > max_chars):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(req)
+        current_chars += req_chars
+    if current:
+        batches.append(current)
+    return batches
+
+# ✅ Function to ask Gemini for the priorities of one batch; raises on any failure
+def request_batch_priorities(batch):
     prompt = (
         "You are an experienced Project Manager. Analyze the following software requirements "
         "and prioritize them using the MOSCOW method (Must Have, Should Have, Could Have, Won't Have). "
@@ -53,24 +94,79 @@ def get_priority_from_gemini(requirements_list):
     )
 
     # Prepare the input for Gemini API
-    input_text = "\n".join([f"{req['ID']}: {req['Requirement']}" for req in requirements_list])
+    input_text = "\n".join([f"{req['ID']}: {req['Requirement']}" for req in batch])
 
-    payload = {
-        "contents": [{"parts": [{"text": prompt + "\n\n" + input_text}]}]
+    gemini_priorities = get_gemini_client().generate_text(
+        GEMINI_PRIORITY_MODEL, prompt + "\n\n" + input_text, timeout=GEMINI_PRIORITY_TIMEOUT_SECONDS
+    ) or "{}"
+    priorities = json.loads(CODE_FENCE.sub("", gemini_priorities))  # Convert API text response into dictionary
+    if not isinstance(priorities, dict):
+        raise ValueError("Gemini did not return a JSON object")
+
+    return {
+        str(req_id): priority for req_id, priority in priorities.items() if priority in MOSCOW_PRIORITIES
     }
 
-    try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()  # Raises HTTP errors if any
-        response_data = response.json()
-        
-        # Extract the prioritized data from API response
-        gemini_priorities = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "{}")
-        return json.loads(gemini_priorities)  # Convert API text response into dictionary
-
-    except requests.exceptions.RequestException as e:
-        print(f"❌ API request failed: {e}")
-        return {}
+# ✅ Function to get AI-based prioritization from Gemini
+def get_priority_from_gemini(requirements_list, use_cache=True):
+    API_KEY = os.getenv("GEMINI_API_KEY")  # Use environment variable
+
+    if not API_KEY:
+        print("❌ Error: Gemini API key not found! Set GEMINI_API_KEY in environment variables.")
+        return []
+
+    priorities = {}
+
+    # Recurring requirements are answered from the cache and never re-sent
+    cache = get_llm_cache() if use_cache else None
+    pending = []
+    for req in requirements_list:
+        cached_priority = cache.get(PRIORITY_CACHE_MODEL, req["Requirement"].lower()) if cache else None
+        if cached_priority is not None:
+            priorities[str(req["ID"])] = cached_priority
+        else:
+            pending.append(req)
+
+    batches = batch_requirements(pending)
+    for attempt in range(GEMINI_PRIORITY_RETRY_ROUNDS + 1):
+        if not batches:
+            break
+
+        with ThreadPoolExecutor(max_workers=max(1, min(GEMINI_PRIORITY_CONCURRENCY, len(batches)))) as executor:
+            futures = [executor.submit(request_batch_priorities, batch) for batch in batches]
+
+        failed_batches = []
+        for batch, future in zip(batches, futures):
+            try:
+                batch_priorities = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"❌ API request failed for a batch of {len(batch)} requirements: {e}")
+                continue
+            except Exception as e:
+                print(f"❌ Unusable Gemini answer for a batch of {len(batch)} requirements: {e}")
+                failed_batches.append(batch)
+                continue
+
+            # Keep what succeeded; requirements Gemini skipped are retried with the failed batches
+            missing = []
+            for req in batch:
+                priority = batch_priorities.get(str(req["ID"]))
+                if priority is None:
+                    missing.append(req)
+                    continue
+                priorities[str(req["ID"])] = priority
+                if cache:
+                    cache.put(PRIORITY_CACHE_MODEL, req["Requirement"].lower(), priority)
+            if missing:
+                failed_batches.append(missing)
+
+        # Retry only what failed, in smaller batches
+        batches = []
+        for batch in failed_batches:
+            half = max(1, len(batch) // 2)
+            batches.extend(batch_requirements(batch, max_items=half))
+
+    return priorities
 
 # ✅ Function to convert prioritized requirements into text format
 def convert_to_text_format(data):
@@ -93,45 +189,74 @@ def convert_to_text_format(data):
     
     return text_output
 
-# ✅ Main function to process JSON
-def prioritize_requirements(input_file="output.json", output_file="prioritized_requirements.txt"):
-    try:
-        with open(input_file, "r") as file:
-            data = json.load(file)
-    except FileNotFoundError:
-        print(f"❌ Error: File {input_file} not found.")
-        return
-    except json.JSONDecodeError:
-        print(f"❌ Error: Invalid JSON format in {input_file}.")
-        return
-
-    unmatched_requirements = []  # Store requirements that need AI prioritization
-
+# ✅ Function to prioritize and categorize the requirements of one parsed document in place
+def prioritize_data(data):
+    valid_requirements = []
     for req in data.get("requirements", []):
         if "Requirement" not in req or "ID" not in req:
             print(f"⚠️ Warning: Requirement missing expected fields {req}")
             continue
+        valid_requirements.append(req)
 
-        priority = assign_priority(req["Requirement"])
-        if priority:
-            req["priority"] = priority
-        else:
-            unmatched_requirements.append(req)  # Send these to Gemini API for prioritization
-        
-        req["category"] = categorize_requirements(req["Requirement"])  # Categorize as functional or non-functional
+    # Priority and category for every requirement in one pass over the compiled rules
+    with timed("prioritize_rules"):
+        matches = get_rule_engine().classify_batch([req["Requirement"] for req in valid_requirements])
+
+    unresolved_requirements = []  # Store requirements the keyword rules could not fully classify
+
+    for req, match in zip(valid_requirements, matches):
+        req["priority"] = match["priority"]
+        req["category"] = match["category"] or "Uncategorized"  # Categorize as functional or non-functional
+        if not req["priority"] or req["category"] == "Uncategorized":
+            unresolved_requirements.append(req)
+
+    unmatched_requirements = []  # Store requirements that need AI prioritization
+
+    # Local similarity classifier scores the rest in one batch; only low-confidence priorities go to Gemini
+    if unresolved_requirements:
+        with timed("prioritize_classifier"):
+            predictions = get_classifier().classify_batch([req["Requirement"] for req in unresolved_requirements])
+        for req, prediction in zip(unresolved_requirements, predictions):
+            category, _, category_confident = prediction["category"]
+            if req["category"] == "Uncategorized" and category_confident:
+                req["category"] = category
+
+            priority, _, priority_confident = prediction["priority"]
+            if not req["priority"]:
+                if priority_confident:
+                    req["priority"] = priority
+                else:
+                    unmatched_requirements.append(req)  # Send these to Gemini API for prioritization
 
     # If AI prioritization is needed
     if unmatched_requirements:
         print("🔍 Sending unmatched requirements to Gemini API for prioritization...")
-        corrected_priorities = get_priority_from_gemini(unmatched_requirements)
+        with timed("prioritize_gemini"):
+            corrected_priorities = get_priority_from_gemini(unmatched_requirements)
 
         for req in unmatched_requirements:
-            req_id = req["ID"]
+            req_id = str(req["ID"])  # Answers are keyed by the ID as text, whatever its type in the input
             if req_id in corrected_priorities:
                 req["priority"] = corrected_priorities[req_id]
             else:
                 req["priority"] = "Uncategorized"  # Default if Gemini API fails
 
+    return data
+
+# ✅ Main function to process JSON
+def prioritize_requirements(input_file="output.json", output_file="prioritized_requirements.txt"):
+    try:
+        with open(input_file, "r") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        print(f"❌ Error: File {input_file} not found.")
+        return
+    except json.JSONDecodeError:
+        print(f"❌ Error: Invalid JSON format in {input_file}.")
+        return
+
+    prioritize_data(data)
+
     # Convert the prioritized data to a human-readable text format
     text_output = convert_to_text_format(data)
 
@@ -0,0 +1,91 @@
+import os
+import re
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
+from chunking import split_into_chunks
+
+# Passage size, number of passages sent per chat turn and number of per-document indexes kept
+RETRIEVAL_CHUNK_TOKENS = int(os.getenv("REQUBE_RETRIEVAL_CHUNK_TOKENS", "250"))
+RETRIEVAL_TOP_K = int(os.getenv("REQUBE_RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("REQUBE_RETRIEVAL_CACHE_SIZE", "32"))
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class RetrievalIndex:
+    """BM25 index over the passages of one document.
+
+    Per-term BM25 weights are precomputed into NumPy posting arrays, so a query only sums a
+    handful of arrays into the score vector.
+    """
+
+    def __init__(self, text, chunk_tokens=RETRIEVAL_CHUNK_TOKENS):
+        self.passages = split_into_chunks(text, chunk_tokens)
+        term_counts = [Counter(tokenize(passage)) for passage in self.passages]
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+        average_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+        postings = defaultdict(lambda: ([], []))
+        for passage_id, counts in enumerate(term_counts):
+            for term, count in counts.items():
+                ids, tfs = postings[term]
+                ids.append(passage_id)
+                tfs.append(count)
+
+        passage_count = len(self.passages)
+        self._postings = {}
+        for term, (ids, tfs) in postings.items():
+            ids = np.array(ids, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float32)
+            idf = np.log1p((passage_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[ids] / average_length)
+            self._postings[term] = (ids, (idf * tfs * (BM25_K1 + 1) / (tfs + norm)).astype(np.float32))
+
+    def search(self, query, top_k=RETRIEVAL_TOP_K):
+        """Returns up to top_k passages for the query, in document order."""
+        if not self.passages:
+            return []
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is not None:
+                np.add.at(scores, posting[0], posting[1])
+
+        top_k = min(top_k, len(self.passages))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[scores[best] > 0]
+        # Nothing matched (e.g. "summarize this"): fall back to the start of the document
+        if not len(best):
+            best = np.arange(top_k)
+        return [self.passages[i] for i in sorted(best)]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(text):
+    """Returns the retrieval index for a document, building and caching it on first use."""
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = RetrievalIndex(text)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > RETRIEVAL_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,112 @@
+import json
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that reports, per rule group, the best (lowest) rank of any keyword in a text.
+
+    Each keyword carries a {group: rank} payload. Ranks are folded along the failure links at build
+    time, so a scan is a single pass over the text regardless of how many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+
+        for keyword, payload in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                state = next_state
+            self._out[state] = _merge_ranks(self._out[state], payload)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = _merge_ranks(self._out[next_state], self._out[self._fail[next_state]])
+
+        # Full transition table, filled in lazily as characters are seen, so scanning never walks failure links
+        self._delta = [dict(goto) for goto in self._goto]
+
+    def _transition(self, state, char):
+        original = state
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        next_state = self._goto[state].get(char, 0)
+        self._delta[original][char] = next_state
+        return next_state
+
+    def best_ranks(self, text):
+        """Returns {group: lowest rank} over every keyword occurring in text."""
+        delta, out = self._delta, self._out
+        best = {}
+        state = 0
+        for char in text:
+            next_state = delta[state].get(char)
+            state = self._transition(state, char) if next_state is None else next_state
+            ranks = out[state]
+            if ranks:
+                for group, rank in ranks.items():
+                    if rank < best.get(group, rank + 1):
+                        best[group] = rank
+        return best
+
+
+def _merge_ranks(current, extra):
+    if not extra:
+        return current
+    if not current:
+        return dict(extra)
+    merged = dict(current)
+    for group, rank in extra.items():
+        if rank < merged.get(group, rank + 1):
+            merged[group] = rank
+    return merged
+
+
+class RuleEngine:
+    """Classifies text against ordered keyword rule sets with first-match-wins semantics.
+
+    rule_sets maps a group name (e.g. "priority") to an ordered {label: [keywords]} dict. For each group
+    the result is the first label, in rule order, that has any keyword contained in the lowercased text,
+    exactly as a nested any(keyword in text) scan over the rules would return.
+    """
+
+    def __init__(self, rule_sets):
+        self.labels = {group: list(rules) for group, rules in rule_sets.items()}
+        payloads = {}
+        for group, rules in rule_sets.items():
+            for rank, keywords in enumerate(rules.values()):
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    if keyword:
+                        payloads[keyword] = _merge_ranks(payloads.get(keyword), {group: rank})
+        self._automaton = KeywordAutomaton(payloads.items())
+
+    def classify(self, text):
+        """Returns {group: label or None} for a single text."""
+        ranks = self._automaton.best_ranks(text.lower())
+        return {group: labels[ranks[group]] if group in ranks else None for group, labels in self.labels.items()}
+
+    def classify_batch(self, texts):
+        """Classifies many texts with the one compiled automaton."""
+        return [self.classify(text) for text in texts]
+
+
+def load_rule_sets(path):
+    """Loads rule sets from a JSON file of the form {"priority": {"Must Have": ["upload", ...], ...}, ...}."""
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
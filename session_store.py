@@ -0,0 +1,284 @@
+import os
+import copy
+import time
+import sqlite3
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+
+# Idle lifetime, in-memory cap and optional SQLite tier for server-side sessions
+SESSION_IDLE_SECONDS = int(os.getenv("REQUBE_SESSION_IDLE_SECONDS", str(4 * 60 * 60)))
+SESSION_MAX_BYTES = int(os.getenv("REQUBE_SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_DB_PATH = os.getenv("REQUBE_SESSION_DB_PATH", "")
+SESSION_SWEEP_SECONDS = 60
+
+
+def estimate_size(value):
+    """Roughly estimates the memory held by a session value, in bytes."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return 8
+
+
+class ServerSideSession(dict, SessionMixin):
+    """Session dict that records which keys changed, so only those are written back.
+
+    Its values are private copies of the stored ones, so editing a value in place only persists once
+    the key is assigned again.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial or {})
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.changed_keys = set()
+        self.deleted_keys = set()
+
+    def _changed(self, key):
+        self.modified = True
+        self.changed_keys.add(key)
+        self.deleted_keys.discard(key)
+
+    def _deleted(self, key):
+        self.modified = True
+        self.changed_keys.discard(key)
+        self.deleted_keys.add(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._deleted(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._deleted(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._deleted(key)
+        return key, value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in list(self):
+            self._deleted(key)
+        super().clear()
+
+
+class SessionStore:
+    """In-memory LRU of session dicts with idle expiry and a byte cap, written through to optional SQLite."""
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS, max_bytes=SESSION_MAX_BYTES, path=SESSION_DB_PATH):
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # sid -> [data, per-key sizes, last access]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._serializer = TaggedJSONSerializer()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, last_access REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_values ("
+                " sid TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (sid, key))"
+            )
+            self._conn.commit()
+
+    def load(self, sid):
+        """Returns a deep copy of the session's data, or None if it is unknown or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                if now - entry[2] > self.idle_seconds:
+                    self._drop(sid)
+                    return None
+                entry[2] = now
+                self._entries.move_to_end(sid)
+                return copy.deepcopy(entry[0])
+
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT last_access FROM sessions WHERE sid = ? AND last_access > ?", (sid, now - self.idle_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            data = {
+                key: self._serializer.loads(value)
+                for key, value in self._conn.execute("SELECT key, value FROM session_values WHERE sid = ?", (sid,))
+            }
+            self._remember(sid, data, now)
+            return copy.deepcopy(data)
+
+    def save(self, session):
+        """Writes the changed and deleted keys of a session back to the store."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(session.sid)
+            if entry is None:
+                self._remember(session.sid, copy.deepcopy(dict(session)), now)
+                changed_keys = set(session)
+            else:
+                data, sizes = entry[0], entry[1]
+                for key in session.deleted_keys:
+                    data.pop(key, None)
+                    self.total_bytes -= sizes.pop(key, 0)
+                for key in session.changed_keys:
+                    data[key] = copy.deepcopy(session[key])
+                    size = estimate_size(session[key])
+                    self.total_bytes += size - sizes.get(key, 0)
+                    sizes[key] = size
+                entry[2] = now
+                self._entries.move_to_end(session.sid)
+                changed_keys = session.changed_keys
+
+            if self._conn is not None:
+                self._write_through(session, changed_keys, now)
+            self._enforce_limits(now)
+
+    def touch(self, sid):
+        """Marks a session as used without rewriting any values."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                entry[2] = now
+                self._entries.move_to_end(sid)
+            if self._conn is not None:
+                self._conn.execute("UPDATE sessions SET last_access = ? WHERE sid = ?", (now, sid))
+                self._conn.commit()
+            self._enforce_limits(now)
+
+    def delete(self, sid):
+        with self._lock:
+            self._drop(sid)
+
+    def _remember(self, sid, data, now):
+        sizes = {key: estimate_size(value) for key, value in data.items()}
+        self._entries[sid] = [data, sizes, now]
+        self._entries.move_to_end(sid)
+        self.total_bytes += sum(sizes.values())
+
+    def _drop(self, sid):
+        entry = self._entries.pop(sid, None)
+        if entry is not None:
+            self.total_bytes -= sum(entry[1].values())
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM session_values WHERE sid = ?", (sid,))
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            self._conn.commit()
+
+    def _write_through(self, session, changed_keys, now):
+        try:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (sid, last_access) VALUES (?, ?)", (session.sid, now))
+            self._conn.executemany(
+                "DELETE FROM session_values WHERE sid = ? AND key = ?",
+                [(session.sid, key) for key in session.deleted_keys],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO session_values (sid, key, value) VALUES (?, ?, ?)",
+                [(session.sid, key, self._serializer.dumps(session[key])) for key in changed_keys],
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Could not persist session {session.sid}: {e}")
+
+    def _enforce_limits(self, now):
+        # Entries are kept in access order, so idle and least recently used ones are at the front
+        while self._entries and self.total_bytes > self.max_bytes:
+            sid, entry = self._entries.popitem(last=False)
+            self.total_bytes -= sum(entry[1].values())
+
+        if now - self._last_sweep < SESSION_SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        cutoff = now - self.idle_seconds
+        while self._entries:
+            sid, entry = next(iter(self._entries.items()))
+            if entry[2] > cutoff:
+                break
+            self._drop(sid)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM session_values WHERE sid IN (SELECT sid FROM sessions WHERE last_access <= ?)", (cutoff,))
+            self._conn.execute("DELETE FROM sessions WHERE last_access <= ?", (cutoff,))
+            self._conn.commit()
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a SessionStore; the cookie only carries a random session id."""
+
+    session_class = ServerSideSession
+
+    def __init__(self, store=None):
+        self.store = store or SessionStore()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        data = self.store.load(sid) if sid else None
+        if data is None:
+            return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+        return self.session_class(data, sid=sid)
+
+    def persist(self, session):
+        """Saves a session immediately, e.g. from a streamed response after the headers have gone out."""
+        if session.modified:
+            self.store.save(session)
+            session.changed_keys.clear()
+            session.deleted_keys.clear()
+            session.modified = False
+
+    def save_session(self, app, session, response):
+        cookie_name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.save(session)
+        else:
+            self.store.touch(session.sid)
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                cookie_name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
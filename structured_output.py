@@ -0,0 +1,190 @@
+import re
+import json
+
+# Field paths of the analysis result; nested fields are dotted
+ANALYSIS_FIELDS = [
+    "key_points",
+    "summary",
+    "requirements.functional",
+    "requirements.non_functional",
+    "missing_info_questions",
+]
+
+# Closing points tried, latest first, when salvaging a response that was cut off
+MAX_SALVAGE_ATTEMPTS = 64
+
+_FENCE = re.compile(r"```(?:json|JSON)?[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+
+_STRING_LIST = {"type": "ARRAY", "items": {"type": "STRING"}}
+_FIELD_SCHEMAS = {
+    "key_points": _STRING_LIST,
+    "summary": {"type": "STRING"},
+    "requirements.functional": _STRING_LIST,
+    "requirements.non_functional": _STRING_LIST,
+    "missing_info_questions": _STRING_LIST,
+}
+
+
+def analysis_schema(fields=None):
+    """Returns the Gemini responseSchema (OpenAPI subset) for the given analysis field paths, all by default."""
+    properties = {}
+    for path in fields or ANALYSIS_FIELDS:
+        head, _, sub = path.partition(".")
+        if sub:
+            nested = properties.setdefault(head, {"type": "OBJECT", "properties": {}})
+            nested["properties"][sub] = _FIELD_SCHEMAS[path]
+            nested["required"] = nested["propertyOrdering"] = list(nested["properties"])
+        else:
+            properties[head] = _FIELD_SCHEMAS[path]
+    return {"type": "OBJECT", "properties": properties, "required": list(properties), "propertyOrdering": list(properties)}
+
+
+def parse_json_lenient(text):
+    """Returns (value, cut_path) for the JSON object in a model response; value is None if nothing can be recovered.
+
+    Accepts bare JSON, JSON in a ``` fence (closed or not) or surrounded by prose, and JSON that was cut
+    off mid-way, which is closed after its last complete value. cut_path is None for complete JSON and
+    otherwise the dotted path of the value that was still being written where the text stops, "" when
+    it stopped between top-level values.
+    """
+    if not text:
+        return None, None
+    match = _FENCE.search(text)
+    candidate = match.group(1) if match else text
+    start = candidate.find("{")
+    if start < 0:
+        return None, None
+    candidate = candidate[start:]
+    try:
+        return json.JSONDecoder().raw_decode(candidate)[0], None  # Ignores anything after the object
+    except json.JSONDecodeError:
+        value, open_depth = _salvage_truncated(candidate)
+        if value is None:
+            return None, None
+        return value, _last_path(value, open_depth)
+
+
+def _salvage_truncated(text):
+    """Returns (value, open_depth): the closed-off document and how many keys deep it was still being written."""
+    stack = []  # Closers of the open objects and arrays
+    in_string = False
+    escaped = False
+    cuts = []  # (end, closers): text[:end] + closers is a complete document if everything before end was valid
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            cuts.append((index + 1, "".join(reversed(stack))))
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                break  # Malformed rather than truncated; only cut points before here can help
+            cuts.append((index + 1, "".join(reversed(stack))))
+            if not stack:
+                break
+        elif char == ",":
+            cuts.append((index, "".join(reversed(stack))))
+
+    # Each candidate closes every container still open; the last value inside them is complete except
+    # for a string that is closed where the text stops
+    candidates = []
+    # Closing the text where it stops keeps a half-written summary, but a half-written list item is dropped
+    if stack and not (in_string and stack[-1] == "]"):
+        closed = text.rstrip().rstrip(",") + ('"' if in_string else "") + "".join(reversed(stack))
+        candidates.append((closed, len(stack) - 1 + int(in_string)))
+    candidates.extend((text[:end] + closers, len(closers) - 1) for end, closers in reversed(cuts[-MAX_SALVAGE_ATTEMPTS:]))
+    for candidate, open_depth in candidates:
+        try:
+            return json.loads(candidate), open_depth
+        except json.JSONDecodeError:
+            continue
+    return None, 0
+
+
+def _as_text(item):
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):  # e.g. {"id": "FR1", "description": "..."} instead of "FR1: ..."
+        return ": ".join(str(value) for value in item.values() if value not in (None, ""))
+    return str(item)
+
+
+def _get_path(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _set_path(data, path, value):
+    *parents, key = path.split(".")
+    for parent in parents:
+        data = data.setdefault(parent, {})
+    data[key] = value
+
+
+def _last_path(data, depth):
+    """Dotted path following the last key down depth levels of nested objects."""
+    keys = []
+    while len(keys) < depth and isinstance(data, dict) and data:
+        key = next(reversed(data))
+        keys.append(key)
+        data = data[key]
+    return ".".join(keys)
+
+
+def validate_analysis(data, cut_path=None):
+    """Checks a parsed response against the analysis schema.
+
+    Returns (analysis, missing): analysis holds the fields that are present with the right type, list
+    items coerced to strings, and missing lists the field paths that are absent or of the wrong type.
+    For a truncated response, cut_path from parse_json_lenient names the field that was being written
+    when it was cut off; that field is kept but also listed as missing, since it may be incomplete.
+    """
+    analysis = {}
+    missing = []
+    for path in ANALYSIS_FIELDS:
+        value = _get_path(data, path)
+        expected = _FIELD_SCHEMAS[path]["type"]
+        if expected == "ARRAY" and isinstance(value, list):
+            value = [_as_text(item) for item in value if item not in (None, "")]
+        elif not (expected == "STRING" and isinstance(value, str)):
+            missing.append(path)
+            continue
+        _set_path(analysis, path, value)
+        if cut_path and (cut_path == path or cut_path.startswith(path + ".") or path.startswith(cut_path + ".")):
+            missing.append(path)
+    return analysis, missing
+
+
+def merge_fields(analysis, repaired, fields):
+    """Copies the given field paths from a validated repair response into analysis."""
+    for path in fields:
+        value = _get_path(repaired, path)
+        if value is not None:
+            _set_path(analysis, path, value)
+    return analysis
+
+
+def field_skeleton(fields):
+    """Returns a placeholder object with the given field paths, to show the expected shape in a prompt."""
+    skeleton = {}
+    for path in fields:
+        _set_path(skeleton, path, "..." if _FIELD_SCHEMAS[path]["type"] == "STRING" else ["...", "..."])
+    return skeleton
+
+
+def fill_missing(analysis):
+    """Gives every field still absent an empty value, so the result always has the full shape."""
+    for path in ANALYSIS_FIELDS:
+        if _get_path(analysis, path) is None:
+            _set_path(analysis, path, "" if _FIELD_SCHEMAS[path]["type"] == "STRING" else [])
+    return analysis
@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def fake_gemini():
+    """The benchmark's fake Gemini API, answering instantly."""
+    from benchmarks.fake_gemini import FakeGeminiServer
+    with FakeGeminiServer(latency=0, jitter=0) as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def app_module(fake_gemini, tmp_path_factory):
+    """The Flask app module, configured against the fake server with scratch state.
+
+    The app reads its configuration at import time, so the environment is set before the first import.
+    """
+    work_dir = tmp_path_factory.mktemp("reqube")
+    os.environ.update({
+        "GEMINI_API_BASE": fake_gemini.url,
+        "GEMINI_API_KEY": "test",
+        "GEMINI_BACKOFF_BASE_SECONDS": "0",
+        "REQUBE_EXTRACTION_CACHE": "0",
+        "REQUBE_JOBS_DB_PATH": str(work_dir / "jobs.sqlite3"),
+        "REQUBE_UPLOAD_STORE_ROOT": str(work_dir / "uploads"),
+        "REQUBE_UPLOAD_DB_PATH": str(work_dir / "uploads.sqlite3"),
+    })
+    # Test modules may have imported the client module during collection, before the environment was set
+    import gemini_client
+    gemini_client.GEMINI_BACKOFF_BASE_SECONDS = 0
+    gemini_client._client = gemini_client.GeminiClient("test", base_url=fake_gemini.url)
+    import app
+    return app
@@ -0,0 +1,56 @@
+import io
+import os
+import sys
+import json
+import batch_prioritize
+from batch_prioritize import iter_documents, process_document, text_report_path
+
+
+def test_jsonl_lines_that_are_not_objects_become_error_records(tmp_path):
+    path = tmp_path / "docs.jsonl"
+    path.write_text('{"id": "a", "requirements": []}\n[]\n"x"\n3\n{broken\n', encoding="utf-8")
+    documents = list(iter_documents([str(path)]))
+
+    assert documents[0] == ("a", None, {"id": "a", "requirements": []})
+    errors = [document["error"] for _, _, document in documents[1:]]
+    assert errors[:3] == ["Expected a JSON object, got list", "Expected a JSON object, got str", "Expected a JSON object, got int"]
+    assert errors[3].startswith("Invalid JSON")
+    assert process_document(*documents[1]) == {"id": f"{path}:2", "error": "Expected a JSON object, got list"}
+
+
+def test_stdin_is_left_open(monkeypatch):
+    stdin = io.StringIO('{"id": "a"}\n')
+    monkeypatch.setattr(sys, "stdin", stdin)
+    assert [doc_id for doc_id, _, _ in iter_documents(["-"])] == ["a"]
+    assert not stdin.closed
+
+
+def test_same_named_files_get_distinct_reports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = text_report_path("reports", "exports/a/req.json", os.path.join("exports", "a", "req.json"))
+    second = text_report_path("reports", "exports/b/req.json", os.path.join("exports", "b", "req.json"))
+    assert first == os.path.join("reports", "exports", "a", "req.txt")
+    assert second == os.path.join("reports", "exports", "b", "req.txt")
+
+
+def test_jsonl_ids_are_made_safe_and_stay_distinct():
+    names = {text_report_path("reports", doc_id, None) for doc_id in ["a b", "a_b", "a/b", "docs.jsonl:3"]}
+    assert len(names) == 4
+    assert all(os.path.dirname(name).startswith("reports") for name in names)
+
+
+def test_recursive_glob_writes_one_report_per_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in ("a", "b"):
+        os.makedirs(os.path.join("exports", directory))
+        with open(os.path.join("exports", directory, "req.json"), "w", encoding="utf-8") as file:
+            json.dump({"requirements": []}, file)
+    monkeypatch.setattr(batch_prioritize, "prioritize_data", lambda document: document)
+    monkeypatch.setattr(batch_prioritize, "convert_to_text_format", lambda document: "report")
+
+    for doc_id, path, document in iter_documents(["exports/**/*.json"]):
+        assert "error" not in process_document(doc_id, path, document, text_dir="reports")
+    assert sorted(os.path.relpath(os.path.join(root, name), "reports") for root, _, names in os.walk("reports") for name in names) == [
+        os.path.join("exports", "a", "req.txt"),
+        os.path.join("exports", "b", "req.txt"),
+    ]
@@ -0,0 +1,43 @@
+import io
+import zipfile
+import pytest
+from werkzeug.datastructures import FileStorage
+
+
+def make_zip(damage):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("good.txt", "The user shall log in.")
+        archive.writestr("bad.txt", "The system shall export reports.")
+    data = bytearray(buffer.getvalue())
+    # Mark bad.txt, the last entry, as encrypted or as using an unknown compression method in its local
+    # and central directory headers
+    field, value = {"encrypted": ((6, 8), 0x1), "compression": ((8, 10), 99)}[damage]
+    for signature, offset in zip((b"PK\x03\x04", b"PK\x01\x02"), field):
+        position = data.rfind(signature) + offset
+        data[position:position + 2] = value.to_bytes(2, "little")
+    return FileStorage(io.BytesIO(bytes(data)), filename="specs.zip")
+
+
+@pytest.mark.parametrize("damage", ["encrypted", "compression"])
+def test_unreadable_member_is_reported_and_releases_the_batch(app_module, damage):
+    store = app_module.get_upload_store()
+    referenced = store.stats()["referenced"]
+    plain = FileStorage(io.BytesIO(b"The admin shall manage users."), filename="notes.txt")
+
+    with pytest.raises(ValueError, match="bad.txt in specs.zip"):
+        app_module.store_batch_uploads([plain, make_zip(damage)])
+    assert store.stats()["referenced"] == referenced
+
+
+def test_readable_archive_members_are_stored(app_module):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.txt", "The user shall log in.")
+        archive.writestr("setup.exe", b"skipped")
+    buffer.seek(0)
+
+    files = app_module.store_batch_uploads([FileStorage(buffer, filename="specs.zip")])
+    assert [name for name, _, _ in files] == ["a.txt"]
+    for _, path, _ in files:
+        app_module.get_upload_store().release(path)
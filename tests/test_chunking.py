@@ -0,0 +1,39 @@
+import pytest
+from chunking import CHARS_PER_TOKEN, SECTION_HEADING, estimate_tokens, split_into_chunks
+
+
+@pytest.mark.parametrize("line", ["3. Scope", "3.1 Login", "Section 4 Reports", "SECTION 4 Reports", "SECURITY REQUIREMENTS"])
+def test_section_headings(line):
+    assert SECTION_HEADING.match(line)
+
+
+@pytest.mark.parametrize("line", ["see below", "The system shall", "Security requirements", "12"])
+def test_ordinary_lines_are_not_headings(line):
+    assert not SECTION_HEADING.match(line)
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * (CHARS_PER_TOKEN + 1)) == 2
+
+
+def test_chunks_respect_the_budget_and_keep_every_paragraph():
+    paragraphs = [f"Paragraph {index} " + "word " * 30 for index in range(40)]
+    chunks = split_into_chunks("\n\n".join(paragraphs), max_tokens=200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "\n\n".join(chunks).split("\n\n") == paragraphs
+
+
+def test_section_heading_starts_a_new_chunk_once_half_full():
+    body = "word " * 100
+    text = "\n\n".join([body, body, "2. Reporting\nThe system shall export reports.", body])
+    chunks = split_into_chunks(text, max_tokens=300)
+    assert chunks[1].startswith("2. Reporting")
+
+
+def test_lowercase_short_lines_do_not_split_sections():
+    body = "word " * 100
+    text = "\n\n".join([body, body, "see below", body])
+    chunks = split_into_chunks(text, max_tokens=300)
+    assert not any(chunk.startswith("see below") for chunk in chunks)
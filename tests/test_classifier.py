@@ -0,0 +1,32 @@
+from classifier import PrototypeClassifier, RequirementClassifier
+
+PROTOTYPES = {
+    "Must Have": ["Encrypt stored passwords with a salted hash", "Lock the account after repeated failed logins"],
+    "Could Have": ["Offer a dark colour theme", "Let users pick an avatar picture"],
+}
+
+
+def test_text_close_to_one_label_is_confident():
+    [(label, confidence, confident)] = PrototypeClassifier(PROTOTYPES).score_batch(["Encrypt stored passwords with a salted hash"])
+    assert (label, confident) == ("Must Have", True)
+    assert confidence > 0.9
+
+
+def test_unrelated_text_is_not_confident():
+    [(_, confidence, confident)] = PrototypeClassifier(PROTOTYPES).score_batch(["Quarterly invoices reconcile ledgers"])
+    assert not confident
+    assert confidence < 0.3
+
+
+def test_text_equally_close_to_two_labels_is_not_confident():
+    prototypes = {"Must Have": ["Export reports nightly"], "Should Have": ["Export reports nightly"]}
+    [(_, confidence, confident)] = PrototypeClassifier(prototypes).score_batch(["Export reports nightly"])
+    assert confidence > 0.9
+    assert not confident
+
+
+def test_each_group_is_scored_separately():
+    classifier = RequirementClassifier({"priority": PROTOTYPES, "category": {"Functional": ["Offer a dark colour theme"]}})
+    [prediction] = classifier.classify_batch(["Offer a dark colour theme"])
+    assert prediction["priority"][0] == "Could Have"
+    assert prediction["category"][0] == "Functional"
@@ -0,0 +1,69 @@
+import zipfile
+from docx_stream import iter_docx_blocks
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+
+
+def paragraph(text):
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def table(*rows):
+    cells = "".join("<w:tr>" + "".join(f"<w:tc>{paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>" for row in rows)
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def make_docx(tmp_path, body, **parts):
+    """Writes a DOCX with the given body XML and extra parts, e.g. header1="<w:p>...</w:p>"."""
+    path = tmp_path / "spec.docx"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>")
+        for name, content in parts.items():
+            root = "hdr" if name.startswith("header") else "ftr"
+            archive.writestr(f"word/{name}.xml", f"<w:{root} {NAMESPACES}>{content}</w:{root}>")
+    return str(path)
+
+
+def test_body_blocks_keep_their_order(tmp_path):
+    path = make_docx(tmp_path, paragraph("Intro") + table(["a", "b"]) + paragraph("Outro"))
+    assert list(iter_docx_blocks(path)) == [
+        ("paragraph", 1, "Intro\n"),
+        ("cell", 2, "a\t"),
+        ("cell", 3, "b\n"),
+        ("paragraph", 4, "Outro\n"),
+    ]
+
+
+def test_tables_read_as_tab_separated_rows(tmp_path):
+    path = make_docx(tmp_path, table(["ID", "Requirement"], ["R1", "Users can log in"]))
+    assert "".join(text for _, _, text in iter_docx_blocks(path)) == "ID\tRequirement\nR1\tUsers can log in\n"
+
+
+def test_headers_and_footers_follow_the_body(tmp_path):
+    path = make_docx(
+        tmp_path,
+        paragraph("Body"),
+        footer1=paragraph("Page footer"),
+        header2=paragraph("Second header"),
+        header1=paragraph("First header") + "<w:p/>",
+    )
+    assert [(unit, text) for unit, _, text in iter_docx_blocks(path)] == [
+        ("paragraph", "Body\n"),
+        ("header", "First header\n"),
+        ("header", "Second header\n"),
+        ("footer", "Page footer\n"),
+    ]
+
+
+def test_text_box_fallback_copies_are_skipped(tmp_path):
+    text_box = (
+        "<w:p><w:r><w:t>Anchor </w:t></w:r><mc:AlternateContent>"
+        f"<mc:Choice>{paragraph('Boxed')}</mc:Choice>"
+        f"<mc:Fallback>{paragraph('Boxed copy')}</mc:Fallback>"
+        "</mc:AlternateContent></w:p>"
+    )
+    path = make_docx(tmp_path, text_box)
+    assert [text for _, _, text in iter_docx_blocks(path)] == ["Anchor Boxed\n"]
@@ -0,0 +1,59 @@
+import itertools
+import types
+import pytest
+import extraction_cache
+from extraction_cache import ExtractionCache, hash_file, make_key
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Every access gets a later timestamp, so recency never ties."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(extraction_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def make_cache(tmp_path, max_bytes=1024):
+    return ExtractionCache(path=str(tmp_path / "extraction.sqlite3"), max_bytes=max_bytes)
+
+
+def test_get_returns_what_put_stored_and_counts_hits_and_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("key") is None
+    cache.put("key", "text")
+    assert cache.get("key") == "text"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 4, "max_bytes": 1024}
+
+
+def test_least_recently_used_entries_are_evicted_at_the_size_cap(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=20)
+    cache.put("a", "A" * 8)
+    cache.put("b", "B" * 8)
+    cache.get("a")
+    cache.put("c", "C" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" * 8
+    assert cache.get("c") == "C" * 8
+    assert cache.stats()["bytes"] == 16
+
+
+def test_text_larger_than_the_cap_is_not_cached(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=4)
+    cache.put("key", "too long")
+    assert cache.get("key") is None
+
+
+def test_key_changes_with_the_content(tmp_path):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text("The user shall log in.")
+    second.write_text("The user shall log out.")
+    settings = {"extractor": "txt"}
+
+    assert make_key(hash_file(first), settings) != make_key(hash_file(second), settings)
+    assert make_key(hash_file(first), settings) == make_key(hash_file(first), dict(settings))
+
+
+def test_key_changes_with_the_settings():
+    content_hash = "0" * 64
+    assert make_key(content_hash, {"extractor": "pdf", "ocr": "auto"}) != make_key(content_hash, {"extractor": "pdf", "ocr": "all"})
+    assert make_key(content_hash, {"a": 1, "b": 2}) == make_key(content_hash, {"b": 2, "a": 1})
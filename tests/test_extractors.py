@@ -0,0 +1,217 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+import pytest
+import extractors
+import input
+from extractors import get_extractor, iter_with_limits, register_extractor, time_left
+from metrics import increment, render_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Worker processes import this module to find the extractors registered here
+@register_extractor("test-counted-lines", [".test-counted-lines"])
+def counted_lines(path):
+    for number in range(3):
+        increment("reqube_test_worker_chunks_total")
+        yield input.TextChunk(f"line {number} of {os.path.basename(path)}\n", path, "line", number + 1)
+
+
+@register_extractor("test-hangs", [".test-hangs"])
+def hangs(path):
+    yield input.TextChunk("first\n", path, "line", 1)
+    time.sleep(60)  # A parser stuck inside a single chunk
+    yield input.TextChunk("never\n", path, "line", 2)
+
+
+@register_extractor("test-allocates", [".test-allocates"])
+def allocates(path):
+    hoard = b"x" * (200 * 1024 * 1024)
+    time.sleep(10)
+    yield input.TextChunk(str(len(hoard)), path, "line", 1)
+
+
+@register_extractor("test-reports-deadline", [".test-reports-deadline"])
+def reports_deadline(path):
+    yield input.TextChunk(f"{time_left():.0f}", path, "line", 1)
+
+
+@register_extractor("test-endless", [".test-endless"], page_unit="page")
+def endless(path):
+    for number in range(1, 1000000):
+        yield input.TextChunk("page\n", path, "page", number)
+
+
+@register_extractor("test-reports-pid", [".test-reports-pid"])
+def reports_pid(path):
+    yield input.TextChunk(str(os.getpid()), path, "line", 1)
+
+
+@register_extractor("test-fails", [".test-fails"])
+def fails(path):
+    raise ValueError(f"{os.path.basename(path)} is damaged")
+    yield
+
+
+@register_extractor("test-converter", [".test-converter"], converter=True)
+def converts(path):
+    yield input.TextChunk("converted\n", path, "line", 1)
+
+
+def counter(name):
+    lines = [line for line in render_metrics().splitlines() if line.startswith(name + " ")]
+    return float(lines[0].split()[1]) if lines else 0
+
+
+def limited(name, **limits):
+    return get_extractor(name)._replace(**limits)
+
+
+@pytest.fixture(autouse=True)
+def fresh_workers():
+    """Workers started by a test, with its environment, do not outlive it."""
+    yield
+    extractors.get_worker_pool().shutdown()
+
+
+@pytest.fixture(params=[True, False], ids=["worker", "in-process"])
+def isolation(request, monkeypatch):
+    monkeypatch.setattr(extractors, "EXTRACT_IN_WORKER_PROCESS", request.param)
+    return request.param
+
+
+@pytest.fixture
+def in_worker(monkeypatch):
+    monkeypatch.setattr(extractors, "EXTRACT_IN_WORKER_PROCESS", True)
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("content")
+    return str(path)
+
+
+def test_chunks_and_metrics_come_back_in_order(isolation, document):
+    before = counter("reqube_test_worker_chunks_total")
+    chunks = list(iter_with_limits(limited("test-counted-lines"), document))
+
+    assert [chunk.text for chunk in chunks] == [f"line {number} of doc.txt\n" for number in range(3)]
+    assert counter("reqube_test_worker_chunks_total") - before == 3
+
+
+def test_extractor_sees_its_deadline(isolation, document):
+    assert [chunk.text for chunk in iter_with_limits(limited("test-reports-deadline", timeout=30), document)] in (["30"], ["29"])
+
+
+def test_page_cap_stops_the_extractor(isolation, document):
+    chunks = list(iter_with_limits(limited("test-endless", max_pages=5), document))
+    assert len(chunks) == 5
+
+
+def test_extractor_errors_come_back(isolation, document):
+    with pytest.raises(ValueError, match="doc.txt is damaged"):
+        list(iter_with_limits(limited("test-fails"), document))
+
+
+def test_workers_are_reused(in_worker, document):
+    first = [chunk.text for chunk in iter_with_limits(limited("test-reports-pid"), document)]
+    with pytest.raises(ValueError):
+        list(iter_with_limits(limited("test-fails"), document))
+    second = [chunk.text for chunk in iter_with_limits(limited("test-reports-pid"), document)]
+
+    assert first == second
+    assert first != [str(os.getpid())]
+
+
+def test_worker_stuck_inside_a_chunk_is_killed_at_the_timeout_and_replaced(in_worker, document):
+    before = [chunk.text for chunk in iter_with_limits(limited("test-reports-pid"), document)]
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        list(iter_with_limits(limited("test-hangs", timeout=1), document))
+    assert time.monotonic() - started < 10
+
+    after = [chunk.text for chunk in iter_with_limits(limited("test-reports-pid"), document)]
+    assert after != before
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="worker memory is read from /proc")
+def test_worker_memory_is_capped(in_worker, document):
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="64 MB"):
+        list(iter_with_limits(limited("test-allocates", max_memory_mb=64), document))
+    assert time.monotonic() - started < 5
+
+
+def test_converters_take_a_slot_in_the_parent(in_worker, monkeypatch, document):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(extractors, "_subprocess_slots", slots)
+    chunks = iter_with_limits(limited("test-converter"), document)
+
+    assert next(chunks).text == "converted\n"
+    assert not slots.acquire(blocking=False)
+    chunks.close()
+    assert slots.acquire(blocking=False)
+
+
+def test_converters_wait_for_a_free_slot(in_worker, monkeypatch, document):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(extractors, "_subprocess_slots", slots)
+    slots.acquire()
+    with pytest.raises(TimeoutError, match="No free slot"):
+        list(iter_with_limits(limited("test-converter", timeout=0.2), document))
+
+
+def test_scanned_pdf_is_read_within_the_default_memory_cap(in_worker, monkeypatch, tmp_path):
+    import fitz
+    from PIL import Image
+    tesseract = tmp_path / "tesseract"
+    tesseract.write_text(
+        "#!/bin/sh\n"
+        'if [ "$1" = "--version" ]; then echo "tesseract 5.3.0"; exit 0; fi\n'
+        'echo "scanned words" > "$2.txt"\n'
+    )
+    tesseract.chmod(0o755)
+    monkeypatch.setenv("REQUBE_TESSERACT_CMD", str(tesseract))
+    monkeypatch.setattr(extractors, "EXTRACT_HELPER_PROCESSES", 3)  # OCR over a pool of processes
+    scan = tmp_path / "scan.png"
+    Image.new("L", (1700, 2200), 255).save(scan)
+    path = tmp_path / "scanned.pdf"
+    with fitz.open() as pdf:
+        for _ in range(6):
+            pdf.new_page(width=612, height=792).insert_image(fitz.Rect(0, 0, 612, 792), filename=str(scan))
+        pdf.save(str(path))
+
+    extractor = get_extractor("pdf")
+    assert extractor.max_memory_mb == extractors.EXTRACT_MAX_MEMORY_MB
+    chunks = list(iter_with_limits(extractor, str(path)))
+    assert [chunk.text.strip() for chunk in chunks] == ["scanned words"] * 6
+
+
+def test_extractors_run_in_workers_when_input_is_the_main_module(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("The user shall log in.")
+    script = (
+        "import runpy, sys\n"
+        f"namespace = runpy.run_path({os.path.join(ROOT, 'input.py')!r})\n"
+        f"chunks = namespace['iter_with_limits'](namespace['get_extractor']('txt'), {str(path)!r})\n"
+        "print(''.join(chunk.text for chunk in chunks))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "The user shall log in."
+
+
+def test_cache_settings_follow_the_detected_format(tmp_path):
+    import fitz
+    path = tmp_path / "report.txt"
+    with fitz.open() as pdf:
+        pdf.new_page().insert_text((72, 72), "The user shall log in.")
+        pdf.save(str(path))
+
+    assert input.extraction_settings(str(path))["extractor"] == "pdf"
+    assert input.extraction_settings(str(path))["max_pages"] == extractors.get_extractor("pdf").max_pages
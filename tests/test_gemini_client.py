@@ -0,0 +1,77 @@
+import threading
+import pytest
+import requests
+from benchmarks.fake_gemini import FakeGeminiServer
+from gemini_client import GeminiClient
+
+
+def chat_payload(text):
+    return {"contents": [{"parts": [{"text": text}]}]}
+
+
+def test_stream_yields_the_reply_in_pieces(fake_gemini):
+    client = GeminiClient("test", base_url=fake_gemini.url)
+    pieces = list(client.stream_generate_content("gemini-test", chat_payload("What does the document say about login?")))
+    assert len(pieces) > 1
+    assert "login" in "".join(pieces)
+
+
+def test_an_open_stream_does_not_hold_the_only_slot(fake_gemini):
+    client = GeminiClient("test", base_url=fake_gemini.url, max_concurrency=1)
+    stream = client.stream_generate_content("gemini-test", chat_payload("What does the document say about login?"))
+    next(stream)  # The stream is connected and being read
+
+    replies = []
+    call = threading.Thread(target=lambda: replies.append(client.generate_text("gemini-test", "What about reports?")))
+    call.start()
+    call.join(timeout=5)
+    stream.close()
+    assert replies and replies[0]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the backoff delays and retries without waiting them out."""
+    delays = []
+    backoff = GeminiClient._backoff
+
+    def recorded(client, attempt, retry_after=None):
+        delays.append(backoff(client, attempt, retry_after))
+        return 0
+
+    monkeypatch.setattr(GeminiClient, "_backoff", recorded)
+    return delays
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_rate_limits_and_server_errors_are_retried(sleeps, status):
+    with FakeGeminiServer(latency=0, jitter=0, failure_status=status, fail_first=2) as server:
+        client = GeminiClient("test", base_url=server.url, max_retries=3)
+        assert client.generate_text("gemini-test", "What does the document say about login?")
+        assert server.stats["requests"] == 3
+    assert len(sleeps) == 2
+
+
+def test_retry_after_sets_the_delay(sleeps):
+    with FakeGeminiServer(latency=0, jitter=0, failure_status=429, retry_after=3, fail_first=2) as server:
+        GeminiClient("test", base_url=server.url, max_retries=3).generate_text("gemini-test", "What about reports?")
+    assert sleeps == [3, 3]
+
+
+def test_gives_up_after_the_last_retry(sleeps):
+    with FakeGeminiServer(latency=0, jitter=0, failure_rate=1.0) as server:
+        client = GeminiClient("test", base_url=server.url, max_retries=2)
+        with pytest.raises(requests.exceptions.HTTPError, match="503"):
+            client.generate_text("gemini-test", "What about reports?")
+        assert server.stats["requests"] == 3
+    assert len(sleeps) == 2
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_other_client_errors_are_not_retried(sleeps, status):
+    with FakeGeminiServer(latency=0, jitter=0, failure_status=status, fail_first=1) as server:
+        client = GeminiClient("test", base_url=server.url, max_retries=3)
+        with pytest.raises(requests.exceptions.HTTPError, match=str(status)):
+            client.generate_text("gemini-test", "What about reports?")
+        assert server.stats["requests"] == 1
+    assert sleeps == []
@@ -0,0 +1,46 @@
+import time
+import pytest
+import input
+
+# Pages with a text layer hold their number; the others are blank, as scans without text would be
+PAGES = ["text", "scan", "text", "scan", "scan", "scan", "text", "scan", "scan"]
+
+
+def fake_ocr(page, lang):
+    time.sleep(0.02 * (len(PAGES) - page.number) / len(PAGES))  # Later pages finish first
+    return f"ocr {page.number + 1}"
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path, monkeypatch):
+    import fitz
+    monkeypatch.setattr(input, "_ocr_pdf_page", fake_ocr)  # Forked pool workers inherit the stub
+    path = tmp_path / "mixed.pdf"
+    with fitz.open() as pdf:
+        for number, kind in enumerate(PAGES, start=1):
+            page = pdf.new_page()
+            if kind == "text":
+                page.insert_text((72, 72), f"text {number}")
+        pdf.save(str(path))
+    return str(path)
+
+
+EXPECTED = [f"{kind if kind == 'text' else 'ocr'} {number}" for number, kind in enumerate(PAGES, start=1)]
+
+
+@pytest.mark.parametrize("workers", [1, 3], ids=["in-order", "process-pool"])
+def test_pdf_pages_come_back_in_order(mixed_pdf, monkeypatch, caplog, workers):
+    monkeypatch.setattr(input, "PDF_OCR_MAX_WORKERS", workers)
+    with caplog.at_level("INFO"):
+        chunks = list(input.iter_text_from_pdf(mixed_pdf, lang="eng"))
+
+    assert (f"across {workers} workers" in caplog.text) == (workers > 1)
+
+    assert [chunk.text.split("\n")[0] for chunk in chunks] == EXPECTED
+    assert [chunk.position for chunk in chunks] == list(range(1, len(PAGES) + 1))
+    assert all(chunk.unit == "page" for chunk in chunks)
+
+
+def test_pdf_pages_come_back_in_order_without_prefetching(mixed_pdf):
+    chunks = list(input.iter_text_from_pdf(mixed_pdf, lang="eng", parallel=False))
+    assert [chunk.text.split("\n")[0] for chunk in chunks] == EXPECTED
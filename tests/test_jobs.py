@@ -0,0 +1,59 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+
+@pytest.fixture
+def jobs(app_module):
+    """Imported after the app, which points the default job database at scratch state."""
+    import jobs
+    return jobs
+
+
+def wait_for_status(queue, job_id, status):
+    for _ in range(500):
+        if queue.get(job_id)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never became {status}")
+
+
+@pytest.fixture
+def running_job(jobs, tmp_path):
+    """Starts a job that runs until released, owned by the given "host:pid:nonce", and returns its id."""
+    path = str(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+
+    def analysis(report_stage):
+        release.wait(10)
+        return {}
+
+    def start(owner):
+        queue = jobs.JobQueue(path=path, workers=1)
+        queue.owner = owner
+        job_id = queue.submit("analysis", analysis)
+        wait_for_status(queue, job_id, jobs.RUNNING)
+        return path, job_id
+
+    yield start
+    release.set()
+
+
+def test_jobs_of_an_exited_process_are_failed_on_startup(jobs, running_job):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    path, job_id = running_job(f"{socket.gethostname()}:{exited.pid}:0000abcd")
+
+    job = jobs.JobQueue(path=path, workers=1).get(job_id)
+    assert job["status"] == jobs.FAILED
+    assert job["error"] == "Interrupted by a server restart."
+
+
+def test_jobs_of_a_live_process_are_left_running(jobs, running_job):
+    path, job_id = running_job(f"{socket.gethostname()}:{os.getpid()}:0000abcd")
+
+    assert jobs.JobQueue(path=path, workers=1).get(job_id)["status"] == jobs.RUNNING
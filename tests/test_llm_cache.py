@@ -0,0 +1,74 @@
+import time
+import pytest
+from llm_cache import LLMCache, get_llm_cache
+
+
+def test_get_returns_what_put_stored_and_counts_misses():
+    cache = LLMCache(max_entries=4, ttl=60, path="")
+    assert cache.get("model", "prompt") is None
+    cache.put("model", "prompt", "reply")
+    assert cache.get("model", "prompt") == "reply"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_key_ignores_whitespace_but_not_model():
+    cache = LLMCache(path="")
+    cache.put("model", "Analyze  this\n text", "reply")
+    assert cache.get("model", "Analyze this text") == "reply"
+    assert cache.get("other-model", "Analyze this text") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMCache(max_entries=2, path="")
+    cache.put("model", "a", "A")
+    cache.put("model", "b", "B")
+    cache.get("model", "a")
+    cache.put("model", "c", "C")
+    assert cache.get("model", "b") is None
+    assert cache.get("model", "a") == "A"
+
+
+def test_expired_entries_miss(monkeypatch):
+    cache = LLMCache(ttl=10, path="")
+    cache.put("model", "prompt", "reply")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("model", "prompt") is None
+
+
+def test_sqlite_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    LLMCache(path=path).put("model", "prompt", "reply")
+    assert LLMCache(path=path).get("model", "prompt") == "reply"
+
+
+@pytest.fixture
+def llm_cache(app_module):
+    cache = get_llm_cache()
+    cache.clear()
+    return cache
+
+
+def test_chat_reply_is_served_from_the_cache_the_second_time(app_module, fake_gemini, llm_cache):
+    requests_before = fake_gemini.stats["requests"]
+    first = app_module.get_gemini_response("Which requirements mention login?", "The user shall log in with a password.")
+    second = app_module.get_gemini_response("Which requirements mention login?", "The user shall log in with a password.")
+    assert "reply" in first and second == first
+    assert fake_gemini.stats["requests"] == requests_before + 1
+
+
+def test_use_cache_false_always_calls_gemini(app_module, fake_gemini, llm_cache):
+    requests_before = fake_gemini.stats["requests"]
+    for _ in range(2):
+        app_module.get_gemini_response("Summarize the document", "The system shall export reports.", use_cache=False)
+    assert fake_gemini.stats["requests"] == requests_before + 2
+    assert llm_cache.stats()["entries"] == 0
+
+
+def test_analysis_is_cached_only_once_complete(app_module, fake_gemini, llm_cache):
+    text = "The system shall let users reset their password. Pages shall load within two seconds."
+    requests_before = fake_gemini.stats["requests"]
+    first = app_module.analyze_business_text(text)
+    second = app_module.analyze_business_text(text)
+    assert "error" not in first and second == first
+    assert fake_gemini.stats["requests"] == requests_before + 1
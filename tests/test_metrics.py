@@ -0,0 +1,91 @@
+import re
+import pytest
+import metrics
+from metrics import Registry, forward_metrics, increment, observe_stage, replay_metrics, take_forwarded_metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def parse(text):
+    """Checks text against the Prometheus text format and returns {family: (type, [(sample line name, line)])}."""
+    assert text.endswith("\n")
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if not line:
+            continue  # Empty lines are ignored by the format
+        if line.startswith("# HELP "):
+            current = line.split()[2]
+            assert current not in families, f"{current} is described twice"
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert name == current and kind in ("counter", "histogram")
+            families[name] = (kind, [])
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"not a sample line: {line!r}"
+            assert match.group(1) in (current, f"{current}_bucket", f"{current}_sum", f"{current}_count")
+            families[current][1].append((match.group(1), line))
+    return families
+
+
+def value(text, sample):
+    lines = [line for line in text.splitlines() if line.startswith(sample + " ")]
+    return float(lines[0].rsplit(" ", 1)[1]) if lines else 0
+
+
+@pytest.fixture
+def local(monkeypatch):
+    """A fresh registry that increment and observe_stage record into."""
+    monkeypatch.setattr(metrics, "registry", Registry())
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "_forwarded", None)
+    return metrics.registry
+
+
+def test_render_is_valid_prometheus_text(local):
+    increment("reqube_cache_hits_total", cache="extraction")
+    increment("reqube_llm_errors_total", model="gemini", reason='quote " and \\ slash')
+    observe_stage("extract", 0.02)
+    observe_stage("extract", 500)
+
+    families = parse(local.render())
+    assert families["reqube_cache_hits_total"][0] == "counter"
+    kind, samples = families["reqube_stage_seconds"]
+    assert kind == "histogram"
+    buckets = [float(line.rsplit(" ", 1)[1]) for name, line in samples if name.endswith("_bucket")]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == 2
+    assert 'le="+Inf"' in [line for name, line in samples if name.endswith("_bucket")][-1]
+
+
+def test_metrics_endpoint_serves_prometheus_text(app_module):
+    increment("reqube_cache_misses_total", cache="extraction")
+    observe_stage("extract", 0.01)
+    response = app_module.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    families = parse(response.get_data(as_text=True))
+    assert {"reqube_cache_misses_total", "reqube_stage_seconds"} <= set(families)
+
+
+def test_forwarded_metrics_are_counted_by_the_parent(local):
+    forward_metrics()
+    increment("reqube_ocr_pages_total", 3)
+    observe_stage("ocr", 0.2)
+    assert local.render() == "\n"  # Queued, not recorded, in the worker
+    updates = take_forwarded_metrics()
+    metrics._forwarded = None  # Back in the parent
+
+    replay_metrics(updates)
+    text = local.render()
+    assert value(text, "reqube_ocr_pages_total") == 3
+    assert value(text, 'reqube_stage_seconds_count{stage="ocr"}') == 1
+    assert value(text, 'reqube_stage_seconds_sum{stage="ocr"}') == pytest.approx(0.2)
+
+
+def test_take_forwarded_metrics_clears_the_queue(local):
+    forward_metrics()
+    increment("reqube_ocr_pages_total")
+    assert len(take_forwarded_metrics()) == 1
+    assert take_forwarded_metrics() == []
@@ -0,0 +1,83 @@
+import normalization
+from normalization import PAGE_BREAK, compact_for_prompt, fit_token_budget, normalize_text, strip_headers_footers
+
+
+def pages(*bodies):
+    return PAGE_BREAK.join(bodies)
+
+
+def test_running_headers_and_page_numbers_are_stripped():
+    text = pages(*(f"ACME Corp Requirements\nThe system shall do thing {n}.\nMore about thing {n}.\n- {n} -" for n in range(1, 5)))
+    normalized = normalize_text(text)
+    assert "ACME" not in normalized and "- 2 -" not in normalized
+    assert all(f"The system shall do thing {n}." in normalized for n in range(1, 5))
+
+
+def test_page_word_footers_match_whatever_the_number():
+    text = pages(*(f"Body text number {n} is here.\nPage {n} of 4" for n in range(1, 5)))
+    assert "Page" not in normalize_text(text)
+
+
+def test_numeric_table_rows_at_page_edges_are_kept():
+    rows = ["120 45 300", "121 46 301", "119 44 299", "122 47 302"]
+    result = strip_headers_footers([f"Quarter totals\n{row}" for row in rows])
+    assert [page.split("\n")[-1] for page in result] == rows
+
+
+def test_numbered_headings_are_not_page_numbers():
+    text = pages(*(f"Section {n}\nThe system shall support feature {n}." for n in range(1, 5)))
+    normalized = normalize_text(text)
+    assert all(f"Section {n}" in normalized for n in range(1, 5))
+
+
+def test_lines_repeated_in_the_body_are_not_taken_for_headers():
+    body = "Shared line in the middle"
+    text = pages(*(f"Opening sentence {n} here.\n{body}\nClosing sentence {n} here." for n in range(1, 5)))
+    assert normalize_text(text).count(body) == 4
+
+
+def test_too_few_pages_keep_their_edges():
+    text = pages("Title\nOne", "Title\nTwo")
+    assert normalize_text(text).count("Title") == 2
+
+
+def test_characters_hyphenation_and_spacing_are_cleaned():
+    text = "Re­quire​ments  are   listed here.\nThe require-\nments follow.\n\n\n\n~~~ *** ~~~\nColumn A \t\tColumn B\x07"
+    assert normalize_text(text) == "Requirements are listed here.\nThe requirements follow.\n\nColumn A\tColumn B"
+
+
+def test_capitalized_continuations_keep_their_hyphen():
+    assert normalize_text("Non-\nFunctional requirements") == "Non-\nFunctional requirements"
+
+
+def test_repeated_paragraphs_are_dropped_but_short_cells_kept():
+    paragraph = "The system shall encrypt all stored customer data at rest."
+    text = f"{paragraph}\n\nYes\n\n{paragraph}\n\nYes"
+    assert normalize_text(text) == f"{paragraph}\n\nYes\n\nYes"
+
+
+def test_omitted_passage_marker_survives():
+    assert normalize_text("First passage\n\n[...]\n\nSecond passage") == "First passage\n\n[...]\n\nSecond passage"
+
+
+def test_budget_cuts_at_a_paragraph_and_says_so():
+    text = "\n\n".join(f"Paragraph {n} " + "word " * 50 for n in range(20))
+    cut = fit_token_budget(text, 200)
+    assert cut.startswith("Paragraph 0") and "more tokens of the document were left out" in cut
+    assert fit_token_budget("short", 200) == "short"
+
+
+def test_compaction_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(normalization, "NORMALIZE_ENABLED", False)
+    assert compact_for_prompt("a  b", 100, "test") == "a  b"
+
+
+def test_chat_uses_the_whole_document_when_it_fits_once_compacted(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "CHAT_FULL_CONTEXT_TOKENS", 200)
+    header = "ACME Corporation Confidential Software Requirements Specification Version 4"
+    document = pages(*(f"{header}\nThe system shall support feature {n}." for n in range(15)))
+    assert app_module.estimate_tokens(document) > 200
+
+    prompt = app_module.build_chat_prompt("What about feature 3?", document)
+    assert "[...]" not in prompt
+    assert all(f"feature {n}." in prompt for n in range(15))
@@ -0,0 +1,52 @@
+import pytest
+from PIL import Image, ImageDraw
+from ocr_preprocess import choose_ocr_dpi, downscale, estimate_skew, otsu_threshold
+
+
+def text_lines(width=800, height=600):
+    """A white page with evenly spaced black bars standing in for lines of text."""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(60, height - 60, 30):
+        draw.rectangle((80, top, width - 80, top + 8), fill=0)
+    return image
+
+
+def test_otsu_threshold_separates_a_bimodal_image():
+    image = Image.new("L", (100, 100), 40)
+    image.paste(210, (0, 0, 100, 70))
+    assert 40 <= otsu_threshold(image) < 210
+
+
+@pytest.mark.parametrize("angle", [-3.0, -1.5, 2.0, 4.0])
+def test_skew_estimate_recovers_the_rotation(angle):
+    skewed = text_lines().rotate(angle, resample=Image.NEAREST, fillcolor=255)
+    assert estimate_skew(skewed) == pytest.approx(-angle, abs=0.3)
+
+
+def test_downscale_fits_the_pixel_budget_and_keeps_the_aspect_ratio():
+    image = downscale(Image.new("L", (4000, 3000), 255), max_pixels=1000000)
+    assert image.width * image.height <= 1000000
+    assert image.width / image.height == pytest.approx(4 / 3, rel=0.01)
+
+
+def test_images_within_the_budget_are_left_alone():
+    image = Image.new("L", (800, 600), 255)
+    assert downscale(image, max_pixels=1000000) is image
+
+
+@pytest.mark.parametrize("scan_width, expected_dpi", [(850, 150), (1700, 200), (3400, 300)])
+def test_scan_resolution_is_clamped(tmp_path, scan_width, expected_dpi):
+    import fitz
+    scan = tmp_path / "scan.png"
+    Image.new("L", (scan_width, scan_width * 22 // 17), 255).save(scan)  # The page's 8.5:11 shape
+    with fitz.open() as pdf:
+        page = pdf.new_page(width=612, height=792)  # US Letter, 8.5 x 11 inches
+        page.insert_image(page.rect, filename=str(scan))
+        assert choose_ocr_dpi(page, default_dpi=144) == pytest.approx(expected_dpi, rel=0.01)
+
+
+def test_pages_without_a_scan_use_the_default_dpi():
+    import fitz
+    with fitz.open() as pdf:
+        assert choose_ocr_dpi(pdf.new_page(width=612, height=792), default_dpi=144) == 144
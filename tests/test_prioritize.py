@@ -0,0 +1,102 @@
+import pytest
+import requests
+
+
+@pytest.fixture
+def prioritize(app_module):
+    """Imported after the app, which points the Gemini client at the fake server."""
+    import prioritize
+    return prioritize
+
+
+@pytest.fixture
+def batches(prioritize, monkeypatch):
+    """Runs get_priority_from_gemini uncached, one requirement per batch, recording each batch sent."""
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(prioritize, "batch_requirements", lambda reqs, max_items=1, max_chars=0: [[req] for req in reqs])
+    sent = []
+
+    def answer_with(handler):
+        def fake_request(batch):
+            sent.append([req["ID"] for req in batch])
+            return handler(batch)
+        monkeypatch.setattr(prioritize, "request_batch_priorities", fake_request)
+        return sent
+
+    return answer_with
+
+
+REQUIREMENTS = [{"ID": "R1", "Requirement": "Users can log in"}, {"ID": "R2", "Requirement": "Reports export to PDF"}]
+
+
+def test_failed_requests_are_not_retried_on_top_of_the_client(prioritize, batches):
+    def handler(batch):
+        if batch[0]["ID"] == "R1":
+            raise requests.exceptions.ConnectionError("refused")
+        return {"R2": "Should Have"}
+
+    sent = batches(handler)
+    assert prioritize.get_priority_from_gemini(REQUIREMENTS, use_cache=False) == {"R2": "Should Have"}
+    assert sent.count(["R1"]) == 1
+
+
+def test_unusable_answers_are_retried_in_rounds(prioritize, batches):
+    def handler(batch):
+        if batch[0]["ID"] == "R1" and sent.count(["R1"]) == 1:
+            raise ValueError("Gemini did not return a JSON object")
+        return {batch[0]["ID"]: "Must Have"}
+
+    sent = batches(handler)
+    assert prioritize.get_priority_from_gemini(REQUIREMENTS, use_cache=False) == {"R1": "Must Have", "R2": "Must Have"}
+    assert sent.count(["R1"]) == 2
+
+
+def test_unexpected_errors_stay_with_their_batch(prioritize, batches):
+    def handler(batch):
+        if batch[0]["ID"] == "R1":
+            raise KeyError("candidates")
+        return {"R2": "Could Have"}
+
+    sent = batches(handler)
+    assert prioritize.get_priority_from_gemini(REQUIREMENTS, use_cache=False) == {"R2": "Could Have"}
+    assert sent.count(["R1"]) == prioritize.GEMINI_PRIORITY_RETRY_ROUNDS + 1
+
+
+def test_answers_reach_requirements_with_integer_ids(prioritize, batches, monkeypatch):
+    class Unsure:
+        def classify_batch(self, texts):
+            return [{"category": ("Functional", 0.2, False), "priority": ("Could Have", 0.2, False)} for _ in texts]
+
+    monkeypatch.setattr(prioritize, "get_classifier", lambda: Unsure())
+    uncached = prioritize.get_priority_from_gemini
+    monkeypatch.setattr(prioritize, "get_priority_from_gemini", lambda reqs: uncached(reqs, use_cache=False))
+    batches(lambda batch: {str(batch[0]["ID"]): "Must Have"})
+    data = {"requirements": [{"ID": 1, "Requirement": "Xyzzy frobnicates the widget"},
+                             {"ID": 2, "Requirement": "Plugh reticulates splines"}]}
+
+    assert [req["priority"] for req in prioritize.prioritize_data(data)["requirements"]] == ["Must Have", "Must Have"]
+
+
+def test_only_requirements_the_classifier_is_unsure_of_reach_gemini(prioritize, batches, monkeypatch):
+    from classifier import RequirementClassifier
+    classifier = RequirementClassifier({
+        "priority": {
+            "Must Have": ["Archive the quarterly ledger snapshots", "Tidy the sidebar layout"],
+            "Could Have": ["Offer a dark colour theme", "Tidy the sidebar layout"],
+        },
+        "category": {"Functional": ["Archive the quarterly ledger snapshots"], "Non-Functional": ["Offer a dark colour theme"]},
+    })
+    monkeypatch.setattr(prioritize, "get_classifier", lambda: classifier)
+    uncached = prioritize.get_priority_from_gemini
+    monkeypatch.setattr(prioritize, "get_priority_from_gemini", lambda reqs: uncached(reqs, use_cache=False))
+    sent = batches(lambda batch: {str(batch[0]["ID"]): "Should Have"})
+    data = {"requirements": [
+        {"ID": "R1", "Requirement": "Archive the quarterly ledger snapshots"},  # Confident
+        {"ID": "R2", "Requirement": "Offer a dark colour theme"},  # Confident
+        {"ID": "R3", "Requirement": "Tidy the sidebar layout"},  # Ambiguous between two labels
+        {"ID": "R4", "Requirement": "Quarterly invoices reconcile"},  # Unlike any prototype
+    ]}
+
+    priorities = {req["ID"]: req["priority"] for req in prioritize.prioritize_data(data)["requirements"]}
+    assert priorities == {"R1": "Must Have", "R2": "Could Have", "R3": "Should Have", "R4": "Should Have"}
+    assert sorted(sent) == [["R3"], ["R4"]]
@@ -0,0 +1,66 @@
+import numpy as np
+from retrieval import BM25_B, BM25_K1, RetrievalIndex, get_index, tokenize
+
+PASSAGES = [
+    "Users shall log in with an email address and a password.",
+    "The dashboard shall show monthly revenue per region.",
+    "Reports shall be exported as PDF or CSV files.",
+    "Passwords shall be stored as salted hashes.",
+]
+
+
+def index_of(passages):
+    # A small chunk budget keeps each paragraph its own passage
+    return RetrievalIndex("\n\n".join(passages), chunk_tokens=20)
+
+
+def bm25(query, passages):
+    """Textbook BM25, to check the precomputed postings against."""
+    documents = [tokenize(passage) for passage in passages]
+    average_length = sum(map(len, documents)) / len(documents)
+    scores = []
+    for document in documents:
+        score = 0.0
+        for term in set(tokenize(query)):
+            containing = sum(term in other for other in documents)
+            if not containing:
+                continue
+            idf = np.log1p((len(documents) - containing + 0.5) / (containing + 0.5))
+            tf = document.count(term)
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(document) / average_length))
+        scores.append(score)
+    return scores
+
+
+def test_passages_follow_paragraphs():
+    assert index_of(PASSAGES).passages == PASSAGES
+
+
+def test_search_ranks_by_bm25():
+    query = "which password is stored as a hash"
+    scores = bm25(query, PASSAGES)
+    expected = sorted(range(len(PASSAGES)), key=lambda i: -scores[i])[:2]
+    assert all(scores[i] > 0 for i in expected)
+    assert index_of(PASSAGES).search(query, top_k=2) == [PASSAGES[i] for i in sorted(expected)]
+
+
+def test_passages_without_query_terms_are_left_out():
+    assert index_of(PASSAGES).search("revenue", top_k=3) == [PASSAGES[1]]
+
+
+def test_results_come_back_in_document_order():
+    results = index_of(PASSAGES).search("password reports", top_k=3)
+    assert results == [passage for passage in PASSAGES if passage in results]
+
+
+def test_unmatched_query_falls_back_to_the_start_of_the_document():
+    assert index_of(PASSAGES).search("summarize this", top_k=2) == PASSAGES[:2]
+
+
+def test_empty_document_has_no_results():
+    assert RetrievalIndex("").search("anything") == []
+
+
+def test_get_index_reuses_the_index_for_the_same_text():
+    text = "\n\n".join(PASSAGES)
+    assert get_index(text) is get_index(text)
@@ -0,0 +1,67 @@
+import json
+import random
+from rule_engine import KeywordAutomaton, RuleEngine, load_rule_sets
+
+RULE_SETS = {
+    "priority": {
+        "Must Have": ["upload", "store", "version control"],
+        "Should Have": ["real-time", "track"],
+        "Won't Have": ["future", "later"],
+    },
+    "category": {
+        "Functional": ["upload", "manage"],
+        "Non-Functional": ["performance", "security"],
+    },
+}
+
+
+def nested_scan(rule_sets, text):
+    """The any(keyword in text) loop the engine replaces."""
+    text = text.lower()
+    return {
+        group: next((label for label, keywords in rules.items() if any(keyword.lower() in text for keyword in keywords)), None)
+        for group, rules in rule_sets.items()
+    }
+
+
+def test_first_rule_in_order_wins():
+    engine = RuleEngine(RULE_SETS)
+    assert engine.classify("Track uploads in real-time") == {"priority": "Must Have", "category": "Functional"}
+
+
+def test_keywords_match_inside_words_and_ignore_case():
+    engine = RuleEngine(RULE_SETS)
+    assert engine.classify("Restore the SECURITY settings later") == {"priority": "Must Have", "category": "Non-Functional"}
+
+
+def test_no_match_is_none():
+    assert RuleEngine(RULE_SETS).classify("Show a welcome banner") == {"priority": None, "category": None}
+
+
+def test_overlapping_keywords_are_all_found():
+    automaton = KeywordAutomaton([("he", {"g": 2}), ("she", {"g": 1}), ("hers", {"g": 0})])
+    assert automaton.best_ranks("ushers") == {"g": 0}
+    assert automaton.best_ranks("ushe") == {"g": 1}
+
+
+def test_matches_the_nested_scan_on_random_texts():
+    rng = random.Random(3)
+    vocabulary = [keyword for rules in RULE_SETS.values() for keywords in rules.values() for keyword in keywords]
+    vocabulary += ["the", "system", "shall", "user", "report", "sto", "uplo", "tra", "-"]
+    engine = RuleEngine(RULE_SETS)
+    for _ in range(500):
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 8)))
+        text = text.replace(" ", rng.choice([" ", ""]), rng.randint(0, 2))
+        assert engine.classify(text) == nested_scan(RULE_SETS, text), text
+
+
+def test_batch_matches_single_classification():
+    engine = RuleEngine(RULE_SETS)
+    texts = ["Upload files", "Improve performance", "Nothing here"]
+    assert engine.classify_batch(texts) == [engine.classify(text) for text in texts]
+
+
+def test_load_rule_sets(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULE_SETS), encoding="utf-8")
+    assert load_rule_sets(str(path)) == RULE_SETS
@@ -0,0 +1,91 @@
+import pytest
+from flask import Flask, flash, get_flashed_messages, session
+from session_store import ServerSideSession, ServerSideSessionInterface, SessionStore
+
+
+class CountingStore(SessionStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.saves = 0
+
+    def save(self, session):
+        self.saves += 1
+        super().save(session)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return CountingStore(path=str(tmp_path / "sessions.sqlite3") if request.param == "sqlite" else "")
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.session_interface = ServerSideSessionInterface(store)
+
+    @app.route("/")
+    def index():
+        session.setdefault("conversations", [])
+        return str(len(session["conversations"]))
+
+    @app.route("/say/<text>")
+    def say(text):
+        conversations = session.get("conversations", [])
+        conversations.append(text)
+        session["conversations"] = conversations
+        return "ok"
+
+    @app.route("/flash")
+    def flash_message():
+        flash("saved")
+        return "ok"
+
+    @app.route("/flashes")
+    def flashes():
+        return ",".join(get_flashed_messages())
+
+    return app.test_client()
+
+
+def test_setdefault_of_an_existing_key_does_not_rewrite_the_session(client, store):
+    client.get("/")
+    saves = store.saves
+    for _ in range(3):
+        assert client.get("/").text == "0"
+    assert store.saves == saves
+
+
+def test_assigned_values_persist(client):
+    client.get("/say/hello")
+    client.get("/say/again")
+    assert client.get("/").text == "2"
+
+
+def test_flashed_messages_survive_to_the_next_request(client):
+    client.get("/flash")
+    assert client.get("/flashes").text == "saved"
+    assert client.get("/flashes").text == ""
+
+
+def test_in_place_edits_do_not_reach_the_store(store):
+    session = ServerSideSession({"conversations": [{"user": "hi"}]}, sid="sid", new=True)
+    store.save(session)
+
+    loaded = store.load("sid")
+    loaded["conversations"].append({"user": "unsaved"})
+    loaded["conversations"][0]["user"] = "changed"
+    session["conversations"].append({"user": "after save"})
+
+    assert store.load("sid") == {"conversations": [{"user": "hi"}]}
+
+
+def test_only_changed_keys_are_marked():
+    session = ServerSideSession({"a": [1], "b": "x"}, sid="sid")
+    session.setdefault("a", [])
+    assert not session.modified
+    session.setdefault("c", [])
+    session["b"] = "y"
+    del session["a"]
+    assert session.modified
+    assert session.changed_keys == {"b", "c"} and session.deleted_keys == {"a"}
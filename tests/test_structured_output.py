@@ -0,0 +1,88 @@
+import json
+import pytest
+import requests
+from structured_output import ANALYSIS_FIELDS, fill_missing, parse_json_lenient, validate_analysis
+
+COMPLETE = {
+    "key_points": ["Login", "Reports"],
+    "summary": "A reporting tool.",
+    "requirements": {"functional": ["FR1: Users log in"], "non_functional": ["NFR1: Pages load in 2 s"]},
+    "missing_info_questions": ["Which browsers?"],
+}
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(COMPLETE),
+    "```json\n" + json.dumps(COMPLETE, indent=2) + "\n```",
+    "Here is the analysis:\n" + json.dumps(COMPLETE) + "\nLet me know if you need more.",
+])
+def test_complete_json_is_found_wherever_it_is(text):
+    assert parse_json_lenient(text) == (COMPLETE, None)
+
+
+@pytest.mark.parametrize("text", ["", "No JSON here", "```json\n"])
+def test_nothing_recoverable_gives_none(text):
+    assert parse_json_lenient(text) == (None, None)
+
+
+def test_half_written_string_is_kept_and_marked_cut():
+    value, cut_path = parse_json_lenient('{"key_points": ["Login"], "summary": "A reporting to')
+    assert value == {"key_points": ["Login"], "summary": "A reporting to"}
+    assert cut_path == "summary"
+
+
+def test_half_written_list_item_is_dropped():
+    value, cut_path = parse_json_lenient('```json\n{"requirements": {"functional": ["FR1: Users log in", "FR2: Us')
+    assert value == {"requirements": {"functional": ["FR1: Users log in"]}}
+    assert cut_path == "requirements.functional"
+
+
+def test_cut_between_fields_marks_no_field():
+    text = json.dumps(COMPLETE)[:-1]
+    text = text[:text.index(', "missing_info_questions"')] + ', "missing_in'
+    value, cut_path = parse_json_lenient(text)
+    assert value["requirements"] == COMPLETE["requirements"]
+    assert cut_path == ""
+
+
+def test_validation_coerces_items_and_lists_absent_fields():
+    data = {"key_points": [{"id": "K1", "text": "Login"}, None, 3], "summary": ["not", "a", "string"]}
+    analysis, missing = validate_analysis(data)
+    assert analysis == {"key_points": ["K1: Login", "3"]}
+    assert missing == [path for path in ANALYSIS_FIELDS if path != "key_points"]
+
+
+def test_only_the_field_being_written_is_rerequested():
+    data, cut_path = parse_json_lenient(
+        '{"key_points": ["Login"], "summary": "Done.", "requirements": {"functional": ["FR1"]}, "non_f'
+    )
+    analysis, missing = validate_analysis(data, cut_path)
+    assert analysis["requirements"] == {"functional": ["FR1"]}
+    assert missing == ["requirements.non_functional", "missing_info_questions"]
+
+    data, cut_path = parse_json_lenient('{"key_points": ["Login"], "summary": "Do')
+    analysis, missing = validate_analysis(data, cut_path)
+    assert analysis["summary"] == "Do" and "summary" in missing and "key_points" not in missing
+
+
+def test_fill_missing_gives_the_full_shape():
+    assert fill_missing({"summary": "s"}) == {
+        "key_points": [], "summary": "s", "requirements": {"functional": [], "non_functional": []}, "missing_info_questions": [],
+    }
+
+
+def test_failed_repair_keeps_the_partial_analysis_uncached(app_module, monkeypatch):
+    from llm_cache import get_llm_cache
+    get_llm_cache().clear()
+    partial = '{"key_points": ["Login"], "summary": "A reporting tool.", "requirements": {"functional": ["FR1'
+    monkeypatch.setattr(app_module, "_generate_analysis_text", lambda prompt, fields=None: partial)
+
+    def unreachable(*args):
+        raise requests.exceptions.ConnectionError("Gemini is unreachable")
+
+    monkeypatch.setattr(app_module, "repair_analysis", unreachable)
+    result = app_module.analyze_business_text("The user shall log in.")
+
+    assert result["key_points"] == ["Login"] and result["summary"] == "A reporting tool."
+    assert result["requirements"] == {"functional": [], "non_functional": []}
+    assert get_llm_cache().stats()["entries"] == 0
@@ -0,0 +1,50 @@
+import io
+import os
+import upload_store
+from upload_store import UploadStore
+
+
+def make_store(tmp_path, **kwargs):
+    return UploadStore(root=str(tmp_path / "uploads"), path=str(tmp_path / "uploads.sqlite3"), **kwargs)
+
+
+def test_duplicate_content_is_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    first = store.save(io.BytesIO(b"spec"), "a.pdf")
+    second = store.save(io.BytesIO(b"spec"), "b.pdf")
+
+    assert second.path == first.path and second.duplicate and not first.duplicate
+    assert store.stats()["files"] == 1
+
+
+def test_only_unreferenced_uploads_are_collected(tmp_path):
+    store = make_store(tmp_path, max_bytes=0)
+    kept = store.save(io.BytesIO(b"in use"), "a.pdf")
+    released = store.save(io.BytesIO(b"done"), "b.pdf")
+    store.release(released.path)
+
+    store.collect()
+    assert os.path.exists(kept.path) and not os.path.exists(released.path)
+
+
+def test_another_process_starting_keeps_references_in_use(tmp_path):
+    running = make_store(tmp_path)
+    stored = running.save(io.BytesIO(b"being read"), "a.pdf")
+
+    restarted = make_store(tmp_path, max_bytes=0)
+    restarted.collect()
+    assert os.path.exists(stored.path)
+    assert restarted.stats()["referenced"] == 1
+
+    running.release(stored.path)
+    restarted.collect()
+    assert not os.path.exists(stored.path)
+
+
+def test_references_of_a_process_that_stopped_renewing_expire(tmp_path, monkeypatch):
+    gone = make_store(tmp_path)
+    stored = gone.save(io.BytesIO(b"abandoned"), "a.pdf")
+
+    monkeypatch.setattr(upload_store, "UPLOAD_REF_LEASE_SECONDS", -1)
+    make_store(tmp_path, max_bytes=0).collect()
+    assert not os.path.exists(stored.path)
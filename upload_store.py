@@ -0,0 +1,265 @@
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import namedtuple
+
+# Uploaded files live under UPLOAD_STORE_ROOT/objects, named by the SHA-256 of their content
+UPLOAD_STORE_ROOT = os.getenv("REQUBE_UPLOAD_STORE_ROOT", "uploads")
+UPLOAD_DB_PATH = os.getenv("REQUBE_UPLOAD_DB_PATH", os.path.join("cache", "uploads.sqlite3"))
+
+# Unreferenced uploads are removed once they are older than the age quota, or least recently
+# used first while the store is above the size quota
+UPLOAD_MAX_AGE_SECONDS = int(os.getenv("REQUBE_UPLOAD_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+UPLOAD_MAX_BYTES = int(os.getenv("REQUBE_UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_GC_INTERVAL_SECONDS = int(os.getenv("REQUBE_UPLOAD_GC_INTERVAL_SECONDS", "300"))
+
+# Each process holds its references under a lease it renews every UPLOAD_REF_HEARTBEAT_SECONDS; the
+# references of a process that stopped renewing for UPLOAD_REF_LEASE_SECONDS are dropped
+UPLOAD_REF_HEARTBEAT_SECONDS = float(os.getenv("REQUBE_UPLOAD_REF_HEARTBEAT_SECONDS", "15"))
+UPLOAD_REF_LEASE_SECONDS = float(os.getenv("REQUBE_UPLOAD_REF_LEASE_SECONDS", "120"))
+
+# Temp files left behind by a crash mid-upload are removed after this long
+STALE_TEMP_SECONDS = 60 * 60
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# digest is the SHA-256 hex of the content; duplicate is True when the content was already stored
+StoredUpload = namedtuple("StoredUpload", ["digest", "path", "size", "filename", "duplicate"])
+
+_UNREFERENCED = "NOT EXISTS (SELECT 1 FROM upload_refs WHERE upload_refs.path = uploads.path)"
+
+
+class UploadStore:
+    """Content-addressed store for uploaded files with reference counts and quota-based garbage collection.
+
+    Each distinct content (and extension, which decides the extractor) is kept once. Callers hold a
+    reference while they use a file and release it when done; only unreferenced files are collected.
+    Several processes may share the store; each counts its own references under a lease, so one
+    starting up or collecting never drops the references of another that is still running.
+    """
+
+    def __init__(self, root=UPLOAD_STORE_ROOT, path=UPLOAD_DB_PATH, max_bytes=UPLOAD_MAX_BYTES,
+                 max_age_seconds=UPLOAD_MAX_AGE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._objects_dir = os.path.join(root, "objects")
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            " path TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_access ON uploads(last_access)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS upload_refs ("
+            " path TEXT NOT NULL,"
+            " owner TEXT NOT NULL,"
+            " refs INTEGER NOT NULL,"
+            " heartbeat_at REAL NOT NULL,"
+            " PRIMARY KEY (path, owner))"
+        )
+        self._conn.commit()
+        self._expire_leases()
+        self._gc_thread = None
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="reqube-upload-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _object_path(self, digest, extension):
+        return os.path.join(self._objects_dir, digest[:2], digest + extension)
+
+    def save(self, stream, filename):
+        """Stores an uploaded stream, hashing it while it is written, and returns a referenced StoredUpload.
+
+        filename should already be sanitized; only its extension is kept with the content.
+        """
+        extension = os.path.splitext(filename)[1].lower()
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b""):
+                    digest.update(block)
+                    tmp.write(block)
+                    size += len(block)
+            digest = digest.hexdigest()
+            path = self._object_path(digest, extension)
+
+            now = time.time()
+            with self._lock:
+                # Referenced before the row is looked at, so another process's collector leaves it alone
+                self._conn.execute(
+                    "INSERT INTO upload_refs (path, owner, refs, heartbeat_at) VALUES (?, ?, 1, ?)"
+                    " ON CONFLICT (path, owner) DO UPDATE SET refs = refs + 1, heartbeat_at = excluded.heartbeat_at",
+                    (path, self.owner, now),
+                )
+                self._conn.commit()
+                row = self._conn.execute("SELECT 1 FROM uploads WHERE path = ?", (path,)).fetchone()
+                duplicate = row is not None and os.path.exists(path)
+                if duplicate:
+                    self._conn.execute("UPDATE uploads SET last_access = ? WHERE path = ?", (now, path))
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    tmp_path = None
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO uploads (path, digest, size, created_at, last_access)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (path, digest, size, now, now),
+                    )
+                self._conn.commit()
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
+
+        if duplicate:
+            logging.info(f"Upload {filename} is a duplicate of {path}")
+        else:
+            # Enforce the size quota as uploads arrive instead of waiting for the next periodic pass
+            self.collect(age=False)
+        return StoredUpload(digest, path, size, filename, duplicate)
+
+    def release(self, path):
+        """Drops one of this process's references to a stored upload; unreferenced uploads can be collected."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE upload_refs SET refs = refs - 1 WHERE path = ? AND owner = ?", (path, self.owner)
+            )
+            self._conn.execute("DELETE FROM upload_refs WHERE path = ? AND refs <= 0", (path,))
+            self._conn.execute("UPDATE uploads SET last_access = ? WHERE path = ?", (time.time(), path))
+            self._conn.commit()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(UPLOAD_REF_HEARTBEAT_SECONDS)
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE upload_refs SET heartbeat_at = ? WHERE owner = ?", (time.time(), self.owner)
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Upload reference heartbeat failed: {e}")
+
+    def _expire_leases(self):
+        """Drops the references of processes that stopped renewing them, which exited or hung."""
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM upload_refs WHERE owner != ? AND heartbeat_at < ?",
+                (self.owner, time.time() - UPLOAD_REF_LEASE_SECONDS),
+            ).rowcount
+            self._conn.commit()
+        if expired:
+            logging.info(f"Upload store dropped {expired} expired references")
+
+    def collect(self, age=True):
+        """Deletes unreferenced uploads past the age quota and, least recently used first, past the size quota."""
+        self._expire_leases()
+        removed = 0
+        now = time.time()
+        with self._lock:
+            if age:
+                rows = self._conn.execute(
+                    f"SELECT path FROM uploads WHERE {_UNREFERENCED} AND last_access < ?", (now - self.max_age_seconds,)
+                ).fetchall()
+                for (path,) in rows:
+                    removed += self._remove(path)
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM uploads").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute(
+                    f"SELECT path, size FROM uploads WHERE {_UNREFERENCED} ORDER BY last_access ASC"
+                ).fetchall()
+                for path, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    if self._remove(path):
+                        removed += 1
+                        total -= size
+            self._conn.commit()
+
+        if age:
+            self._remove_stale_temp_files(now)
+        if removed:
+            logging.info(f"Upload store collected {removed} files")
+        return removed
+
+    def _remove(self, path):
+        # Called under the lock, so a concurrent save in this process cannot have its file deleted; the
+        # reference check is repeated in the DELETE for saves in other processes since the SELECT
+        deleted = self._conn.execute(f"DELETE FROM uploads WHERE path = ? AND {_UNREFERENCED}", (path,)).rowcount
+        self._conn.commit()
+        if not deleted:
+            return 0
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Could not remove upload {path}: {e}")
+        return 1
+
+    def _remove_stale_temp_files(self, now):
+        for entry in os.scandir(self._tmp_dir):
+            try:
+                if entry.stat().st_mtime < now - STALE_TEMP_SECONDS:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def start_gc(self, interval=UPLOAD_GC_INTERVAL_SECONDS):
+        """Runs collect() every interval seconds on a daemon thread."""
+        if self._gc_thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.collect()
+                except Exception as e:
+                    logging.error(f"Upload garbage collection failed: {e}")
+
+        self._gc_thread = threading.Thread(target=run, name="reqube-upload-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stats(self):
+        """Returns the number of stored uploads, referenced uploads and bytes used."""
+        with self._lock:
+            files, referenced, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(NOT {_UNREFERENCED}), 0), COALESCE(SUM(size), 0) FROM uploads"
+            ).fetchone()
+        return {"files": files, "referenced": referenced, "bytes": total, "max_bytes": self.max_bytes}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store():
+    """Returns the process-wide upload store, starting its background collector on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadStore()
+            _store.start_gc()
+        return _store